@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Asynchronous, batched MLflow logging for one run.
+
+`mlflow.log_param` / `log_metric` / `log_artifact` each make a round trip to
+the tracking store (an HTTP request or an SQLite transaction) and block the
+caller until it is done. AsyncRunLogger queues them instead and a background
+thread sends them:
+
+    - params, metrics and tags are buffered and sent with MlflowClient.log_batch
+      (up to the MLflow batch limits per request). The buffer is sent when it
+      has been waiting for `linger` seconds, when it is full, or before any
+      queued artifact upload, so the store sees everything in logging order
+    - artifacts are uploaded by the same thread (log_artifact), and any other
+      call can be queued with submit(), e.g. mlflow.xgboost.log_model with the
+      run_id: the active run is thread-local, so calls made from the background
+      thread must name their run
+
+Metric timestamps are taken when log_metric is called, not when they are sent.
+Files passed to log_artifact must not change until the logger is flushed.
+
+flush() waits for everything queued so far. start_async_run() wraps
+mlflow.start_run() and flushes and stops the logger before the run ends, so a
+run is never marked finished with values still in the queue. Failed calls
+do not stop the thread; the next flush() or close() raises them together.
+
+Kept as an identical copy in 02-Experiment-Tracking/scripts/.
+
+Usage:
+    >>> with start_async_run() as run_logger:
+    ...     run_logger.log_params(params)
+    ...     for step in range(rounds):
+    ...         run_logger.log_metric('rmse', rmse, step=step)
+    ...     run_logger.log_artifact('models/preprocessor.b', artifact_path='preprocessor')
+    ...     run_logger.submit(mlflow.xgboost.log_model, booster, artifact_path='models_mlflow',
+    ...                       run_id=run_logger.run_id)
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+logger = logging.getLogger(__name__)
+
+# Per-request limits of the MLflow log_batch API (1000 entities in total)
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+MAX_METRICS_PER_BATCH = 800
+
+DEFAULT_LINGER_SECONDS = 0.5
+
+_VALUES = ('param', 'metric', 'tag')
+
+
+class AsyncRunLogger:
+    """
+    Queue of MLflow logging calls for one run, sent by a background thread.
+
+    Args:
+        run_id: Run to log to
+        client: MlflowClient (default: one for the current tracking URI)
+        linger: Seconds a buffered value may wait for more values to batch with
+
+    Attributes:
+        run_id: Run logged to
+        requests: Requests sent so far (log_batch calls and queued calls)
+    """
+
+    def __init__(self, run_id, client=None, linger=DEFAULT_LINGER_SECONDS):
+        self.run_id = run_id
+        self.requests = 0
+        self._client = client or MlflowClient()
+        self._linger = linger
+        self._queue = queue.Queue()
+        self._errors = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._work, name=f'mlflow-logger-{run_id[:8]}', daemon=True)
+        self._thread.start()
+
+    def log_param(self, key, value):
+        self._put('param', Param(key, str(value)))
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=None):
+        self._put('metric', Metric(key, float(value), int(time.time() * 1000), step or 0))
+
+    def log_metrics(self, metrics, step=None):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key, value):
+        self._put('tag', RunTag(key, str(value)))
+
+    def log_artifact(self, local_path, artifact_path=None):
+        """Upload a local file to the run's artifacts."""
+        self.submit(self._client.log_artifact, self.run_id, local_path, artifact_path)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue any call; it runs on the logging thread after everything queued before it."""
+        self._put('call', (fn, args, kwargs))
+
+    def flush(self, raise_errors=True):
+        """
+        Wait until everything queued so far has been sent.
+
+        Args:
+            raise_errors: Raise if a call failed since the last flush
+
+        Raises:
+            RuntimeError: If raise_errors and a logging call failed
+        """
+        done = threading.Event()
+        self._put('flush', done)
+        done.wait()
+        errors, self._errors = self._errors, []
+        if raise_errors and errors:
+            what, error = errors[0]
+            raise RuntimeError(f'{len(errors)} MLflow logging call(s) failed for run {self.run_id}, '
+                               f'first: {what}: {error}') from error
+
+    def close(self, raise_errors=True):
+        """
+        Send everything still queued and stop the logging thread.
+
+        Args:
+            raise_errors: Raise if a call failed since the last flush
+
+        Raises:
+            RuntimeError: If raise_errors and a logging call failed
+        """
+        if self._closed:
+            return
+        try:
+            self.flush(raise_errors)
+        finally:
+            self._closed = True
+            self._queue.put(('stop', None))
+            self._thread.join()
+
+    def _put(self, kind, payload):
+        if self._closed:
+            raise RuntimeError(f'AsyncRunLogger for run {self.run_id} is closed')
+        self._queue.put((kind, payload))
+
+    def _work(self):
+        while True:
+            kind, payload = self._queue.get()
+
+            # Gather values until the linger time passes, the batch is full
+            # or the next item is not a value
+            batch = {name: [] for name in _VALUES}
+            deadline = time.monotonic() + self._linger
+            while kind in batch:
+                batch[kind].append(payload)
+                full = len(batch['metric']) >= MAX_METRICS_PER_BATCH or len(batch['param']) >= MAX_PARAMS_PER_BATCH \
+                    or len(batch['tag']) >= MAX_TAGS_PER_BATCH
+                if full or time.monotonic() >= deadline:
+                    kind = None
+                    break
+                try:
+                    kind, payload = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    kind = None
+            if any(batch.values()):
+                self._send(batch)
+
+            if kind == 'call':
+                fn, args, kwargs = payload
+                self._run(getattr(fn, '__name__', repr(fn)), fn, *args, **kwargs)
+            elif kind == 'flush':
+                payload.set()
+            elif kind == 'stop':
+                return
+
+    def _send(self, batch):
+        # Last value of a repeated param or tag wins, as with separate calls
+        params = list({param.key: param for param in batch['param']}.values())
+        tags = list({tag.key: tag for tag in batch['tag']}.values())
+        self._run('log_batch', self._client.log_batch, self.run_id,
+                  metrics=batch['metric'], params=params, tags=tags)
+
+    def _run(self, what, fn, *args, **kwargs):
+        self.requests += 1
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f'MLflow {what} failed for run {self.run_id}: {e}')
+            self._errors.append((what, e))
+
+
+@contextmanager
+def start_async_run(linger=DEFAULT_LINGER_SECONDS, **kwargs):
+    """
+    mlflow.start_run() with an AsyncRunLogger that is flushed before the run ends.
+
+    Args:
+        linger: See AsyncRunLogger
+        **kwargs: Passed to mlflow.start_run()
+
+    Yields:
+        AsyncRunLogger of the run
+    """
+    with mlflow.start_run(**kwargs) as run:
+        run_logger = AsyncRunLogger(run.info.run_id, linger=linger)
+        try:
+            yield run_logger
+        except BaseException:
+            # Keep what was logged before the failure, report the failure itself
+            run_logger.close(raise_errors=False)
+            raise
+        run_logger.close()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Local on-disk cache for downloaded TLC parquet files.
+
+Files are stored content-addressed (blobs/<sha256[:2]>/<sha256>.parquet) and an
+index maps each URL to its blob, size and last access time. When the cache
+grows past its size limit the least recently used blobs are evicted.
+
+Configuration (environment variables):
+    TAXI_DATA_CACHE_DIR        Cache root (default: ~/.cache/nyc-taxi-data)
+    TAXI_DATA_CACHE_MAX_BYTES  Size limit in bytes (default: 2 GB)
+    TAXI_DATA_OFFLINE          "1" to serve only from cache, never download
+
+In offline mode a URL that is not cached raises FileNotFoundError, so tests can
+run against files seeded with `seed()` without touching the network.
+
+Blobs are written to a temporary file in their directory and renamed into
+place, so neither a crash nor a concurrent writer leaves a partial blob under
+its final name.
+
+Kept as an identical copy in 02-Experiment-Tracking/scripts/.
+
+Usage:
+    python data_cache.py list
+    python data_cache.py seed --year 2023 --month 1 data/green_tripdata_2023-01.parquet
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'nyc-taxi-data'
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def _file_digest(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DataCache:
+    """
+    Content-addressed, size-bounded LRU cache of downloaded files.
+
+    Args:
+        root: Cache directory (default: $TAXI_DATA_CACHE_DIR or ~/.cache/nyc-taxi-data)
+        max_bytes: Size limit (default: $TAXI_DATA_CACHE_MAX_BYTES or 2 GB)
+        offline: Never download (default: $TAXI_DATA_OFFLINE == "1")
+    """
+
+    def __init__(self, root=None, max_bytes=None, offline=None):
+        self.root = Path(root or os.getenv('TAXI_DATA_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.max_bytes = int(max_bytes or os.getenv('TAXI_DATA_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        if offline is None:
+            offline = os.getenv('TAXI_DATA_OFFLINE', '0') == '1'
+        self.offline = offline
+        self._lock = threading.Lock()
+        (self.root / 'blobs').mkdir(parents=True, exist_ok=True)
+
+    @property
+    def _index_path(self):
+        return self.root / 'index.json'
+
+    def _blob_path(self, digest):
+        return self.root / 'blobs' / digest[:2] / f'{digest}.parquet'
+
+    def _read_index(self):
+        if not self._index_path.exists():
+            return {}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        # Atomic replace so a crash never leaves a truncated index
+        tmp_path = self._index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def _store(self, source_file, url, index):
+        """Copy a file into the blob store and register it under url."""
+        digest = _file_digest(source_file)
+        blob = self._blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # An existing blob is only trusted if it has the expected content: a
+        # copy interrupted by an older version of this code may have left it partial
+        if not blob.exists() or _file_digest(blob) != digest:
+            # Copy to a unique name next to the blob, then rename: other
+            # processes never see a partially written blob
+            fd, tmp_file = tempfile.mkstemp(dir=blob.parent, suffix='.tmp')
+            os.close(fd)
+            try:
+                shutil.copyfile(source_file, tmp_file)
+                os.replace(tmp_file, blob)
+            finally:
+                Path(tmp_file).unlink(missing_ok=True)
+
+        index[url] = {
+            'sha256': digest,
+            'size': blob.stat().st_size,
+            'last_access': time.time()
+        }
+        return blob
+
+    def _evict(self, index, keep):
+        """Drop least recently used blobs until the cache fits in max_bytes."""
+        blobs = {}
+        for url, entry in index.items():
+            blob = blobs.setdefault(entry['sha256'], {'size': entry['size'], 'last_access': 0, 'urls': []})
+            blob['last_access'] = max(blob['last_access'], entry['last_access'])
+            blob['urls'].append(url)
+
+        total = sum(blob['size'] for blob in blobs.values())
+        for digest, blob in sorted(blobs.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            self._blob_path(digest).unlink(missing_ok=True)
+            for url in blob['urls']:
+                del index[url]
+            total -= blob['size']
+
+    def get(self, url):
+        """
+        Local path of a cached URL, or None if it is not cached.
+
+        Args:
+            url: Source URL
+
+        Returns:
+            Path to the cached file, or None
+        """
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(url)
+            if entry is None:
+                return None
+            blob = self._blob_path(entry['sha256'])
+            if not blob.exists() or blob.stat().st_size != entry['size']:
+                return None
+            entry['last_access'] = time.time()
+            self._write_index(index)
+            return self._blob_path(entry['sha256'])
+
+    def fetch(self, url):
+        """
+        Local path of a URL, downloading it on a cache miss.
+
+        Args:
+            url: Source URL
+
+        Returns:
+            Path to the cached file
+
+        Raises:
+            FileNotFoundError: If the URL is not cached and the cache is offline
+        """
+        path = self.get(url)
+        if path is not None:
+            return path
+
+        if self.offline:
+            raise FileNotFoundError(f'{url} is not in the data cache at {self.root} (offline mode)')
+
+        tmp_dir = self.root / 'tmp'
+        tmp_dir.mkdir(exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=tmp_dir, suffix='.parquet')
+        os.close(fd)
+        try:
+            urllib.request.urlretrieve(url, tmp_file)
+            return self.seed(url, tmp_file)
+        finally:
+            Path(tmp_file).unlink(missing_ok=True)
+
+    def seed(self, url, local_file):
+        """
+        Register an existing local file as the cached content of a URL.
+
+        Args:
+            url: URL the file stands for
+            local_file: File to copy into the cache
+
+        Returns:
+            Path to the cached file
+        """
+        with self._lock:
+            index = self._read_index()
+            blob = self._store(local_file, url, index)
+            self._evict(index, keep=index[url]['sha256'])
+            self._write_index(index)
+            return blob
+
+    def entries(self):
+        """Cached URLs with their sha256, size and last access time."""
+        return self._read_index()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache configured from the environment."""
+    global _default_cache
+    # One instance (and one index lock) even when months are fetched from several threads
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DataCache()
+    return _default_cache
+
+
+def fetch(url):
+    """Local path of a URL through the default cache (see DataCache.fetch)."""
+    return default_cache().fetch(url)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ingestion import trip_data_url
+
+    parser = argparse.ArgumentParser(description='Inspect or seed the local TLC data cache.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List cached URLs')
+    seed_parser = subparsers.add_parser('seed', help='Add a local parquet file for a month')
+    seed_parser.add_argument('--year', type=int, required=True)
+    seed_parser.add_argument('--month', type=int, required=True)
+    seed_parser.add_argument('file', type=str)
+    args = parser.parse_args()
+
+    cache = default_cache()
+    if args.command == 'seed':
+        url = trip_data_url(args.year, args.month)
+        print(f"Seeded {url} -> {cache.seed(url, args.file)}")
+    else:
+        entries = cache.entries()
+        total = sum(entry['size'] for entry in entries.values())
+        for url, entry in sorted(entries.items()):
+            print(f"{entry['size'] / 1024**2:8.1f} MB  {entry['sha256'][:12]}  {url}")
+        print(f"{len(entries)} files, {total / 1024**2:.1f} MB of {cache.max_bytes / 1024**2:.0f} MB in {cache.root}")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Memory-mapped store for the preprocessed training data.
+
+preprocess_data.py used to pickle X_train, y_train, X_val and y_val one file
+each, and every training script unpickled all of them into its own memory.
+The store writes every array as a plain .npy file instead (a sparse matrix as
+its data, indices and indptr arrays) plus a manifest.json describing them:
+
+    data/processed/
+        manifest.json
+        X_train.<generation>.data.npy  X_train.<generation>.indices.npy  X_train.<generation>.indptr.npy
+        y_train.<generation>.npy
+        ...
+
+Loading opens the files with np.load(mmap_mode='r'): it only reads the .npy
+headers, and pages are read from the OS page cache when they are used, so
+concurrent training processes share the same physical memory.
+
+Every save writes a new generation: files with a fresh generation suffix,
+then the manifest pointing at them, swapped in with a rename. A manifest
+therefore only ever names files of one complete write, and a reader can never
+combine the data of one version with the indices of another. Files of the
+previous generation are deleted once the new manifest is in place; a process
+already mapping them keeps reading them, and a reader that parsed the old
+manifest just before the swap reads the new one again.
+
+Directories written before the store (X_train.pkl, ...) are still read, from
+their pickles.
+
+Usage:
+    python dataset_store.py info data/processed
+    python dataset_store.py convert data/processed     # pickles -> store
+"""
+
+import json
+import os
+import pickle
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+SPARSE_FORMATS = {'csr': sp.csr_matrix, 'csc': sp.csc_matrix}
+
+# Manifest reads when a concurrent save deletes the generation being loaded
+LOAD_ATTEMPTS = 3
+
+
+def _save_array(directory, filename, array):
+    """Write one .npy file through a temporary name and rename it into place."""
+    tmp_path = directory / f'{filename}.tmp'
+    with open(tmp_path, 'wb') as f_out:
+        np.save(f_out, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp_path, directory / filename)
+    return filename
+
+
+def save_dataset(path, **arrays):
+    """
+    Write arrays and sparse matrices to the store.
+
+    Args:
+        path: Store directory, created if needed
+        **arrays: Name -> NumPy array or scipy CSR/CSC matrix
+
+    Returns:
+        Path of the manifest
+    """
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        previous = read_manifest(directory)
+    except ValueError:
+        previous = None
+    generation = uuid.uuid4().hex[:12]
+
+    entries = {}
+    for name, array in arrays.items():
+        if sp.issparse(array):
+            if array.format not in SPARSE_FORMATS:
+                array = array.tocsr()
+            entries[name] = {
+                'format': array.format,
+                'shape': list(array.shape),
+                'files': {
+                    part: _save_array(directory, f'{name}.{generation}.{part}.npy', getattr(array, part))
+                    for part in ('data', 'indices', 'indptr')
+                }
+            }
+        else:
+            array = np.asarray(array)
+            entries[name] = {
+                'format': 'dense',
+                'shape': list(array.shape),
+                'files': {'data': _save_array(directory, f'{name}.{generation}.npy', array)}
+            }
+
+    manifest = {'version': FORMAT_VERSION, 'generation': generation, 'created': time.time(), 'arrays': entries}
+    tmp_path = directory / f'{MANIFEST}.tmp'
+    with open(tmp_path, 'w') as f_out:
+        json.dump(manifest, f_out, indent=2, sort_keys=True)
+    os.replace(tmp_path, directory / MANIFEST)
+
+    if previous is not None:
+        for entry in previous['arrays'].values():
+            for filename in entry['files'].values():
+                (directory / filename).unlink(missing_ok=True)
+    return directory / MANIFEST
+
+
+def read_manifest(path):
+    """
+    Manifest of a store directory.
+
+    Args:
+        path: Store directory
+
+    Returns:
+        Manifest dict, or None if the directory has no manifest
+    """
+    manifest_path = Path(path) / MANIFEST
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f_in:
+        manifest = json.load(f_in)
+    if manifest.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset store version {manifest.get('version')} in {manifest_path}")
+    return manifest
+
+
+def _load_entry(directory, entry, mmap_mode):
+    files = {part: np.load(directory / filename, mmap_mode=mmap_mode, allow_pickle=False)
+             for part, filename in entry['files'].items()}
+    if entry['format'] == 'dense':
+        return files['data']
+    matrix_class = SPARSE_FORMATS[entry['format']]
+    return matrix_class((files['data'], files['indices'], files['indptr']), shape=tuple(entry['shape']), copy=False)
+
+
+def load_arrays(path, *names, mmap_mode='r'):
+    """
+    Load arrays from the store, memory-mapped.
+
+    Args:
+        path: Store directory
+        *names: Arrays to load
+        mmap_mode: np.load mmap_mode; None reads the arrays into memory
+
+    Returns:
+        Tuple with one array or sparse matrix per name, in order
+
+    Raises:
+        KeyError: If an array is not in the store
+    """
+    directory = Path(path)
+    for attempt in range(LOAD_ATTEMPTS):
+        manifest = read_manifest(directory)
+        if manifest is None:
+            # Directory written before the store
+            arrays = []
+            for name in names:
+                with open(directory / f'{name}.pkl', 'rb') as f_in:
+                    arrays.append(pickle.load(f_in))
+            return tuple(arrays)
+
+        missing = [name for name in names if name not in manifest['arrays']]
+        if missing:
+            raise KeyError(f'{missing} not in the dataset store at {directory}')
+        try:
+            return tuple(_load_entry(directory, manifest['arrays'][name], mmap_mode) for name in names)
+        except FileNotFoundError:
+            # A newer generation replaced this manifest and deleted its files
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or convert a preprocessed data directory.')
+    parser.add_argument('command', choices=['info', 'convert'])
+    parser.add_argument('path', nargs='?', default='data/processed', help='Data directory (default: data/processed)')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        names = [name for name in ('X_train', 'y_train', 'X_val', 'y_val')
+                 if (Path(args.path) / f'{name}.pkl').exists()]
+        arrays = dict(zip(names, load_arrays(args.path, *names))) if read_manifest(args.path) is None else {}
+        if not arrays:
+            parser.exit(message=f'Nothing to convert in {args.path}\n')
+        print(f'Wrote {save_dataset(args.path, **arrays)}')
+        for name in names:
+            (Path(args.path) / f'{name}.pkl').unlink()
+
+    manifest = read_manifest(args.path)
+    if manifest is None:
+        parser.exit(message=f'{args.path} has no {MANIFEST}\n')
+    for name, entry in sorted(manifest['arrays'].items()):
+        size = sum((Path(args.path) / filename).stat().st_size for filename in entry['files'].values())
+        print(f"{name:<10} {entry['format']:<6} {str(tuple(entry['shape'])):<16} {size / 1024**2:>8.1f} MB")
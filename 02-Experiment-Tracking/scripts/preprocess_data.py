@@ -1,16 +1,21 @@
 
 import os
-import pandas as pd
 from sklearn.feature_extraction import DictVectorizer
 import pickle
-import urllib.request
+import shutil
+
+from data_cache import fetch
+from dataset_store import save_dataset
+from ingestion import load_trips, trip_data_url
 
 def download_data(url, filename):
-    """Downloads data from a URL and saves it to a file."""
-    print(f"Downloading {url} to {filename}...")
+    """Copies data from a URL to a file, downloading it only if it is not in the local cache."""
+    print(f"Fetching {url} to {filename}...")
     try:
-        urllib.request.urlretrieve(url, filename)
-        print(f"✅ Downloaded {filename}")
+        cached = fetch(url)
+        if not os.path.exists(filename) or os.path.getsize(filename) != os.path.getsize(cached):
+            shutil.copyfile(cached, filename)
+        print(f"✅ {filename} ready (cached at {cached})")
     except Exception as e:
         print(f"❌ Error downloading {filename}: {e}")
         raise
@@ -22,14 +27,16 @@ def preprocess_data(data_path, output_path):
     os.makedirs(output_path, exist_ok=True)
 
     # Download and load the data
-    jan_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_2023-01.parquet"
-    feb_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_2023-02.parquet"
+    jan_url = trip_data_url(2023, 1)
+    feb_url = trip_data_url(2023, 2)
 
     download_data(jan_url, os.path.join(data_path, "jan.parquet"))
     download_data(feb_url, os.path.join(data_path, "feb.parquet"))
 
-    df_jan = pd.read_parquet(os.path.join(data_path, "jan.parquet"))
-    df_feb = pd.read_parquet(os.path.join(data_path, "feb.parquet"))
+    # Reads only the needed columns and computes duration, outlier
+    # filter and compact dtypes in columnar form (see ingestion.py)
+    df_jan = load_trips(os.path.join(data_path, "jan.parquet"))
+    df_feb = load_trips(os.path.join(data_path, "feb.parquet"))
 
     # For simplicity, we'll just use the January and February data for training and validation
     df_train = df_jan
@@ -39,14 +46,6 @@ def preprocess_data(data_path, output_path):
     categorical = ['PULocationID', 'DOLocationID']
     numerical = ['trip_distance']
 
-    df_train['duration'] = df_train.lpep_dropoff_datetime - df_train.lpep_pickup_datetime
-    df_train.duration = df_train.duration.apply(lambda td: td.total_seconds() / 60)
-    df_train = df_train[(df_train.duration >= 1) & (df_train.duration <= 60)]
-
-    df_val['duration'] = df_val.lpep_dropoff_datetime - df_val.lpep_pickup_datetime
-    df_val.duration = df_val.duration.apply(lambda td: td.total_seconds() / 60)
-    df_val = df_val[(df_val.duration >= 1) & (df_val.duration <= 60)]
-
     df_train[categorical] = df_train[categorical].astype(str)
     df_val[categorical] = df_val[categorical].astype(str)
 
@@ -61,15 +60,8 @@ def preprocess_data(data_path, output_path):
     y_train = df_train[target].values
     y_val = df_val[target].values
 
-    # Save the preprocessed data
-    with open(os.path.join(output_path, "X_train.pkl"), "wb") as f:
-        pickle.dump(X_train, f)
-    with open(os.path.join(output_path, "y_train.pkl"), "wb") as f:
-        pickle.dump(y_train, f)
-    with open(os.path.join(output_path, "X_val.pkl"), "wb") as f:
-        pickle.dump(X_val, f)
-    with open(os.path.join(output_path, "y_val.pkl"), "wb") as f:
-        pickle.dump(y_val, f)
+    # Save the preprocessed data as memory-mappable .npy arrays (see dataset_store.py)
+    save_dataset(output_path, X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
     with open(os.path.join(output_path, "dv.pkl"), "wb") as f:
         pickle.dump(dv, f)
 
@@ -1,14 +1,10 @@
 
-import os
-import pickle
 import click
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 
-def load_pickle(filename: str):
-    with open(filename, "rb") as f_in:
-        return pickle.load(f_in)
+from dataset_store import load_arrays
 
 @click.command()
 @click.option(
@@ -17,8 +13,7 @@ def load_pickle(filename: str):
     help="Location where the processed NYC taxi trip data was saved"
 )
 def run_train(data_path: str):
-    X_train, y_train = load_pickle(os.path.join(data_path, "X_train.pkl")), load_pickle(os.path.join(data_path, "y_train.pkl"))
-    X_val, y_val = load_pickle(os.path.join(data_path, "X_val.pkl")), load_pickle(os.path.join(data_path, "y_val.pkl"))
+    X_train, y_train, X_val, y_val = load_arrays(data_path, "X_train", "y_train", "X_val", "y_val")
 
     rf = RandomForestRegressor(max_depth=10, random_state=0)
     rf.fit(X_train, y_train)
@@ -1,21 +1,16 @@
 
-import os
-import pickle
-
 import click
 import mlflow
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 
+from dataset_store import load_arrays
+
 # Connect to the MLflow UI server instead of local SQLite
 mlflow.set_tracking_uri("http://127.0.0.1:5000")
 mlflow.set_experiment("nyc-taxi-experiment")
 
-def load_pickle(filename: str):
-    with open(filename, "rb") as f_in:
-        return pickle.load(f_in)
-
 @click.command()
 @click.option(
     "--data_path",
@@ -24,8 +19,7 @@ def load_pickle(filename: str):
 )
 def run_train(data_path: str):
     with mlflow.start_run():
-        X_train, y_train = load_pickle(os.path.join(data_path, "X_train.pkl")), load_pickle(os.path.join(data_path, "y_train.pkl"))
-        X_val, y_val = load_pickle(os.path.join(data_path, "X_val.pkl")), load_pickle(os.path.join(data_path, "y_val.pkl"))
+        X_train, y_train, X_val, y_val = load_arrays(data_path, "X_train", "y_train", "X_val", "y_val")
 
         rf = RandomForestRegressor(max_depth=10, random_state=0)
         rf.fit(X_train, y_train)
@@ -1,20 +1,135 @@
-
 import os
-import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
 import click
 import mlflow
 import numpy as np
 import optuna
+from optuna.storages import JournalStorage
+from optuna.storages.journal import JournalFileBackend
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 
-mlflow.set_tracking_uri("http://127.0.0.1:5000")
+from async_tracking import start_async_run
+from dataset_store import load_arrays, save_dataset
+
+mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000"))
 mlflow.set_experiment("nyc-taxi-experiment-hpo")
 
-def load_pickle(filename: str):
-    with open(filename, "rb") as f_in:
-        return pickle.load(f_in)
+# Trees added between two pruning checks
+TREES_PER_STEP = 10
+
+def share_data(data_path: str, shared_dir: str):
+    """Stores the data in the forms the forest uses, for memory mapping in the worker processes.
+
+    RandomForestRegressor trains on float32 CSC and predicts on float32 CSR, so the
+    matrices are converted once here: the forest uses the mapped pages as they are
+    instead of every worker converting its own copy.
+    """
+    X_train, y_train, X_val, y_val = load_arrays(data_path, "X_train", "y_train", "X_val", "y_val")
+    save_dataset(
+        shared_dir,
+        X_train=X_train.astype(np.float32).tocsc(), y_train=np.asarray(y_train, dtype=np.float64),
+        X_val=X_val.astype(np.float32).tocsr(), y_val=np.asarray(y_val, dtype=np.float64)
+    )
+    return shared_dir
+
+def make_storage(storage: str):
+    """Optuna storage shared by the workers: an RDB URL (sqlite:///...) or a journal file."""
+    if "://" in storage:
+        return storage
+    return JournalStorage(JournalFileBackend(storage))
+
+def make_pruner():
+    # Stop a trial whose RMSE is worse than the median of the previous trials at the same number
+    # of trees (the reported step); never after the first TREES_PER_STEP trees
+    return optuna.pruners.MedianPruner(n_startup_trials=3, n_warmup_steps=TREES_PER_STEP + 1)
+
+def objective(trial, data, n_jobs: int):
+    X_train, y_train, X_val, y_val = data
+    params = {
+        'n_estimators': trial.suggest_int('n_estimators', 10, 50, step=1),
+        'max_depth': trial.suggest_int('max_depth', 1, 20, step=1),
+        'min_samples_split': trial.suggest_int('min_samples_split', 2, 10, step=1),
+        'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 4, step=1),
+        'random_state': 42,
+        'n_jobs': n_jobs
+    }
+    # Logged by a background thread in batches (see async_tracking.py),
+    # so the trial does not wait on the tracking server between steps
+    with start_async_run() as run_logger:
+        run_logger.log_params(params)
+
+        # The forest grows TREES_PER_STEP trees at a time; with warm_start and a
+        # fixed random_state it ends up with the same trees as a single fit
+        rf = RandomForestRegressor(warm_start=True, **params)
+        pred_sum = np.zeros(len(y_val))
+        pruned = False
+        for n_trees in range(TREES_PER_STEP, params['n_estimators'] + TREES_PER_STEP, TREES_PER_STEP):
+            n_fitted = len(getattr(rf, 'estimators_', []))
+            rf.set_params(n_estimators=min(n_trees, params['n_estimators']))
+            rf.fit(X_train, y_train)
+            for tree in rf.estimators_[n_fitted:]:
+                pred_sum += tree.predict(X_val)
+            rmse = np.sqrt(mean_squared_error(y_val, pred_sum / rf.n_estimators))
+            run_logger.log_metric("rmse", rmse, step=rf.n_estimators)
+
+            # Same step as the MLflow metric: trials are compared at equal forest sizes
+            trial.report(rmse, rf.n_estimators)
+            if trial.should_prune():
+                pruned = True
+                break
+        run_logger.set_tag("optuna_state", "PRUNED" if pruned else "COMPLETE")
+
+    if pruned:
+        raise optuna.TrialPruned()
+    return rmse
+
+def run_worker(storage: str, study_name: str, n_trials: int, data_dir: str, n_jobs: int, seed: int):
+    """Runs n_trials of a shared study on the memory-mapped data."""
+    data = load_arrays(data_dir, "X_train", "y_train", "X_val", "y_val")
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=make_storage(storage),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=make_pruner()
+    )
+    study.optimize(lambda trial: objective(trial, data, n_jobs), n_trials=n_trials)
+
+def optimize(data_dir: str, storage: str, study_name: str, n_trials: int, n_workers: int):
+    """Runs n_trials split over n_workers processes and returns the study and the elapsed seconds."""
+    study = optuna.create_study(
+        study_name=study_name, storage=make_storage(storage), direction="minimize", load_if_exists=True
+    )
+    # Each worker's forest gets its share of the cores
+    n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+    counts = [n_trials // n_workers + (i < n_trials % n_workers) for i in range(n_workers)]
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        run_worker(storage, study_name, n_trials, data_dir, n_jobs, seed=42)
+    else:
+        with ProcessPoolExecutor(n_workers, mp_context=get_context("spawn")) as pool:
+            futures = [
+                pool.submit(run_worker, storage, study_name, count, data_dir, n_jobs, 42 + i)
+                for i, count in enumerate(counts)
+            ]
+            for future in futures:
+                future.result()
+    return study, time.perf_counter() - start
+
+def summarize(study, seconds: float):
+    states = [trial.state for trial in study.trials]
+    return {
+        'complete': states.count(optuna.trial.TrialState.COMPLETE),
+        'pruned': states.count(optuna.trial.TrialState.PRUNED),
+        'seconds': seconds,
+        'trials_per_hour': len(states) / seconds * 3600,
+        'best_rmse': study.best_value
+    }
 
 @click.command()
 @click.option(
@@ -22,34 +137,35 @@ def load_pickle(filename: str):
     default="./data/processed",
     help="Location where the processed NYC taxi trip data was saved"
 )
-def run_optimization(data_path: str):
-    X_train, y_train = load_pickle(os.path.join(data_path, "X_train.pkl")), load_pickle(os.path.join(data_path, "y_train.pkl"))
-    X_val, y_val = load_pickle(os.path.join(data_path, "X_val.pkl")), load_pickle(os.path.join(data_path, "y_val.pkl"))
-
-    def objective(trial):
-        with mlflow.start_run():
-            params = {
-                'n_estimators': trial.suggest_int('n_estimators', 10, 50, 1),
-                'max_depth': trial.suggest_int('max_depth', 1, 20, 1),
-                'min_samples_split': trial.suggest_int('min_samples_split', 2, 10, 1),
-                'min_samples_leaf': trial.suggest_int('min_samples_leaf', 1, 4, 1),
-                'random_state': 42,
-                'n_jobs': -1
-            }
-            mlflow.log_params(params)
-
-            rf = RandomForestRegressor(**params)
-            rf.fit(X_train, y_train)
-            y_pred = rf.predict(X_val)
-            rmse = np.sqrt(mean_squared_error(y_val, y_pred))
-            mlflow.log_metric("rmse", rmse)
+@click.option("--n_trials", default=10, help="Number of Optuna trials")
+@click.option("--n_workers", default=1, help="Worker processes running trials in parallel")
+@click.option(
+    "--storage",
+    default=None,
+    help="Optuna storage: sqlite:///... URL or journal file (default: <data_path>/optuna_journal.log)"
+)
+@click.option("--study_name", default=None, help="Study to create or resume (default: a new study)")
+@click.option("--scaling", is_flag=True, help="Report trials per hour for 1..n_workers workers")
+def run_optimization(data_path: str, n_trials: int, n_workers: int, storage: str, study_name: str, scaling: bool):
+    storage = storage or os.path.join(data_path, "optuna_journal.log")
+    study_name = study_name or f"rf-hpo-{time.strftime('%Y%m%d-%H%M%S')}"
 
-        return rmse
+    with tempfile.TemporaryDirectory(prefix="hpo-data-") as shared_dir:
+        data_dir = share_data(data_path, shared_dir)
 
-    sampler = optuna.samplers.TPESampler(seed=42)
-    study = optuna.create_study(direction="minimize", sampler=sampler)
-    study.optimize(objective, n_trials=10)
+        if not scaling:
+            study, seconds = optimize(data_dir, storage, study_name, n_trials, n_workers)
+            result = summarize(study, seconds)
+            print(f"{result['complete']} complete, {result['pruned']} pruned trials in {seconds:.1f} s "
+                  f"({result['trials_per_hour']:.0f} trials/hour), best RMSE: {result['best_rmse']:.4f}")
+            return
+
+        print(f"{'workers':>7} {'complete':>8} {'pruned':>6} {'seconds':>8} {'trials/hour':>11} {'best RMSE':>9}")
+        for workers in range(1, n_workers + 1):
+            study, seconds = optimize(data_dir, storage, f"{study_name}-{workers}w", n_trials, workers)
+            result = summarize(study, seconds)
+            print(f"{workers:>7} {result['complete']:>8} {result['pruned']:>6} {seconds:>8.1f} "
+                  f"{result['trials_per_hour']:>11.0f} {result['best_rmse']:>9.4f}")
 
 if __name__ == '__main__':
     run_optimization()
-    run_optimization()
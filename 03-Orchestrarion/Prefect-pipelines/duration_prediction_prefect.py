@@ -2,12 +2,18 @@
 # coding: utf-8
 
 import os
+import sys
+import time
 import pickle
+import shutil
 import logging
+import tempfile
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import xgboost as xgb
 from sklearn.feature_extraction import DictVectorizer
 from sklearn.metrics import root_mean_squared_error
@@ -16,6 +22,27 @@ import mlflow
 from prefect import task, flow, get_run_logger
 from prefect.artifacts import create_table_artifact, create_markdown_artifact
 
+# Shared ingestion and data cache modules live in 03-Orchestrarion/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import columnar_encoder
+import ingestion
+from async_tracking import start_async_run
+from columnar_encoder import ColumnarEncoder
+from data_cache import fetch
+from frame_cache import FrameCache, code_version
+from ingestion import load_trips, trip_data_url
+from model_artifact import export_dict_vectorizer
+from xgb_training import (
+    DEFAULT_BATCH_ROWS,
+    MATRIX_MODES,
+    RoundStats,
+    build_matrices,
+    fit_parquet_encoder,
+    matrix_batches,
+    parquet_batches,
+    peak_rss_mb,
+)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,40 +73,46 @@ setup_mlflow()
 
 
 @task(name="load_data", description="Load NYC taxi data from parquet files", retries=3, retry_delay_seconds=10)
-def read_dataframe(year: int, month: int) -> pd.DataFrame:
+def read_dataframe(year: int, month: int, use_cache: bool = True) -> pd.DataFrame:
     """
     Load NYC taxi data for a specific year and month.
 
+    The cleaned frame is cached on disk per (year, month, ingestion code
+    version), so a month used again in a later run is not reprocessed.
+
     Args:
         year: Year of the data to load
         month: Month of the data to load
+        use_cache: Read/write the cleaned frame cache
 
     Returns:
         Processed DataFrame with duration feature
     """
     logger = get_run_logger()
     
-    url = f'https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_{year}-{month:02d}.parquet'
-    logger.info(f"Loading data from: {url}")
-    
-    try:
-        df = pd.read_parquet(url)
-        logger.info(f"Successfully loaded {len(df)} records")
-    except Exception as e:
-        logger.error(f"Failed to load data from {url}: {e}")
-        raise
-
-    # Feature engineering
-    df['duration'] = df.lpep_dropoff_datetime - df.lpep_pickup_datetime
-    df.duration = df.duration.apply(lambda td: td.total_seconds() / 60)
+    url = trip_data_url(year, month)
+    version = code_version(ingestion)
+    cache = FrameCache() if use_cache else None
+    df = cache.load_frame(year, month, version) if cache else None
+    if df is not None:
+        logger.info(f"Loaded {len(df)} cleaned records for {year}-{month:02d} from cache")
+    else:
+        logger.info(f"Loading data from: {url}")
 
-    # Filter outliers
-    df = df[(df.duration >= 1) & (df.duration <= 60)]
+        try:
+            # Downloaded once, then served from the local data cache
+            path = fetch(url)
+            logger.info(f"Using cached file: {path}")
+            # Reads only the needed columns; duration, outlier filter and PU_DO
+            # are computed in columnar form with compact dtypes
+            df = load_trips(path)
+            logger.info(f"Successfully loaded {len(df)} records")
+        except Exception as e:
+            logger.error(f"Failed to load data from {url}: {e}")
+            raise
 
-    # Categorical features
-    categorical = ['PULocationID', 'DOLocationID']
-    df[categorical] = df[categorical].astype(str)
-    df['PU_DO'] = df['PULocationID'] + '_' + df['DOLocationID']
+        if cache:
+            logger.info(f"Cached cleaned frame: {cache.save_frame(df, year, month, version)}")
 
     # Create artifact with data summary
     summary_data = [
@@ -99,14 +132,26 @@ def read_dataframe(year: int, month: int) -> pd.DataFrame:
     return df
 
 
-@task(name="create_features", description="Create feature matrix using DictVectorizer")
-def create_features(df: pd.DataFrame, dv: Optional[DictVectorizer] = None) -> Tuple[any, DictVectorizer]:
+@task(name="create_features", description="Create feature matrix with the columnar encoder")
+def create_features(
+    df: pd.DataFrame,
+    dv: Optional[DictVectorizer] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    use_cache: bool = True
+) -> Tuple[any, DictVectorizer]:
     """
     Create feature matrix from DataFrame.
 
+    When year and month are given the matrix (and the DictVectorizer, if it is
+    fitted here) is cached on disk per (year, month, code version, vocabulary).
+
     Args:
         df: Input DataFrame
         dv: Pre-fitted DictVectorizer (optional)
+        year: Year of the data, used as cache key (optional)
+        month: Month of the data, used as cache key (optional)
+        use_cache: Read/write the feature matrix cache
 
     Returns:
         Tuple of (feature matrix, DictVectorizer)
@@ -120,13 +165,21 @@ def create_features(df: pd.DataFrame, dv: Optional[DictVectorizer] = None) -> Tu
     missing_cols = [col for col in categorical + numerical if col not in df.columns]
     if missing_cols:
         raise ValueError(f"Missing required columns: {missing_cols}")
-    
-    dicts = df[categorical + numerical].to_dict(orient='records')
-    logger.info(f"Created {len(dicts)} feature dictionaries")
 
+    fitted = dv is None
+    cache = FrameCache() if use_cache and year is not None and month is not None else None
+    version = code_version(ingestion, columnar_encoder, create_features.fn)
+    cached = cache.load_features(year, month, version, dv) if cache else None
+    if cached is not None:
+        logger.info(f"Loaded {cached[0].shape} feature matrix for {year}-{month:02d} from cache")
+        return cached
+    
+    # Same matrix as DictVectorizer on to_dict(orient='records'), built from
+    # the columns without one dict per trip; dv stays a DictVectorizer
     if dv is None:
-        dv = DictVectorizer(sparse=True)
-        X = dv.fit_transform(dicts)
+        encoder = ColumnarEncoder(categorical, numerical)
+        X = encoder.fit_transform(df)
+        dv = encoder.to_dict_vectorizer()
 
         # Create artifact with feature info
         feature_info = [
@@ -142,38 +195,41 @@ def create_features(df: pd.DataFrame, dv: Optional[DictVectorizer] = None) -> Tu
             description="Feature matrix information"
         )
     else:
-        X = dv.transform(dicts)
+        X = ColumnarEncoder.from_dict_vectorizer(dv, categorical, numerical).transform(df)
+
+    logger.info(f"Encoded {X.shape[0]} samples into {X.shape[1]} features")
+
+    if cache:
+        logger.info(f"Cached feature matrix: {cache.save_features(X, dv, year, month, version, fitted)}")
 
     return X, dv
 
 
-@task(name="train_model", description="Train XGBoost model with MLflow tracking")
-def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
+def fit_and_log(train, valid, y_val, dv: DictVectorizer, matrix: str, build_seconds: float) -> str:
     """
-    Train XGBoost model and log to MLflow.
+    Train XGBoost on prepared matrices, log to MLflow and create the Prefect artifacts.
 
     Args:
-        X_train: Training features
-        y_train: Training targets
-        X_val: Validation features
+        train: Training matrix
+        valid: Validation DMatrix
         y_val: Validation targets
         dv: Fitted DictVectorizer
+        matrix: Matrix mode the matrices were built with
+        build_seconds: Time spent building the matrices
 
     Returns:
         MLflow run ID
     """
     logger = get_run_logger()
-    
+    build_peak_mb = peak_rss_mb()
+
     # Ensure models directory exists
     models_folder = Path('models')
     models_folder.mkdir(exist_ok=True)
-    
-    logger.info(f"Training with {X_train.shape[0]} samples, {X_train.shape[1]} features")
-
-    with mlflow.start_run() as run:
-        train = xgb.DMatrix(X_train, label=y_train)
-        valid = xgb.DMatrix(X_val, label=y_val)
 
+    # Params, metrics and uploads are sent by a background thread (see
+    # async_tracking.py) and flushed before the run ends
+    with start_async_run() as run_logger:
         best_params = {
             'learning_rate': 0.09585355369315604,
             'max_depth': 30,
@@ -184,33 +240,42 @@ def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
             'seed': 42
         }
 
-        mlflow.log_params(best_params)
+        run_logger.log_params(best_params)
+        run_logger.log_param("matrix", matrix)
 
+        round_stats = RoundStats()
+        train_start = time.perf_counter()
         booster = xgb.train(
             params=best_params,
             dtrain=train,
             num_boost_round=30,
             evals=[(valid, 'validation')],
-            early_stopping_rounds=50
+            early_stopping_rounds=50,
+            callbacks=[round_stats]
         )
+        train_seconds = time.perf_counter() - train_start
 
         y_pred = booster.predict(valid)
         rmse = root_mean_squared_error(y_val, y_pred)
-        mlflow.log_metric("rmse", rmse)
+        run_logger.log_metric("rmse", rmse)
+        run_logger.log_metric("peak_rss_mb", peak_rss_mb())
+        run_logger.log_metric("seconds_per_round", train_seconds / len(round_stats.rounds))
+        for r in round_stats.rounds:
+            run_logger.log_metric("validation_rmse", r['metric'], step=r['round'])
 
         # Save preprocessor
         preprocessor_path = "models/preprocessor.b"
         with open(preprocessor_path, "wb") as f_out:
             pickle.dump(dv, f_out)
-        
-        try:
-            mlflow.log_artifact(preprocessor_path, artifact_path="preprocessor")
-            # Log model
-            mlflow.xgboost.log_model(booster, artifact_path="models_mlflow")
-            logger.info("Successfully logged model and preprocessor to MLflow")
-        except Exception as e:
-            logger.warning(f"Failed to log to MLflow: {e}")
-            logger.info("Model artifacts saved locally in models/ directory")
+        # Same vocabulary in the pickle-free format (see model_artifact.py)
+        preprocessor_artifact_path = "models/preprocessor.artifact"
+        export_dict_vectorizer(preprocessor_artifact_path, dv)
+
+        # Uploaded while the Prefect artifacts below are created
+        run_logger.log_artifact(preprocessor_path, artifact_path="preprocessor")
+        run_logger.log_artifact(preprocessor_artifact_path, artifact_path="preprocessor")
+        # Log model (the logging thread has no active run, so name it)
+        run_logger.submit(mlflow.xgboost.log_model, booster, artifact_path="models_mlflow", run_id=run_logger.run_id)
 
         # Create Prefect artifact with model performance
         performance_data = [
@@ -218,7 +283,7 @@ def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
             ["Learning Rate", best_params['learning_rate']],
             ["Max Depth", best_params['max_depth']],
             ["Num Boost Rounds", 30],
-            ["MLflow Run ID", run.info.run_id]
+            ["MLflow Run ID", run_logger.run_id]
         ]
 
         create_table_artifact(
@@ -227,13 +292,32 @@ def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
             description=f"Model performance metrics - RMSE: {rmse:.4f}"
         )
 
+        # Memory and time of the training matrices and of every boosting round
+        create_table_artifact(
+            key="training-resources",
+            table=[
+                ["Matrix", matrix],
+                ["Matrix Build Seconds", f"{build_seconds:.2f}"],
+                ["Peak RSS After Build (MB)", f"{build_peak_mb:.1f}"],
+                ["Training Seconds", f"{train_seconds:.2f}"],
+                ["Mean Seconds per Round", f"{train_seconds / len(round_stats.rounds):.3f}"],
+                ["Peak RSS (MB)", f"{peak_rss_mb():.1f}"]
+            ],
+            description=f"Training matrices ({matrix}): build time, peak memory and time per round"
+        )
+        create_table_artifact(
+            key="training-rounds",
+            table=round_stats.table(),
+            description="Wall time, peak RSS and validation RMSE of each boosting round"
+        )
+
         # Create markdown artifact with training summary
         markdown_content = f"""
         # Model Training Summary
 
         ## Performance
         - **RMSE**: {rmse:.4f}
-        - **MLflow Run ID**: {run.info.run_id}
+        - **MLflow Run ID**: {run_logger.run_id}
 
         ## Parameters
         - Learning Rate: {best_params['learning_rate']}
@@ -244,6 +328,7 @@ def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
 
         ## Training Details
         - Boost Rounds: 30
+        - Training Matrix: {matrix}
         - Early Stopping: 50 rounds
         - Objective: {best_params['objective']}
         """
@@ -254,42 +339,169 @@ def train_model(X_train, y_train, X_val, y_val, dv: DictVectorizer) -> str:
             description="Detailed training summary"
         )
 
-        return run.info.run_id
+        try:
+            run_logger.flush()
+            logger.info("Successfully logged model and preprocessor to MLflow")
+        except RuntimeError as e:
+            logger.warning(f"Failed to log to MLflow: {e}")
+            logger.info("Model artifacts saved locally in models/ directory")
+
+        return run_logger.run_id
+
+
+def _matrix_cache_dir(matrix: str) -> Optional[str]:
+    """Temporary directory for the external memory pages (XGB_CACHE_DIR, or the system temp dir)."""
+    if matrix != 'external':
+        return None
+    return tempfile.mkdtemp(prefix='xgb-extmem-', dir=os.getenv('XGB_CACHE_DIR'))
+
+
+@task(name="train_model", description="Train XGBoost model with MLflow tracking")
+def train_model(
+    X_train,
+    y_train,
+    X_val,
+    y_val,
+    dv: DictVectorizer,
+    matrix: str = 'dmatrix',
+    batch_rows: int = DEFAULT_BATCH_ROWS
+) -> str:
+    """
+    Train XGBoost model and log to MLflow.
+
+    Args:
+        X_train: Training features
+        y_train: Training targets
+        X_val: Validation features
+        y_val: Validation targets
+        dv: Fitted DictVectorizer
+        matrix: 'dmatrix', 'quantile' or 'external' (see xgb_training.py)
+        batch_rows: Rows per batch handed to XGBoost ('quantile' and 'external')
+
+    Returns:
+        MLflow run ID
+    """
+    logger = get_run_logger()
+    logger.info(f"Training with {X_train.shape[0]} samples, {X_train.shape[1]} features, matrix: {matrix}")
+
+    cache_dir = _matrix_cache_dir(matrix)
+    try:
+        start = time.perf_counter()
+        if matrix == 'dmatrix':
+            train = xgb.DMatrix(X_train, label=y_train)
+            valid = xgb.DMatrix(X_val, label=y_val)
+        else:
+            train, valid = build_matrices(matrix, matrix_batches(X_train, y_train, batch_rows),
+                                          matrix_batches(X_val, y_val, batch_rows), cache_dir)
+        return fit_and_log(train, valid, y_val, dv, matrix, time.perf_counter() - start)
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+@task(name="train_model_streaming", description="Train XGBoost on months read from parquet in batches")
+def train_model_streaming(
+    year: int,
+    month: int,
+    matrix: str = 'external',
+    batch_rows: int = DEFAULT_BATCH_ROWS
+) -> Tuple[str, int, int]:
+    """
+    Train without loading the months into memory.
+
+    The training month is read in batches twice (vocabulary, then
+    quantiles) and, with matrix='external', streamed from the on-disk pages
+    in every round. The following month is the validation set, held as a
+    sparse DMatrix. Bypasses the frame and feature caches.
+
+    Args:
+        year: Year of training data
+        month: Month of training data
+        matrix: 'quantile' or 'external' (see xgb_training.py)
+        batch_rows: Rows read and handed to XGBoost per batch
+
+    Returns:
+        Tuple of (MLflow run ID, training samples, validation samples)
+    """
+    logger = get_run_logger()
+
+    next_year = year if month < 12 else year + 1
+    next_month = month + 1 if month < 12 else 1
+    train_path = fetch(trip_data_url(year, month))
+    val_path = fetch(trip_data_url(next_year, next_month))
+
+    cache_dir = _matrix_cache_dir(matrix)
+    try:
+        start = time.perf_counter()
+        encoder = fit_parquet_encoder(train_path, batch_rows=batch_rows)
+        train, valid = build_matrices(matrix, parquet_batches(train_path, encoder, batch_rows=batch_rows),
+                                      parquet_batches(val_path, encoder, batch_rows=batch_rows), cache_dir)
+        build_seconds = time.perf_counter() - start
+        logger.info(f"Streamed {train.num_row()} training and {valid.num_row()} validation samples, "
+                    f"{len(encoder.feature_names_)} features, matrix: {matrix}")
+
+        run_id = fit_and_log(train, valid, valid.get_label(), encoder.to_dict_vectorizer(), matrix, build_seconds)
+        return run_id, train.num_row(), valid.num_row()
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
 
 
 @flow(name="NYC Taxi Duration Prediction Pipeline", description="End-to-end ML pipeline for taxi duration prediction")
-def duration_prediction_flow(year: int, month: int) -> str:
+def duration_prediction_flow(
+    year: int,
+    month: int,
+    use_cache: bool = True,
+    matrix: str = 'dmatrix',
+    stream: bool = False,
+    batch_rows: int = DEFAULT_BATCH_ROWS
+) -> str:
     """
     Main flow for NYC taxi duration prediction.
 
+    Cleaned frames and feature matrices are cached per month, so a rolling
+    monthly retrain only processes the new validation month.
+
     Args:
         year: Year of training data
         month: Month of training data
+        use_cache: Use the on-disk frame/feature cache
+        matrix: XGBoost training matrix: 'dmatrix', 'quantile' or 'external'
+        stream: Read the months from parquet in batches instead of loading
+            them ('quantile' or 'external'; for months larger than RAM)
+        batch_rows: Rows per batch handed to XGBoost
 
     Returns:
         MLflow run ID
     """
-    # Load training data
-    df_train = read_dataframe(year=year, month=month)
+    if matrix not in MATRIX_MODES:
+        raise ValueError(f"Unknown matrix mode {matrix!r}, expected one of {MATRIX_MODES}")
 
     # Calculate validation data period
     next_year = year if month < 12 else year + 1
     next_month = month + 1 if month < 12 else 1
 
-    # Load validation data
-    df_val = read_dataframe(year=next_year, month=next_month)
+    if stream:
+        if matrix == 'dmatrix':
+            raise ValueError("stream=True needs matrix 'quantile' or 'external'")
+        run_id, n_train, n_val = train_model_streaming(year, month, matrix=matrix, batch_rows=batch_rows)
+    else:
+        # Load training and validation data
+        df_train = read_dataframe(year=year, month=month, use_cache=use_cache)
+        df_val = read_dataframe(year=next_year, month=next_month, use_cache=use_cache)
 
-    # Create features
-    X_train, dv = create_features(df_train)
-    X_val, _ = create_features(df_val, dv)
+        # Create features
+        X_train, dv = create_features(df_train, year=year, month=month, use_cache=use_cache)
+        X_val, _ = create_features(df_val, dv, year=next_year, month=next_month, use_cache=use_cache)
 
-    # Prepare targets
-    target = 'duration'
-    y_train = df_train[target].values
-    y_val = df_val[target].values
+        # Prepare targets
+        target = 'duration'
+        y_train = df_train[target].values
+        y_val = df_val[target].values
+        n_train, n_val = len(y_train), len(y_val)
 
-    # Train model
-    run_id = train_model(X_train, y_train, X_val, y_val, dv)
+        # Train model
+        run_id = train_model(X_train, y_train, X_val, y_val, dv, matrix=matrix, batch_rows=batch_rows)
 
     # Create final pipeline artifact
     pipeline_summary = f"""
@@ -298,8 +510,9 @@ def duration_prediction_flow(year: int, month: int) -> str:
     ## Data
     - **Training Period**: {year}-{month:02d}
     - **Validation Period**: {next_year}-{next_month:02d}
-    - **Training Samples**: {len(y_train):,}
-    - **Validation Samples**: {len(y_val):,}
+    - **Training Samples**: {n_train:,}
+    - **Validation Samples**: {n_val:,}
+    - **Training Matrix**: {matrix}{' (streamed from parquet)' if stream else ''}
 
     ## Results
     - **MLflow Run ID**: {run_id}
@@ -320,13 +533,169 @@ def duration_prediction_flow(year: int, month: int) -> str:
     return run_id
 
 
+def month_range(start_year: int, start_month: int, end_year: int, end_month: int) -> List[Tuple[int, int]]:
+    """Months from start to end, both included, as (year, month) pairs."""
+    months = []
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        months.append((year, month))
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+    return months
+
+
+@task(name="fit_window_vocabulary", description="Fit the DictVectorizer of a multi-month training window")
+def fit_window_vocabulary(dfs: List[pd.DataFrame]) -> DictVectorizer:
+    """
+    Fit the vocabulary on every month of a training window.
+
+    Args:
+        dfs: Cleaned DataFrames of the window's months
+
+    Returns:
+        DictVectorizer with the categories seen in any of the months
+    """
+    encoder = ColumnarEncoder(['PU_DO'], ['trip_distance'])
+    for df in dfs:
+        encoder.partial_fit(df)
+    return encoder.to_dict_vectorizer()
+
+
+@flow(name="NYC Taxi Multi-Month Training Pipeline",
+      description="Concurrent loading and sliding-window training over a range of months")
+def multi_month_training_flow(
+    start_year: int,
+    start_month: int,
+    end_year: int,
+    end_month: int,
+    window: int = 1,
+    use_cache: bool = True,
+    matrix: str = 'dmatrix',
+    batch_rows: int = DEFAULT_BATCH_ROWS
+) -> List[str]:
+    """
+    Train one model per sliding window over a range of months.
+
+    Each window trains on `window` consecutive months and validates on the
+    next one, so the range must hold at least window + 1 months. All the
+    months are loaded at once, then all the feature matrices are built at
+    once (tasks submitted to the flow's thread pool). Each phase therefore
+    takes about as long as its slowest month instead of the sum of all
+    months. Training runs one window after another, since XGBoost already
+    uses every core.
+
+    Args:
+        start_year: Year of the first month
+        start_month: First month
+        end_year: Year of the last month
+        end_month: Last month (validation month of the last window)
+        window: Training months per model
+        use_cache: Use the on-disk frame/feature cache
+        matrix: XGBoost training matrix: 'dmatrix', 'quantile' or 'external'
+        batch_rows: Rows per batch handed to XGBoost
+
+    Returns:
+        MLflow run IDs, one per window
+    """
+    months = month_range(start_year, start_month, end_year, end_month)
+    if window < 1 or len(months) < window + 1:
+        raise ValueError(f"{len(months)} months cannot hold a {window}-month training window and a validation month")
+    if matrix not in MATRIX_MODES:
+        raise ValueError(f"Unknown matrix mode {matrix!r}, expected one of {MATRIX_MODES}")
+    windows = [(months[i:i + window], months[i + window]) for i in range(len(months) - window)]
+    logger = get_run_logger()
+
+    # Load every month concurrently
+    start = time.perf_counter()
+    frame_futures = {m: read_dataframe.submit(year=m[0], month=m[1], use_cache=use_cache) for m in months}
+    frames = {m: future.result() for m, future in frame_futures.items()}
+    load_seconds = time.perf_counter() - start
+    logger.info(f"Loaded {len(months)} months in {load_seconds:.2f} s")
+
+    # Vocabulary of each window. A one-month window is fitted by create_features,
+    # so its matrix is cached exactly as in duration_prediction_flow
+    start = time.perf_counter()
+    if window == 1:
+        fit_futures = [create_features.submit(frames[train[0]], year=train[0][0], month=train[0][1],
+                                              use_cache=use_cache) for train, _ in windows]
+        fitted = [future.result() for future in fit_futures]
+        vocabularies = [dv for _, dv in fitted]
+    else:
+        vocabulary_futures = [fit_window_vocabulary.submit([frames[m] for m in train]) for train, _ in windows]
+        vocabularies = [future.result() for future in vocabulary_futures]
+
+    # Every remaining (window, month) matrix concurrently
+    matrix_futures = []
+    for (train, val), dv in zip(windows, vocabularies):
+        needed = [val] if window == 1 else train + [val]
+        matrix_futures.append({m: create_features.submit(frames[m], dv, year=m[0], month=m[1], use_cache=use_cache)
+                               for m in needed})
+    matrices = [{m: future.result()[0] for m, future in futures.items()} for futures in matrix_futures]
+    if window == 1:
+        for window_matrices, (train, _), (X, _) in zip(matrices, windows, fitted):
+            window_matrices[train[0]] = X
+    feature_seconds = time.perf_counter() - start
+    logger.info(f"Built {sum(len(m) for m in matrices)} feature matrices in {feature_seconds:.2f} s")
+
+    targets = {m: df['duration'].values for m, df in frames.items()}
+    del frames
+
+    # Train one model per window
+    run_ids = []
+    window_rows = []
+    for (train, val), dv, window_matrices in zip(windows, vocabularies, matrices):
+        X_train = sp.vstack([window_matrices[m] for m in train], format='csr') if window > 1 else window_matrices[train[0]]
+        y_train = np.concatenate([targets[m] for m in train])
+        start = time.perf_counter()
+        run_id = train_model(X_train, y_train, window_matrices[val], targets[val], dv,
+                             matrix=matrix, batch_rows=batch_rows)
+        run_ids.append(run_id)
+        window_rows.append({
+            'train': ', '.join(f'{y}-{m:02d}' for y, m in train),
+            'validation': f'{val[0]}-{val[1]:02d}',
+            'train_samples': len(y_train),
+            'validation_samples': len(targets[val]),
+            'training_seconds': round(time.perf_counter() - start, 2),
+            'mlflow_run_id': run_id
+        })
+
+    create_table_artifact(
+        key="multi-month-windows",
+        table=window_rows,
+        description=f"One model per {window}-month training window"
+    )
+    create_table_artifact(
+        key="multi-month-timing",
+        table=[
+            ["Months", len(months)],
+            ["Windows", len(windows)],
+            ["Load Seconds (all months, concurrent)", f"{load_seconds:.2f}"],
+            ["Feature Seconds (all matrices, concurrent)", f"{feature_seconds:.2f}"],
+            ["Training Seconds (sequential)", f"{sum(row['training_seconds'] for row in window_rows):.2f}"]
+        ],
+        description="Wall-clock time of each phase of the multi-month flow"
+    )
+
+    return run_ids
+
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description='Train a model to predict taxi trip duration using Prefect.')
     parser.add_argument('--year', type=int, default=2023, help='Year of the data to train on (default: 2023)')
     parser.add_argument('--month', type=int, default=1, help='Month of the data to train on (default: 1)')
+    parser.add_argument('--end-year', type=int, help='Year of the last month (default: --year)')
+    parser.add_argument('--end-month', type=int,
+                        help='Train one model per window from --year/--month up to this month (multi-month flow)')
+    parser.add_argument('--window', type=int, default=1, help='Training months per model in the multi-month flow (default: 1)')
     parser.add_argument('--mlflow-uri', type=str, help='MLflow tracking URI (overrides environment variable)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the cleaned frame/feature cache')
+    parser.add_argument('--matrix', choices=MATRIX_MODES, default='dmatrix',
+                        help='XGBoost training matrix (default: dmatrix, see xgb_training.py)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the months from parquet in batches instead of loading them (quantile/external)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per batch handed to XGBoost (default: {DEFAULT_BATCH_ROWS})')
     args = parser.parse_args()
 
     # Override MLflow URI if provided
@@ -336,9 +705,17 @@ if __name__ == "__main__":
 
     try:
         # Run the flow
-        run_id = duration_prediction_flow(year=args.year, month=args.month)
+        if args.end_month is not None:
+            run_ids = multi_month_training_flow(args.year, args.month, args.end_year or args.year, args.end_month,
+                                                window=args.window, use_cache=not args.no_cache,
+                                                matrix=args.matrix, batch_rows=args.batch_rows)
+            run_id = run_ids[-1]
+        else:
+            run_ids = [duration_prediction_flow(year=args.year, month=args.month, use_cache=not args.no_cache,
+                                                matrix=args.matrix, stream=args.stream, batch_rows=args.batch_rows)]
+            run_id = run_ids[0]
         print("\n✅ Pipeline completed successfully!")
-        print(f"📊 MLflow run_id: {run_id}")
+        print(f"📊 MLflow run_id: {', '.join(run_ids)}")
         print(f"🔗 View results at: {mlflow.get_tracking_uri()}")
 
         # Save run ID for reference
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Benchmark of the vectorized ingestion (ingestion.py) against the previous
+read_dataframe implementation (full read + per-row .apply + astype(str)).
+
+Checks that both keep the same trips with the same duration and PU_DO, then
+reports wall time and DataFrame memory for each.
+
+Usage:
+    python benchmark_ingestion.py --year 2023 --month 1
+    python benchmark_ingestion.py --source data/green_tripdata_2023-01.parquet
+    python benchmark_ingestion.py --synthetic 2000000     # offline, generated trips
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ingestion import load_trips, trip_data_url
+
+
+def legacy_read_dataframe(source):
+    """Previous implementation of read_dataframe, kept for comparison."""
+    df = pd.read_parquet(source)
+
+    df['duration'] = df.lpep_dropoff_datetime - df.lpep_pickup_datetime
+    df.duration = df.duration.apply(lambda td: td.total_seconds() / 60)
+
+    df = df[(df.duration >= 1) & (df.duration <= 60)]
+
+    categorical = ['PULocationID', 'DOLocationID']
+    df[categorical] = df[categorical].astype(str)
+
+    df['PU_DO'] = df['PULocationID'] + '_' + df['DOLocationID']
+
+    return df
+
+
+def write_synthetic_month(path, n_trips, seed=42):
+    """Write a parquet file with the schema of a green taxi month (subset of columns)."""
+    rng = np.random.default_rng(seed)
+    pickup = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 31 * 86400, n_trips), unit='s')
+    # Mostly realistic durations plus some outliers on both sides of the filter
+    duration_s = rng.gamma(2.0, 450.0, n_trips).astype(np.int64) - rng.integers(0, 120, n_trips)
+    df = pd.DataFrame({
+        'VendorID': rng.integers(1, 3, n_trips),
+        'lpep_pickup_datetime': pickup,
+        'lpep_dropoff_datetime': pickup + pd.to_timedelta(duration_s, unit='s'),
+        'store_and_fwd_flag': rng.choice(['N', 'Y'], n_trips),
+        'RatecodeID': rng.integers(1, 6, n_trips).astype(np.float64),
+        'PULocationID': rng.integers(1, 266, n_trips),
+        'DOLocationID': rng.integers(1, 266, n_trips),
+        'passenger_count': rng.integers(1, 5, n_trips).astype(np.float64),
+        'trip_distance': np.round(rng.gamma(2.0, 1.5, n_trips), 2),
+        'fare_amount': np.round(rng.gamma(2.0, 8.0, n_trips), 2),
+        'tip_amount': np.round(rng.gamma(1.0, 2.0, n_trips), 2),
+        'total_amount': np.round(rng.gamma(2.0, 10.0, n_trips), 2),
+        'payment_type': rng.integers(1, 5, n_trips).astype(np.float64),
+    })
+    df.to_parquet(path)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(source):
+    legacy, legacy_time = timed(legacy_read_dataframe, source)
+    exact, _ = timed(load_trips, source, compact=False)
+    compact, compact_time = timed(load_trips, source)
+
+    # Same trips, same duration (exact in float64), same PU_DO
+    assert legacy.index.equals(exact.index), 'Different trips kept'
+    assert np.array_equal(legacy['duration'].to_numpy(), exact['duration'].to_numpy()), 'Different durations'
+    assert (legacy['PU_DO'].to_numpy() == exact['PU_DO'].astype(str).to_numpy()).all(), 'Different PU_DO'
+    # Compact dtypes only change the location IDs: target and features are unchanged
+    assert np.array_equal(legacy['duration'].to_numpy(), compact['duration'].to_numpy()), 'Different durations'
+    assert np.array_equal(legacy['trip_distance'].to_numpy(), compact['trip_distance'].to_numpy()), 'Different distances'
+
+    legacy_mb = legacy.memory_usage(deep=True).sum() / 1024**2
+    compact_mb = compact.memory_usage(deep=True).sum() / 1024**2
+
+    print(f"✅ Same {len(legacy):,} trips, durations and PU_DO in both paths")
+    print(f"{'path':<12} {'seconds':>8} {'memory MB':>10}")
+    print(f"{'legacy':<12} {legacy_time:>8.2f} {legacy_mb:>10.1f}")
+    print(f"{'vectorized':<12} {compact_time:>8.2f} {compact_mb:>10.1f}")
+    print(f"⚡ {legacy_time / compact_time:.1f}x faster, {legacy_mb / compact_mb:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark vectorized ingestion against the previous read_dataframe.')
+    parser.add_argument('--year', type=int, default=2023, help='Year of the TLC data (default: 2023)')
+    parser.add_argument('--month', type=int, default=1, help='Month of the TLC data (default: 1)')
+    parser.add_argument('--source', type=str, help='Local parquet file or URL (overrides --year/--month)')
+    parser.add_argument('--synthetic', type=int, help='Generate this many synthetic trips instead (offline)')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'synthetic_month.parquet'
+            write_synthetic_month(path, args.synthetic)
+            run_benchmark(path)
+    else:
+        run_benchmark(args.source or trip_data_url(args.year, args.month))
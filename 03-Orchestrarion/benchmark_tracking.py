@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Benchmark of the MLflow logging of a training run (async_tracking.py).
+
+Simulates a run that logs its params, a few metrics after every boosting
+round and some artifacts at the end, with each logging mode:
+
+    sync     mlflow.log_params / log_metric / log_artifact (previous code)
+    batched  AsyncRunLogger: values sent with log_batch and artifacts
+             uploaded by a background thread, flushed before the run ends
+
+and reports the time the training thread spent blocked in logging calls,
+the wall time of the whole run (start_run to end of run, flush included)
+and the number of requests made to the tracking store. A round is a sleep
+of --round-ms: like xgb.train, it releases the GIL for the logging thread.
+
+Backends are local stores in a temporary directory: 'sqlite' (the default
+of the pipelines) and 'file' (the ./mlruns file store). --tracking-uri
+benchmarks a tracking server instead.
+
+Usage:
+    python benchmark_tracking.py
+    python benchmark_tracking.py --rounds 200 --round-ms 10 --backends sqlite file
+    python benchmark_tracking.py --tracking-uri http://127.0.0.1:5000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import mlflow
+
+from async_tracking import start_async_run
+
+MODES = ['sync', 'batched']
+
+PARAMS = {
+    'learning_rate': 0.09585355369315604,
+    'max_depth': 30,
+    'min_child_weight': 1.060597050922164,
+    'objective': 'reg:squarederror',
+    'reg_alpha': 0.018060244040060163,
+    'reg_lambda': 0.011658731377413597,
+    'seed': 42
+}
+
+
+class Blocked:
+    """Adds up the time spent inside logging calls."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+
+
+def simulated_run(mode, rounds, round_seconds, artifacts):
+    """One training run logged with a mode; returns (blocked seconds, wall seconds, requests)."""
+    blocked = Blocked()
+    start = time.perf_counter()
+    if mode == 'sync':
+        with mlflow.start_run():
+            blocked(mlflow.log_params, PARAMS)
+            for step in range(rounds):
+                time.sleep(round_seconds)
+                blocked(mlflow.log_metric, 'validation_rmse', 6.0 - step / rounds, step=step)
+                blocked(mlflow.log_metric, 'seconds_per_round', round_seconds, step=step)
+                blocked(mlflow.log_metric, 'peak_rss_mb', 1000.0 + step, step=step)
+            for path in artifacts:
+                blocked(mlflow.log_artifact, str(path), artifact_path='preprocessor')
+        requests = blocked.calls
+    else:
+        with start_async_run() as run_logger:
+            blocked(run_logger.log_params, PARAMS)
+            for step in range(rounds):
+                time.sleep(round_seconds)
+                blocked(run_logger.log_metrics, {
+                    'validation_rmse': 6.0 - step / rounds,
+                    'seconds_per_round': round_seconds,
+                    'peak_rss_mb': 1000.0 + step
+                }, step=step)
+            for path in artifacts:
+                blocked(run_logger.log_artifact, str(path), artifact_path='preprocessor')
+        requests = run_logger.requests
+    return blocked.seconds, time.perf_counter() - start, requests
+
+
+def run_benchmark(backend, tracking_uri, rounds, round_seconds, artifacts, repeats):
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment('tracking-benchmark')
+    # First run creates the tables / folders; not measured
+    simulated_run('sync', 1, 0.0, [])
+
+    work = rounds * round_seconds
+    for mode in MODES:
+        results = [simulated_run(mode, rounds, round_seconds, artifacts) for _ in range(repeats)]
+        blocked, wall, requests = (min(values) for values in zip(*results))
+        print(f"{backend:<8} {mode:<8} {blocked:>10.3f} {wall:>8.3f} {wall - work:>10.3f} {requests:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark synchronous and batched MLflow logging.')
+    parser.add_argument('--rounds', type=int, default=100, help='Boosting rounds per run (default: 100)')
+    parser.add_argument('--round-ms', type=float, default=20.0, help='Duration of a round in ms (default: 20)')
+    parser.add_argument('--artifacts', type=int, default=2, help='Artifacts logged per run (default: 2)')
+    parser.add_argument('--artifact-mb', type=float, default=1.0, help='Size of each artifact in MB (default: 1)')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per mode, best is reported (default: 3)')
+    parser.add_argument('--backends', nargs='+', choices=['sqlite', 'file'], default=['sqlite'],
+                        help='Local tracking stores to benchmark (default: sqlite)')
+    parser.add_argument('--tracking-uri', help='Benchmark this tracking server instead of local stores')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='tracking-benchmark-') as tmp:
+        root = Path(tmp)
+        artifacts = []
+        for i in range(args.artifacts):
+            path = root / f'artifact_{i}.bin'
+            path.write_bytes(os.urandom(int(args.artifact_mb * 1024**2)))
+            artifacts.append(path)
+
+        if args.tracking_uri:
+            backends = {'server': args.tracking_uri}
+        else:
+            # MLflow 3 refuses the file store unless explicitly allowed
+            os.environ.setdefault('MLFLOW_ALLOW_FILE_STORE', 'true')
+            backends = {'sqlite': f"sqlite:///{root / 'mlflow.db'}", 'file': (root / 'file-store').as_uri()}
+            backends = {name: backends[name] for name in args.backends}
+
+        print(f"🚕 {args.rounds} rounds of {args.round_ms:g} ms ({args.rounds * args.round_ms / 1000:.2f} s of work), "
+              f"{len(PARAMS)} params, 3 metrics per round, {args.artifacts} artifacts of {args.artifact_mb:g} MB")
+        print(f"{'backend':<8} {'mode':<8} {'blocked s':>10} {'wall s':>8} {'overhead s':>10} {'requests':>9}")
+        for backend, tracking_uri in backends.items():
+            # Default artifact location of the sqlite store is ./mlruns: one directory per backend
+            (root / backend).mkdir()
+            os.chdir(root / backend)
+            run_benchmark(backend, tracking_uri, args.rounds, args.round_ms / 1000, artifacts, args.repeats)
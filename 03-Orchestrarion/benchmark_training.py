@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Benchmark of the XGBoost training matrices (xgb_training.py).
+
+Trains the pipeline's model on a training and a validation month with each
+matrix mode, every mode in its own process so peak memory is not shared:
+
+    dmatrix          Months loaded and encoded, xgb.DMatrix (previous path)
+    quantile         Months loaded and encoded, QuantileDMatrix from batches
+    external         Months loaded and encoded, ExtMemQuantileDMatrix
+    quantile-stream  Months read from parquet in batches, QuantileDMatrix
+    external-stream  Months read from parquet in batches, ExtMemQuantileDMatrix
+
+and reports matrix build time, mean time per boosting round, peak RSS and
+validation RMSE (all modes must give the same RMSE: the bins are the same).
+
+Usage:
+    python benchmark_training.py --year 2023 --month 1
+    python benchmark_training.py --synthetic 2000000     # offline, generated trips
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+from benchmark_ingestion import write_synthetic_month
+from columnar_encoder import ColumnarEncoder
+from data_cache import fetch
+from ingestion import load_trips, trip_data_url
+from xgb_training import (
+    DEFAULT_BATCH_ROWS,
+    RoundStats,
+    build_matrices,
+    fit_parquet_encoder,
+    matrix_batches,
+    parquet_batches,
+    peak_rss_mb,
+)
+
+MODES = ['dmatrix', 'quantile', 'external', 'quantile-stream', 'external-stream']
+
+# Parameters of train_model in Prefect-pipelines/duration_prediction_prefect.py
+PARAMS = {
+    'learning_rate': 0.09585355369315604,
+    'max_depth': 30,
+    'min_child_weight': 1.060597050922164,
+    'objective': 'reg:squarederror',
+    'reg_alpha': 0.018060244040060163,
+    'reg_lambda': 0.011658731377413597,
+    'seed': 42
+}
+
+
+def run_mode(mode, train_path, val_path, rounds, batch_rows, params):
+    """Build the matrices of one mode and train; runs in a fresh process."""
+    matrix, _, stream = mode.partition('-')
+    baseline_mb = peak_rss_mb()
+    with tempfile.TemporaryDirectory(prefix='xgb-extmem-') as cache_dir:
+        start = time.perf_counter()
+        if stream:
+            encoder = fit_parquet_encoder(train_path, batch_rows=batch_rows)
+            train, valid = build_matrices(matrix, parquet_batches(train_path, encoder, batch_rows=batch_rows),
+                                          parquet_batches(val_path, encoder, batch_rows=batch_rows), cache_dir)
+        else:
+            df_train, df_val = load_trips(train_path), load_trips(val_path)
+            encoder = ColumnarEncoder(['PU_DO'], ['trip_distance'])
+            X_train, X_val = encoder.fit_transform(df_train), encoder.transform(df_val)
+            y_train, y_val = df_train['duration'].to_numpy(), df_val['duration'].to_numpy()
+            del df_train, df_val
+            if matrix == 'dmatrix':
+                train, valid = xgb.DMatrix(X_train, label=y_train), xgb.DMatrix(X_val, label=y_val)
+            else:
+                train, valid = build_matrices(matrix, matrix_batches(X_train, y_train, batch_rows),
+                                              matrix_batches(X_val, y_val, batch_rows), cache_dir)
+        build_seconds = time.perf_counter() - start
+        build_mb = peak_rss_mb()
+
+        stats = RoundStats()
+        xgb.train(params, train, num_boost_round=rounds, evals=[(valid, 'validation')],
+                  verbose_eval=False, callbacks=[stats])
+    return {
+        'mode': mode,
+        'rows': train.num_row(),
+        'build_seconds': build_seconds,
+        'round_seconds': float(np.mean([r['seconds'] for r in stats.rounds])),
+        'baseline_mb': baseline_mb,
+        'build_mb': build_mb,
+        'peak_mb': peak_rss_mb(),
+        'rmse': stats.rounds[-1]['metric']
+    }
+
+
+def run_benchmark(train_path, val_path, rounds, batch_rows, max_depth, modes):
+    results = []
+    for mode in modes:
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', mode, '--train', str(train_path),
+               '--valid', str(val_path), '--rounds', str(rounds), '--batch-rows', str(batch_rows),
+               '--max-depth', str(max_depth)]
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"🚕 {results[0]['rows']:,} training trips, {rounds} rounds of depth {max_depth}, "
+          f"batches of {batch_rows:,} rows")
+    print(f"{'mode':<16} {'build s':>8} {'s/round':>8} {'RSS build':>10} {'peak RSS':>9} {'RMSE':>9}")
+    for r in results:
+        print(f"{r['mode']:<16} {r['build_seconds']:>8.2f} {r['round_seconds']:>8.3f} "
+              f"{r['build_mb']:>10.1f} {r['peak_mb']:>9.1f} {r['rmse']:>9.4f}")
+    print(f"(MB; the interpreter with its imports starts at ~{results[0]['baseline_mb']:.0f} MB)")
+    if len({round(r['rmse'], 6) for r in results}) == 1:
+        print("✅ Same validation RMSE with every matrix")
+    else:
+        print("⚠️ Validation RMSE differs between matrices")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the XGBoost training matrices.')
+    parser.add_argument('--year', type=int, default=2023, help='Year of the training month (default: 2023)')
+    parser.add_argument('--month', type=int, default=1, help='Training month; the next one validates (default: 1)')
+    parser.add_argument('--synthetic', type=int, help='Generate this many synthetic trips per month instead (offline)')
+    parser.add_argument('--rounds', type=int, default=30, help='Boosting rounds (default: 30)')
+    parser.add_argument('--max-depth', type=int, default=PARAMS['max_depth'],
+                        help=f"Tree depth (default: {PARAMS['max_depth']}, as in the pipeline)")
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per batch (default: {DEFAULT_BATCH_ROWS})')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES, help='Modes to run (default: all)')
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--train', help=argparse.SUPPRESS)
+    parser.add_argument('--valid', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        params = dict(PARAMS, max_depth=args.max_depth)
+        print(json.dumps(run_mode(args.worker, args.train, args.valid, args.rounds, args.batch_rows, params)))
+    elif args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            train_path, val_path = Path(tmp) / 'train.parquet', Path(tmp) / 'valid.parquet'
+            write_synthetic_month(train_path, args.synthetic, seed=1)
+            write_synthetic_month(val_path, args.synthetic, seed=2)
+            run_benchmark(train_path, val_path, args.rounds, args.batch_rows, args.max_depth, args.modes)
+    else:
+        next_year, next_month = (args.year, args.month + 1) if args.month < 12 else (args.year + 1, 1)
+        run_benchmark(fetch(trip_data_url(args.year, args.month)), fetch(trip_data_url(next_year, next_month)),
+                      args.rounds, args.batch_rows, args.max_depth, args.modes)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Columnar replacement for `DictVectorizer.fit_transform(df.to_dict(orient='records'))`.
+
+The training pipelines one-hot encode PU_DO and pass trip_distance through.
+Going through DictVectorizer means building one Python dict (and one feature
+name string) per trip. ColumnarEncoder builds the same CSR matrix directly
+from the category codes and numeric arrays: names are only built once per
+distinct category.
+
+The output is identical to DictVectorizer(sparse=True) with the default
+sort=True: same column order (sorted feature names), same stored entries
+(including explicit zeros, which XGBoost treats differently from missing
+values), same dtype and index types. The fitted vocabulary converts to and
+from a DictVectorizer, so existing preprocessor.b artifacts keep working and
+the artifacts written by the pipelines stay usable by the serving code.
+
+Usage:
+    >>> encoder = ColumnarEncoder(['PU_DO'], ['trip_distance'])
+    >>> X_train = encoder.fit_transform(df_train)
+    >>> X_val = encoder.transform(df_val)
+    >>> dv = encoder.to_dict_vectorizer()                      # pickle as before
+    >>> encoder = ColumnarEncoder.from_dict_vectorizer(dv, ['PU_DO'], ['trip_distance'])
+    >>> encoder = ColumnarEncoder.from_artifact(read_artifact('models/preprocessor.artifact'))
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction import DictVectorizer
+
+
+class ColumnarEncoder:
+    """
+    One-hot encoder for categorical columns plus numeric pass-through, built on columns.
+
+    Args:
+        categorical: Columns one-hot encoded as '<column><separator><value>'
+        numerical: Columns passed through as a single feature each
+        separator: Separator between column and value (as in DictVectorizer)
+        dtype: Dtype of the matrix values
+
+    Attributes:
+        feature_names_: Feature names in column order (as in DictVectorizer)
+        vocabulary_: Feature name -> column index (as in DictVectorizer)
+    """
+
+    def __init__(self, categorical=('PU_DO',), numerical=('trip_distance',), separator='=', dtype=np.float64):
+        self.categorical = list(categorical)
+        self.numerical = list(numerical)
+        self.separator = separator
+        self.dtype = dtype
+
+    def _category_names(self, column, values):
+        return [f'{column}{self.separator}{value}' for value in values]
+
+    def _factorize(self, df, column):
+        """Codes per row and distinct values of a categorical column."""
+        codes, uniques = pd.factorize(df[column])
+        if (codes < 0).any():
+            # DictVectorizer would turn a NaN into a numeric feature named after the column
+            raise ValueError(f"Column {column} has missing values")
+        return codes, uniques
+
+    def fit(self, df):
+        """
+        Learn the vocabulary: every category seen in df plus the numeric columns.
+
+        Args:
+            df: DataFrame with the categorical and numerical columns
+
+        Returns:
+            self
+        """
+        self.feature_names_ = []
+        return self.partial_fit(df)
+
+    def partial_fit(self, df):
+        """
+        Add the categories seen in df to the vocabulary (fit on data read in chunks).
+
+        Fitting on every chunk of a month gives the same vocabulary as fit()
+        on the whole month, since feature names are kept sorted.
+
+        Args:
+            df: DataFrame with the categorical and numerical columns
+
+        Returns:
+            self
+        """
+        names = set(getattr(self, 'feature_names_', ()))
+        names.update(self.numerical)
+        for column in self.categorical:
+            _, uniques = self._factorize(df, column)
+            names.update(self._category_names(column, uniques))
+
+        self.feature_names_ = sorted(names)
+        self.vocabulary_ = {name: i for i, name in enumerate(self.feature_names_)}
+        return self
+
+    def transform(self, df):
+        """
+        Encode df with the fitted vocabulary.
+
+        Categories not in the vocabulary are dropped, like DictVectorizer does.
+
+        Args:
+            df: DataFrame with the categorical and numerical columns
+
+        Returns:
+            CSR matrix of shape (len(df), len(feature_names_))
+        """
+        n_rows = len(df)
+        n_features = len(self.feature_names_)
+
+        # One slot per input column and row; n_features marks "no entry"
+        columns = np.empty((n_rows, len(self.categorical) + len(self.numerical)), dtype=np.int64)
+        values = np.empty(columns.shape, dtype=self.dtype)
+
+        for k, column in enumerate(self.categorical):
+            codes, uniques = self._factorize(df, column)
+            lookup = np.array(
+                [self.vocabulary_.get(name, n_features) for name in self._category_names(column, uniques)],
+                dtype=np.int64
+            )
+            columns[:, k] = lookup[codes]
+            values[:, k] = 1
+
+        for k, column in enumerate(self.numerical, start=len(self.categorical)):
+            columns[:, k] = self.vocabulary_.get(column, n_features)
+            values[:, k] = df[column].to_numpy(dtype=self.dtype)
+
+        # Sorted column indices within each row, as in DictVectorizer's output
+        order = np.argsort(columns, axis=1, kind='stable')
+        columns = np.take_along_axis(columns, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        stored = columns < n_features
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(stored.sum(axis=1), out=indptr[1:])
+        indices = columns[stored].astype(np.int32)
+        data = values[stored]
+
+        return sp.csr_matrix((data, indices, indptr), shape=(n_rows, n_features))
+
+    def fit_transform(self, df):
+        """Fit the vocabulary on df and encode it."""
+        return self.fit(df).transform(df)
+
+    def to_dict_vectorizer(self):
+        """
+        Fitted DictVectorizer with the same vocabulary.
+
+        Returns:
+            DictVectorizer that transforms dicts into the same columns
+        """
+        dv = DictVectorizer(dtype=self.dtype, separator=self.separator, sparse=True)
+        dv.feature_names_ = list(self.feature_names_)
+        dv.vocabulary_ = dict(self.vocabulary_)
+        return dv
+
+    @classmethod
+    def from_dict_vectorizer(cls, dv, categorical=('PU_DO',), numerical=('trip_distance',)):
+        """
+        Encoder with the vocabulary of a fitted DictVectorizer (e.g. preprocessor.b).
+
+        Args:
+            dv: Fitted DictVectorizer
+            categorical: Categorical columns the DictVectorizer was fitted on
+            numerical: Numerical columns the DictVectorizer was fitted on
+
+        Returns:
+            Fitted ColumnarEncoder
+        """
+        encoder = cls(categorical, numerical, separator=dv.separator, dtype=dv.dtype)
+        encoder.feature_names_ = list(dv.feature_names_)
+        encoder.vocabulary_ = dict(dv.vocabulary_)
+        return encoder
+
+    @classmethod
+    def from_artifact(cls, artifact, categorical=('PU_DO',), numerical=('trip_distance',)):
+        """
+        Encoder with the vocabulary of a model artifact (see model_artifact.py), without unpickling.
+
+        Args:
+            artifact: Loaded 'dict_vectorizer' or 'linear_model' artifact
+            categorical: Categorical columns the vocabulary was fitted on
+            numerical: Numerical columns the vocabulary was fitted on
+
+        Returns:
+            Fitted ColumnarEncoder
+        """
+        if artifact.kind not in ('dict_vectorizer', 'linear_model'):
+            raise ValueError(f"Artifact of kind '{artifact.kind}' has no vocabulary")
+        encoder = cls(categorical, numerical, separator=artifact.metadata['separator'],
+                      dtype=np.dtype(artifact.metadata['dtype']).type)
+        encoder.feature_names_ = artifact.feature_names()
+        encoder.vocabulary_ = artifact.vocabulary()
+        return encoder
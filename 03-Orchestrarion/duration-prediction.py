@@ -5,11 +5,14 @@ import pickle
 from pathlib import Path
 
 import mlflow
-import pandas as pd
 import xgboost as xgb
-from sklearn.feature_extraction import DictVectorizer
 from sklearn.metrics import root_mean_squared_error
 
+from async_tracking import start_async_run
+from columnar_encoder import ColumnarEncoder
+from ingestion import load_month
+from model_artifact import export_dict_vectorizer
+
 mlflow.set_tracking_uri("http://127.0.0.1:5000")
 mlflow.set_experiment("nyc-taxi-experiment")
 
@@ -20,40 +23,39 @@ models_folder.mkdir(exist_ok=True)
 
 def read_dataframe(year, month):
     """
-    #TODO add docstrings all functions
-    """
-    url = f'https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_{year}-{month:02d}.parquet'
-    df = pd.read_parquet(url)
-
-    df['duration'] = df.lpep_dropoff_datetime - df.lpep_pickup_datetime
-    df.duration = df.duration.apply(lambda td: td.total_seconds() / 60)
-
-    df = df[(df.duration >= 1) & (df.duration <= 60)]
-
-    categorical = ['PULocationID', 'DOLocationID']
-    df[categorical] = df[categorical].astype(str)
+    Load a month of green taxi trips with duration and PU_DO.
 
-    df['PU_DO'] = df['PULocationID'] + '_' + df['DOLocationID']
-
-    return df
+    Only the needed columns are read and duration, outlier filter and PU_DO
+    are computed in columnar form (see ingestion.py). The monthly file is
+    downloaded once and then read from the local data cache (data_cache.py).
+    """
+    return load_month(year, month)
 
 
 def create_X(df, dv=None):
+    """
+    Build the sparse feature matrix (PU_DO one-hot + trip_distance).
+
+    Same matrix as DictVectorizer on `df.to_dict(orient='records')`, built
+    from the columns (see columnar_encoder.py). dv is still a DictVectorizer,
+    so preprocessor.b keeps its format.
+    """
     categorical = ['PU_DO']
     numerical = ['trip_distance']
-    dicts = df[categorical + numerical].to_dict(orient='records')
 
     if dv is None:
-        dv = DictVectorizer(sparse=True)
-        X = dv.fit_transform(dicts)
+        encoder = ColumnarEncoder(categorical, numerical)
+        X = encoder.fit_transform(df)
+        dv = encoder.to_dict_vectorizer()
     else:
-        X = dv.transform(dicts)
+        X = ColumnarEncoder.from_dict_vectorizer(dv, categorical, numerical).transform(df)
 
     return X, dv
 
 
 def train_model(X_train, y_train, X_val, y_val, dv):
-    with mlflow.start_run() as run:
+    # Logged by a background thread, flushed before the run ends (async_tracking.py)
+    with start_async_run() as run_logger:
         train = xgb.DMatrix(X_train, label=y_train)
         valid = xgb.DMatrix(X_val, label=y_val)
 
@@ -67,7 +69,7 @@ def train_model(X_train, y_train, X_val, y_val, dv):
             'seed': 42
         }
 
-        mlflow.log_params(best_params)
+        run_logger.log_params(best_params)
 
         booster = xgb.train(
             params=best_params,
@@ -79,15 +81,18 @@ def train_model(X_train, y_train, X_val, y_val, dv):
 
         y_pred = booster.predict(valid)
         rmse = root_mean_squared_error(y_val, y_pred)
-        mlflow.log_metric("rmse", rmse)
+        run_logger.log_metric("rmse", rmse)
 
         with open("models/preprocessor.b", "wb") as f_out:
             pickle.dump(dv, f_out)
-        mlflow.log_artifact("models/preprocessor.b", artifact_path="preprocessor")
+        run_logger.log_artifact("models/preprocessor.b", artifact_path="preprocessor")
+        # Same vocabulary in the pickle-free format (see model_artifact.py)
+        export_dict_vectorizer("models/preprocessor.artifact", dv)
+        run_logger.log_artifact("models/preprocessor.artifact", artifact_path="preprocessor")
 
-        mlflow.xgboost.log_model(booster, artifact_path="models_mlflow")
+        run_logger.submit(mlflow.xgboost.log_model, booster, artifact_path="models_mlflow", run_id=run_logger.run_id)
 
-        return run.info.run_id
+        return run_logger.run_id
 
 
 def run(year, month):
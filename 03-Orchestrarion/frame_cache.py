@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Persistent cache of cleaned monthly frames and fitted feature matrices.
+
+Rolling monthly retrains use month M+1 twice: as validation data for the
+model trained on M and as training data for the next one. With this cache
+the cleaned frame of a month is stored once as parquet and the feature
+matrices as npz, so a retrain only has to process the new month.
+
+Entries are keyed by (year, month, code version):
+    frames/green_<year>-<month>_<version>.parquet
+    features/green_<year>-<month>_<version>_<vocabulary>.npz (+ .dv.pkl when fitted)
+
+The code version is a hash of the source that produced the entry (see
+code_version), so editing the cleaning or feature code invalidates it. The
+vocabulary part is 'fit' for a matrix whose DictVectorizer was fitted on the
+same month, or a hash of the feature names of the DictVectorizer it was
+transformed with.
+
+Configuration (environment variables):
+    TAXI_FRAME_CACHE_DIR  Cache root (default: <data cache root>/derived)
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+from pathlib import Path
+
+import pandas as pd
+import scipy.sparse
+
+from data_cache import DEFAULT_CACHE_DIR
+
+
+def code_version(*objects):
+    """
+    Short hash of the source code of modules/functions.
+
+    Args:
+        *objects: Modules or functions whose source defines the cached result
+
+    Returns:
+        12-character hex digest
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()[:12]
+
+
+def vocabulary_key(dv):
+    """
+    Short hash of a fitted DictVectorizer's feature names (its column order).
+
+    Args:
+        dv: Fitted DictVectorizer
+
+    Returns:
+        12-character hex digest
+    """
+    return hashlib.sha256('\n'.join(dv.feature_names_).encode()).hexdigest()[:12]
+
+
+class FrameCache:
+    """
+    On-disk cache of cleaned frames (parquet) and feature matrices (npz).
+
+    Args:
+        root: Cache directory (default: $TAXI_FRAME_CACHE_DIR or <data cache root>/derived)
+    """
+
+    def __init__(self, root=None):
+        default_root = Path(os.getenv('TAXI_DATA_CACHE_DIR', DEFAULT_CACHE_DIR)) / 'derived'
+        self.root = Path(root or os.getenv('TAXI_FRAME_CACHE_DIR', default_root))
+        (self.root / 'frames').mkdir(parents=True, exist_ok=True)
+        (self.root / 'features').mkdir(parents=True, exist_ok=True)
+
+    def frame_path(self, year, month, version):
+        return self.root / 'frames' / f'green_{year}-{month:02d}_{version}.parquet'
+
+    def features_path(self, year, month, version, vocabulary):
+        return self.root / 'features' / f'green_{year}-{month:02d}_{version}_{vocabulary}.npz'
+
+    @staticmethod
+    def _atomic(path, write):
+        # Write to a temporary file and rename, so readers never see a partial
+        # entry. The temporary name keeps the suffix (save_npz appends .npz otherwise)
+        # and is unique per thread, as months are cached from concurrent tasks
+        tmp_path = path.with_name(f'tmp_{os.getpid()}_{threading.get_ident()}_{path.name}')
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def load_frame(self, year, month, version):
+        """
+        Cleaned frame of a month, or None if it is not cached.
+
+        Args:
+            year: Year of the data
+            month: Month of the data
+            version: Code version of the cleaning code
+
+        Returns:
+            DataFrame with the dtypes it was saved with, or None
+        """
+        path = self.frame_path(year, month, version)
+        if not path.exists():
+            return None
+        return pd.read_parquet(path)
+
+    def save_frame(self, df, year, month, version):
+        """
+        Store the cleaned frame of a month.
+
+        Args:
+            df: Cleaned DataFrame
+            year: Year of the data
+            month: Month of the data
+            version: Code version of the cleaning code
+
+        Returns:
+            Path of the cached parquet file
+        """
+        path = self.frame_path(year, month, version)
+        self._atomic(path, lambda tmp: df.to_parquet(tmp))
+        return path
+
+    def load_features(self, year, month, version, dv=None):
+        """
+        Feature matrix of a month, or None if it is not cached.
+
+        Args:
+            year: Year of the data
+            month: Month of the data
+            version: Code version of the feature code
+            dv: DictVectorizer the matrix was transformed with, or None for
+                the matrix fitted on this month
+
+        Returns:
+            (X, dv) with X as CSR matrix, or None
+        """
+        vocabulary = 'fit' if dv is None else vocabulary_key(dv)
+        path = self.features_path(year, month, version, vocabulary)
+        dv_path = path.with_suffix('.dv.pkl')
+        if not path.exists() or (dv is None and not dv_path.exists()):
+            return None
+
+        X = scipy.sparse.load_npz(path).tocsr()
+        if dv is None:
+            with open(dv_path, 'rb') as f_in:
+                dv = pickle.load(f_in)
+        return X, dv
+
+    def save_features(self, X, dv, year, month, version, fitted):
+        """
+        Store the feature matrix of a month.
+
+        Args:
+            X: Sparse feature matrix
+            dv: DictVectorizer used to build X
+            year: Year of the data
+            month: Month of the data
+            version: Code version of the feature code
+            fitted: True if dv was fitted on this month (it is stored too)
+
+        Returns:
+            Path of the cached npz file
+        """
+        vocabulary = 'fit' if fitted else vocabulary_key(dv)
+        path = self.features_path(year, month, version, vocabulary)
+        if fitted:
+            def write_dv(tmp):
+                with open(tmp, 'wb') as f_out:
+                    pickle.dump(dv, f_out)
+            self._atomic(path.with_suffix('.dv.pkl'), write_dv)
+        self._atomic(path, lambda tmp: scipy.sparse.save_npz(tmp, X.tocsr()))
+        return path
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Vectorized ingestion of NYC TLC green taxi trip data.
+
+Shared by duration-prediction.py, Prefect-pipelines/duration_prediction_prefect.py
+and 02-Experiment-Tracking/scripts/preprocess_data.py (kept as an identical copy
+there). It replaces the per-row `.apply(lambda td: td.total_seconds() / 60)` with
+columnar operations and only reads the columns the pipelines use.
+
+Monthly files are read through the local data cache (data_cache.py), so a month
+is only downloaded once per machine.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_cache import fetch
+
+TRIP_DATA_URL = 'https://d37ci6vzurychx.cloudfront.net/trip-data/green_tripdata_{year}-{month:02d}.parquet'
+
+# Columns needed to compute duration, PU_DO and trip_distance
+TRIP_COLUMNS = [
+    'lpep_pickup_datetime',
+    'lpep_dropoff_datetime',
+    'PULocationID',
+    'DOLocationID',
+    'trip_distance',
+]
+
+MIN_DURATION = 1
+MAX_DURATION = 60
+
+
+def trip_data_url(year, month):
+    """
+    URL of the green taxi parquet file for a given month.
+
+    Args:
+        year: Year of the data
+        month: Month of the data
+
+    Returns:
+        CloudFront URL of the monthly parquet file
+    """
+    return TRIP_DATA_URL.format(year=year, month=month)
+
+
+def compute_duration(pickup, dropoff):
+    """
+    Trip duration in minutes, computed on whole columns.
+
+    Gives exactly the same values as
+    `(dropoff - pickup).apply(lambda td: td.total_seconds() / 60)`:
+    Timedelta.total_seconds() truncates to microseconds and adds the
+    fractional part to the whole seconds, so the same is done here with
+    integer arithmetic on the raw values.
+
+    Args:
+        pickup: Series of pickup datetimes
+        dropoff: Series of dropoff datetimes
+
+    Returns:
+        float64 numpy array of durations in minutes (NaN where a datetime is missing)
+    """
+    delta = (dropoff - pickup).to_numpy(dtype='timedelta64[ns]')
+    missing = np.isnat(delta)
+    us = delta.view('i8') // 1000
+    seconds = (us // 1_000_000) + (us % 1_000_000) / 1e6
+    minutes = seconds / 60
+    minutes[missing] = np.nan
+    return minutes
+
+
+def build_pu_do(pu, do):
+    """
+    Build the PU_DO feature ('<PULocationID>_<DOLocationID>') as a categorical.
+
+    For integer location IDs the string is only built once per distinct pair
+    instead of once per trip. Other dtypes fall back to string concatenation,
+    which matches `astype(str)` on the original columns.
+
+    Args:
+        pu: Series of pickup location IDs
+        do: Series of dropoff location IDs
+
+    Returns:
+        Categorical Series with the PU_DO values
+    """
+    integer_ids = (
+        pd.api.types.is_integer_dtype(pu) and pd.api.types.is_integer_dtype(do)
+        and not pu.hasnans and not do.hasnans
+    )
+    if integer_ids:
+        pu_values = pu.to_numpy(dtype=np.int64)
+        do_values = do.to_numpy(dtype=np.int64)
+        # One int64 key per pair, factorized with a hash table (no sorting)
+        do_min = do_values.min() if len(do_values) else 0
+        do_range = (do_values.max() - do_min + 1) if len(do_values) else 1
+        codes, keys = pd.factorize(pu_values * do_range + (do_values - do_min))
+        pu_unique, do_unique = np.divmod(keys, do_range)
+        categories = [f'{a}_{b + do_min}' for a, b in zip(pu_unique.tolist(), do_unique.tolist())]
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=categories),
+            index=pu.index,
+            name='PU_DO'
+        )
+
+    pu_do = pu.astype(str) + '_' + do.astype(str)
+    return pu_do.astype('category').rename('PU_DO')
+
+
+def prepare_trips(df, compact=True):
+    """
+    Add duration, filter outliers and build PU_DO, all in columnar form.
+
+    Args:
+        df: Raw trips with the TRIP_COLUMNS
+        compact: Store location IDs as int16. trip_distance and duration stay
+            float64: they are the model's feature and target, and float32 would
+            change the trained model compared with the previous pipelines
+
+    Returns:
+        DataFrame with trips between MIN_DURATION and MAX_DURATION minutes
+        and the columns PULocationID, DOLocationID, trip_distance, duration, PU_DO
+    """
+    duration = compute_duration(df['lpep_pickup_datetime'], df['lpep_dropoff_datetime'])
+
+    # Filter on the float64 duration so the kept rows match the previous pipelines
+    mask = (duration >= MIN_DURATION) & (duration <= MAX_DURATION)
+    df = df.loc[mask, ['PULocationID', 'DOLocationID', 'trip_distance']].copy()
+    df['duration'] = duration[mask]
+
+    df['PU_DO'] = build_pu_do(df['PULocationID'], df['DOLocationID'])
+
+    if compact:
+        for col in ['PULocationID', 'DOLocationID']:
+            if pd.api.types.is_integer_dtype(df[col]) and df[col].between(-32768, 32767).all():
+                df[col] = df[col].astype(np.int16)
+
+    return df
+
+
+def load_trips(source, compact=True):
+    """
+    Read a trip parquet file (path or URL) with only the needed columns and prepare it.
+
+    Args:
+        source: Local path or URL of the parquet file
+        compact: Use compact dtypes (see prepare_trips)
+
+    Returns:
+        Prepared DataFrame (see prepare_trips)
+    """
+    df = pd.read_parquet(source, columns=TRIP_COLUMNS)
+    return prepare_trips(df, compact=compact)
+
+
+def load_month(year, month, compact=True):
+    """
+    Load a month of green taxi trips through the local data cache.
+
+    The parquet file is downloaded on the first call only; later calls (and
+    other pipelines on the same machine) read the cached copy.
+
+    Args:
+        year: Year of the data
+        month: Month of the data
+        compact: Use compact dtypes (see prepare_trips)
+
+    Returns:
+        Prepared DataFrame (see prepare_trips)
+    """
+    return load_trips(fetch(trip_data_url(year, month)), compact=compact)
@@ -0,0 +1,325 @@
+"""NYC Taxi Duration Prediction - Model Artifact Format
+
+A pickle-free file format for the trained models: a small JSON header plus
+raw NumPy arrays that are memory-mapped on load.
+
+    offset 0   MAGIC (8 bytes) + format version (uint16) + header length (uint32)
+    offset 14  Header (UTF-8 JSON): kind, metadata, arrays (dtype, shape,
+               offset, nbytes) and the SHA-256 of the artifact
+    payload    Array data, each array aligned to 64 bytes
+
+Kinds:
+    linear_model     DictVectorizer + LinearRegression (lin_reg.bin): arrays
+                     feature_names and coef; intercept, separator and dtype
+                     in the metadata
+    dict_vectorizer  DictVectorizer alone (preprocessor.b of the XGBoost
+                     pipeline): array feature_names; separator and dtype in
+                     the metadata
+
+The SHA-256 covers a canonical JSON encoding of the kind, metadata and array
+layout followed by the payload, so a change to the intercept or separator
+changes the checksum (and the model version) as much as a change to the
+coefficients does. Format version 1 files, whose checksum covers the payload
+only, are still read.
+
+Loading a file parses the header, hashes it with the payload and maps the
+arrays read-only; processes reading the same file share its pages. It never
+executes code from the file (only numeric and byte-string dtypes are
+accepted) and does not import sklearn. to_sklearn() rebuilds the sklearn
+objects for the code paths that still want them.
+
+This module is kept identical in web-service/, web-service-docker/,
+batch-deploy/src/ and 03-Orchestrarion/.
+
+Usage:
+    python model_artifact.py export lin_reg.bin lin_reg.artifact
+    python model_artifact.py info lin_reg.artifact
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'\x93TAXIMDL'
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sHI')
+# Array dtypes accepted on load: numbers and fixed-width byte strings only
+_ALLOWED_KINDS = 'biufS'
+
+
+class ArtifactError(ValueError):
+    """Raised when a file is not a valid artifact or fails its checksum."""
+
+
+class Artifact:
+    """
+    A loaded artifact.
+
+    Attributes:
+        kind (str): 'linear_model' or 'dict_vectorizer'
+        metadata (dict): Scalars stored in the header
+        arrays (dict): Name -> read-only np.ndarray (memory-mapped)
+        sha256 (str): Checksum of the header fields and payload
+        format_version (int): Version of the file format
+        version (str): Short checksum, used as the model version
+    """
+
+    def __init__(self, kind, metadata, arrays, sha256, format_version):
+        self.kind = kind
+        self.metadata = metadata
+        self.arrays = arrays
+        self.sha256 = sha256
+        self.format_version = format_version
+        self.version = sha256[:12]
+
+    def feature_names(self):
+        """Feature names in column order, as str."""
+        return [name.decode('utf-8') for name in self.arrays['feature_names'].tolist()]
+
+    def vocabulary(self):
+        """Feature name -> column index (DictVectorizer.vocabulary_)."""
+        return {name: i for i, name in enumerate(self.feature_names())}
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _checksum(kind, metadata, layout, payload, format_version=FORMAT_VERSION):
+    """SHA-256 of the canonical header fields followed by the payload."""
+    digest = hashlib.sha256()
+    if format_version >= 2:
+        fields = {'kind': kind, 'metadata': metadata, 'arrays': layout}
+        digest.update(json.dumps(fields, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+def write_artifact(path, kind, arrays, metadata=None):
+    """
+    Write arrays and metadata as an artifact (atomically: temp file + rename).
+
+    Args:
+        path (str or Path): Output file
+        kind (str): Artifact kind
+        arrays (dict): Name -> np.ndarray (numeric or bytes dtype)
+        metadata (dict): JSON-serializable scalars
+
+    Returns:
+        str: SHA-256 of the artifact
+    """
+    metadata = metadata or {}
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.kind not in _ALLOWED_KINDS:
+            raise ArtifactError(f'Array {name} has unsupported dtype {array.dtype}')
+
+    # Payload offsets are relative to the payload start, which depends on the header size
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                        'offset': offset, 'nbytes': array.nbytes}
+        offset += array.nbytes
+    payload = bytearray(offset)
+    for name, array in arrays.items():
+        start = layout[name]['offset']
+        payload[start:start + array.nbytes] = array.tobytes()
+    checksum = _checksum(kind, metadata, layout, payload)
+
+    header = json.dumps({
+        'kind': kind,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'metadata': metadata,
+        'arrays': layout,
+        'sha256': checksum
+    }, sort_keys=True).encode('utf-8')
+    payload_start = _align(_PREAMBLE.size + len(header))
+
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f_out:
+        f_out.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f_out.write(header)
+        f_out.write(b'\0' * (payload_start - _PREAMBLE.size - len(header)))
+        f_out.write(payload)
+    os.replace(tmp_path, path)
+    return checksum
+
+
+def is_artifact(path):
+    """True if the file starts with the artifact magic bytes."""
+    with open(path, 'rb') as f_in:
+        return f_in.read(len(MAGIC)) == MAGIC
+
+
+def read_artifact(path, verify=True):
+    """
+    Load an artifact, with its arrays memory-mapped read-only.
+
+    Args:
+        path (str or Path): Artifact file
+        verify (bool): Check the header fields and payload against the SHA-256
+
+    Returns:
+        Artifact: Loaded artifact
+
+    Raises:
+        ArtifactError: If the file is not an artifact, uses a newer format
+            version, is truncated or fails the checksum
+    """
+    with open(path, 'rb') as f_in:
+        preamble = f_in.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size or preamble[:len(MAGIC)] != MAGIC:
+            raise ArtifactError(f'{path} is not a model artifact')
+        _, format_version, header_length = _PREAMBLE.unpack(preamble)
+        if format_version > FORMAT_VERSION:
+            raise ArtifactError(f'{path} uses format version {format_version}, '
+                                f'this code reads up to {FORMAT_VERSION}')
+        try:
+            header = json.loads(f_in.read(header_length).decode('utf-8'))
+        except ValueError as e:
+            raise ArtifactError(f'{path} has a corrupt header: {e}') from e
+        buffer = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+
+    payload_start = _align(_PREAMBLE.size + header_length)
+    payload = memoryview(buffer)[payload_start:]
+    if verify and _checksum(header['kind'], header['metadata'], header['arrays'],
+                            payload, format_version) != header['sha256']:
+        raise ArtifactError(f'{path} failed its SHA-256 check')
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        if dtype.kind not in _ALLOWED_KINDS:
+            raise ArtifactError(f'Array {name} has unsupported dtype {dtype}')
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        if spec['offset'] + count * dtype.itemsize > len(payload):
+            raise ArtifactError(f'{path} is truncated (array {name})')
+        array = np.frombuffer(payload, dtype=dtype, count=count, offset=spec['offset'])
+        arrays[name] = array.reshape(spec['shape'])
+    return Artifact(header['kind'], header['metadata'], arrays, header['sha256'], format_version)
+
+
+def _feature_names_array(feature_names):
+    encoded = [name.encode('utf-8') for name in feature_names]
+    return np.array(encoded, dtype=f'S{max((len(n) for n in encoded), default=1)}')
+
+
+def _vectorizer_metadata(dv):
+    return {
+        'separator': dv.separator,
+        'dtype': np.dtype(dv.dtype).name,
+        'n_features': len(dv.feature_names_)
+    }
+
+
+def export_linear_model(path, dv, model):
+    """
+    Write a fitted (DictVectorizer, linear model) pair, e.g. lin_reg.bin.
+
+    Args:
+        path (str or Path): Output file
+        dv: Fitted DictVectorizer
+        model: Fitted single-target linear model (coef_, intercept_)
+
+    Returns:
+        str: SHA-256 of the artifact
+    """
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    if coef.ndim != 1 or coef.shape[0] != len(dv.feature_names_):
+        raise ArtifactError(f'coef_ shape {coef.shape} does not match {len(dv.feature_names_)} features')
+    metadata = _vectorizer_metadata(dv)
+    metadata.update({
+        'intercept': float(np.asarray(model.intercept_, dtype=np.float64).item()),
+        'model_class': type(model).__name__
+    })
+    return write_artifact(path, 'linear_model',
+                          {'feature_names': _feature_names_array(dv.feature_names_), 'coef': coef},
+                          metadata)
+
+
+def export_dict_vectorizer(path, dv):
+    """
+    Write a fitted DictVectorizer, e.g. preprocessor.b.
+
+    Args:
+        path (str or Path): Output file
+        dv: Fitted DictVectorizer
+
+    Returns:
+        str: SHA-256 of the artifact
+    """
+    return write_artifact(path, 'dict_vectorizer',
+                          {'feature_names': _feature_names_array(dv.feature_names_)},
+                          _vectorizer_metadata(dv))
+
+
+def to_sklearn(artifact):
+    """
+    Rebuild the sklearn objects of an artifact (imports sklearn).
+
+    Args:
+        artifact (Artifact): Loaded artifact
+
+    Returns:
+        tuple or DictVectorizer: (dv, model) for 'linear_model', dv for 'dict_vectorizer'
+    """
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.linear_model import LinearRegression
+
+    dv = DictVectorizer(dtype=np.dtype(artifact.metadata['dtype']).type,
+                        separator=artifact.metadata['separator'])
+    dv.feature_names_ = artifact.feature_names()
+    dv.vocabulary_ = artifact.vocabulary()
+    if artifact.kind == 'dict_vectorizer':
+        return dv
+
+    model = LinearRegression()
+    model.coef_ = np.array(artifact.arrays['coef'])
+    model.intercept_ = artifact.metadata['intercept']
+    model.n_features_in_ = model.coef_.shape[0]
+    return dv, model
+
+
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description='Export pickled models to the artifact format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Convert a pickle (lin_reg.bin or preprocessor.b)')
+    export_parser.add_argument('source', help='Pickled (dv, model) tuple or DictVectorizer')
+    export_parser.add_argument('target', help='Artifact to write')
+    info_parser = subparsers.add_parser('info', help='Verify an artifact and print its header')
+    info_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        # Trusted input: the pickles written by the training pipelines
+        with open(args.source, 'rb') as f_in:
+            obj = pickle.load(f_in)
+        if isinstance(obj, tuple):
+            checksum = export_linear_model(args.target, *obj)
+        else:
+            checksum = export_dict_vectorizer(args.target, obj)
+        print(f"✅ {args.source} -> {args.target} (sha256 {checksum[:12]})")
+    else:
+        start = time.perf_counter()
+        artifact = read_artifact(args.path)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {args.path}: {artifact.kind}, format v{artifact.format_version}, "
+              f"sha256 {artifact.sha256[:12]}, loaded and verified in {elapsed * 1000:.1f} ms")
+        for name, array in artifact.arrays.items():
+            print(f"   {name}: {array.dtype} {array.shape}")
+        print(f"   metadata: {artifact.metadata}")
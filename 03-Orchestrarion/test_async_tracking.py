@@ -0,0 +1,61 @@
+"""AsyncRunLogger of async_tracking.py: everything logged reaches the run, in few requests.
+
+Run from 03-Orchestrarion/:
+    python -m pytest test_async_tracking.py -q
+"""
+
+import mlflow
+import pytest
+from mlflow.tracking import MlflowClient
+
+from async_tracking import MAX_PARAMS_PER_BATCH, AsyncRunLogger, start_async_run
+
+
+@pytest.fixture(scope='module')
+def experiment_id(tmp_path_factory):
+    root = tmp_path_factory.mktemp('mlflow')
+    previous = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(f"sqlite:///{root / 'mlflow.db'}")
+    experiment_id = mlflow.create_experiment('async-tracking-test', artifact_location=(root / 'artifacts').as_uri())
+    yield experiment_id
+    mlflow.set_tracking_uri(previous)
+
+
+def test_values_are_batched_and_sent_before_the_run_ends(experiment_id, tmp_path):
+    artifact = tmp_path / 'preprocessor.b'
+    artifact.write_bytes(b'vocabulary')
+    params = {f'param_{i}': i for i in range(2 * MAX_PARAMS_PER_BATCH + 10)}
+
+    with start_async_run(experiment_id=experiment_id) as run_logger:
+        run_logger.log_params(params)
+        for step in range(1500):
+            run_logger.log_metric('rmse', 1.0 / (step + 1), step=step)
+        run_logger.set_tag('matrix', 'dmatrix')
+        run_logger.log_artifact(str(artifact), artifact_path='preprocessor')
+
+    client = MlflowClient()
+    run = client.get_run(run_logger.run_id)
+    assert run.info.status == 'FINISHED'
+    assert run.data.params == {key: str(value) for key, value in params.items()}
+    assert run.data.tags['matrix'] == 'dmatrix'
+    history = client.get_metric_history(run_logger.run_id, 'rmse')
+    assert sorted(metric.step for metric in history) == list(range(1500))
+    assert [a.path for a in client.list_artifacts(run_logger.run_id, 'preprocessor')] == ['preprocessor/preprocessor.b']
+    # 1500 metrics, 210 params, 1 tag and 1 upload in a handful of requests
+    assert run_logger.requests < 15
+
+
+def test_failed_call_is_raised_on_close_after_the_rest_is_sent(experiment_id):
+    def upload():
+        raise OSError('artifact store unreachable')
+
+    run_id = MlflowClient().create_run(experiment_id).info.run_id
+    run_logger = AsyncRunLogger(run_id, linger=0.0)
+    run_logger.submit(upload)
+    run_logger.log_metric('rmse', 5.0)
+
+    with pytest.raises(RuntimeError, match='artifact store unreachable'):
+        run_logger.close()
+    assert MlflowClient().get_run(run_id).data.metrics == {'rmse': 5.0}
+    with pytest.raises(RuntimeError, match='closed'):
+        run_logger.log_metric('rmse', 4.0)
@@ -0,0 +1,144 @@
+"""Equivalence of ColumnarEncoder with DictVectorizer.
+
+Run from 03-Orchestrarion/:
+    python -m pytest test_columnar_encoder.py -q
+"""
+
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction import DictVectorizer
+
+from columnar_encoder import ColumnarEncoder
+from ingestion import prepare_trips
+from model_artifact import export_dict_vectorizer, read_artifact
+
+CATEGORICAL = ['PU_DO']
+NUMERICAL = ['trip_distance']
+PREPROCESSOR_PATH = Path(__file__).parent / 'models' / 'preprocessor.b'
+
+
+def make_trips(n_trips, seed, max_location=266):
+    rng = np.random.default_rng(seed)
+    pickup = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 86400, n_trips), unit='s')
+    df = pd.DataFrame({
+        'lpep_pickup_datetime': pickup,
+        'lpep_dropoff_datetime': pickup + pd.to_timedelta(rng.integers(30, 4000, n_trips), unit='s'),
+        'PULocationID': rng.integers(1, max_location, n_trips),
+        'DOLocationID': rng.integers(1, max_location, n_trips),
+        # Zeros are stored explicitly by DictVectorizer and must be kept
+        'trip_distance': np.where(rng.random(n_trips) < 0.1, 0.0, np.round(rng.gamma(2.0, 1.5, n_trips), 2)),
+    })
+    return prepare_trips(df)
+
+
+def dicts(df):
+    return df[CATEGORICAL + NUMERICAL].to_dict(orient='records')
+
+
+def assert_same_matrix(actual, expected):
+    assert actual.shape == expected.shape
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual.indptr, expected.indptr)
+    np.testing.assert_array_equal(actual.indices, expected.indices)
+    np.testing.assert_array_equal(actual.data, expected.data)
+
+
+def test_fit_transform_matches_dict_vectorizer():
+    df = make_trips(20_000, seed=1)
+    dv = DictVectorizer(sparse=True)
+    expected = dv.fit_transform(dicts(df))
+
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL)
+    actual = encoder.fit_transform(df)
+
+    assert encoder.feature_names_ == dv.feature_names_
+    assert encoder.vocabulary_ == dv.vocabulary_
+    assert_same_matrix(actual, expected)
+
+
+def test_transform_drops_unseen_categories_like_dict_vectorizer():
+    df_train = make_trips(5_000, seed=2, max_location=60)
+    df_val = make_trips(5_000, seed=3)
+    dv = DictVectorizer(sparse=True).fit(dicts(df_train))
+
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(df_train)
+
+    assert_same_matrix(encoder.transform(df_val), dv.transform(dicts(df_val)))
+
+
+def test_unused_categories_are_not_in_vocabulary():
+    df = make_trips(5_000, seed=4)
+    subset = df.iloc[:100]
+    dv = DictVectorizer(sparse=True).fit(dicts(subset))
+
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(subset)
+
+    assert encoder.feature_names_ == dv.feature_names_
+
+
+def test_partial_fit_on_chunks_matches_fit():
+    df = make_trips(20_000, seed=9)
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(df)
+
+    chunked = ColumnarEncoder(CATEGORICAL, NUMERICAL)
+    for start in range(0, len(df), 3_000):
+        chunked.partial_fit(df.iloc[start:start + 3_000])
+
+    assert chunked.feature_names_ == encoder.feature_names_
+    assert chunked.vocabulary_ == encoder.vocabulary_
+
+
+def test_string_columns_and_missing_numeric_values():
+    df = pd.DataFrame({
+        'PU_DO': ['10_20', '1_2', '10_20', '7_7'],
+        'trip_distance': [1.5, np.nan, 0.0, 3.25],
+    })
+    dv = DictVectorizer(sparse=True)
+    expected = dv.fit_transform(dicts(df))
+
+    assert_same_matrix(ColumnarEncoder(CATEGORICAL, NUMERICAL).fit_transform(df), expected)
+
+
+def test_missing_categorical_values_are_rejected():
+    df = pd.DataFrame({'PU_DO': ['1_2', None], 'trip_distance': [1.0, 2.0]})
+
+    with pytest.raises(ValueError):
+        ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(df)
+
+
+def test_round_trip_through_dict_vectorizer():
+    df = make_trips(5_000, seed=5)
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(df)
+
+    dv = pickle.loads(pickle.dumps(encoder.to_dict_vectorizer()))
+    restored = ColumnarEncoder.from_dict_vectorizer(dv, CATEGORICAL, NUMERICAL)
+
+    assert_same_matrix(dv.transform(dicts(df)), encoder.transform(df))
+    assert_same_matrix(restored.transform(df), encoder.transform(df))
+
+
+def test_from_artifact(tmp_path):
+    df = make_trips(5_000, seed=7)
+    encoder = ColumnarEncoder(CATEGORICAL, NUMERICAL).fit(df)
+    path = tmp_path / 'preprocessor.artifact'
+    export_dict_vectorizer(path, encoder.to_dict_vectorizer())
+
+    restored = ColumnarEncoder.from_artifact(read_artifact(path), CATEGORICAL, NUMERICAL)
+
+    assert restored.feature_names_ == encoder.feature_names_
+    assert_same_matrix(restored.transform(df), encoder.transform(df))
+
+
+@pytest.mark.skipif(not PREPROCESSOR_PATH.exists(), reason='models/preprocessor.b not available')
+def test_existing_preprocessor_artifact():
+    with open(PREPROCESSOR_PATH, 'rb') as f_in:
+        dv = pickle.load(f_in)
+    df = make_trips(20_000, seed=6)
+
+    encoder = ColumnarEncoder.from_dict_vectorizer(dv, CATEGORICAL, NUMERICAL)
+
+    assert_same_matrix(encoder.transform(df), dv.transform(dicts(df)))
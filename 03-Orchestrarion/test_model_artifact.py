@@ -0,0 +1,74 @@
+"""Model artifacts of model_artifact.py: round trip to sklearn and checksum verification.
+
+Run from 03-Orchestrarion/:
+    python -m pytest test_model_artifact.py -q
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction import DictVectorizer
+from sklearn.linear_model import LinearRegression
+
+from model_artifact import ArtifactError, export_dict_vectorizer, export_linear_model, read_artifact, to_sklearn
+
+
+def make_rides(n_rides, seed):
+    rng = np.random.default_rng(seed)
+    pu = rng.integers(1, 266, n_rides)
+    do = rng.integers(1, 266, n_rides)
+    distance = np.round(rng.gamma(2.0, 1.5, n_rides), 2)
+    rides = [{'PU_DO': f'{a}_{b}', 'trip_distance': float(d)} for a, b, d in zip(pu, do, distance)]
+    return rides, 5.0 + 3.0 * distance + rng.normal(0, 1, n_rides)
+
+
+def fit_model(seed=1):
+    rides, y = make_rides(2_000, seed)
+    dv = DictVectorizer()
+    model = LinearRegression().fit(dv.fit_transform(rides), y)
+    return dv, model, rides
+
+
+def test_round_trip_through_sklearn(tmp_path):
+    dv, model, rides = fit_model()
+    export_linear_model(tmp_path / 'lin_reg.artifact', dv, model)
+    export_dict_vectorizer(tmp_path / 'preprocessor.artifact', dv)
+
+    restored_dv, restored_model = to_sklearn(read_artifact(tmp_path / 'lin_reg.artifact'))
+    preprocessor = to_sklearn(read_artifact(tmp_path / 'preprocessor.artifact'))
+
+    assert restored_dv.feature_names_ == preprocessor.feature_names_ == list(dv.feature_names_)
+    assert (preprocessor.transform(rides) != dv.transform(rides)).nnz == 0
+    np.testing.assert_array_equal(restored_model.predict(restored_dv.transform(rides)),
+                                  model.predict(dv.transform(rides)))
+
+
+def test_artifact_rejects_corrupt_payload(tmp_path):
+    dv, _, _ = fit_model(seed=8)
+    path = tmp_path / 'preprocessor.artifact'
+    export_dict_vectorizer(path, dv)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ArtifactError):
+        read_artifact(path)
+    (tmp_path / 'preprocessor.b').write_bytes(pickle.dumps(dv))
+    with pytest.raises(ArtifactError):
+        read_artifact(tmp_path / 'preprocessor.b')
+
+
+def test_artifact_checksum_covers_the_metadata(tmp_path):
+    dv, model, _ = fit_model(seed=9)
+    path = tmp_path / 'lin_reg.artifact'
+    checksum = export_linear_model(path, dv, model)
+    data = path.read_bytes()
+    assert data.count(b'"separator": "="') == 1
+    path.write_bytes(data.replace(b'"separator": "="', b'"separator": ":"'))
+
+    with pytest.raises(ArtifactError, match='SHA-256'):
+        read_artifact(path)
+    # An intercept-only change gives a new checksum, so a new model version
+    model.intercept_ += 1.0
+    assert export_linear_model(tmp_path / 'other.artifact', dv, model) != checksum
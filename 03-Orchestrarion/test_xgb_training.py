@@ -0,0 +1,74 @@
+"""Training matrices of xgb_training.py: same data in every mode, and the same trees on a synthetic month.
+
+Run from 03-Orchestrarion/:
+    python -m pytest test_xgb_training.py -q
+"""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+import xgboost as xgb
+
+from benchmark_ingestion import write_synthetic_month
+from columnar_encoder import ColumnarEncoder
+from ingestion import load_trips
+from xgb_training import (
+    MATRIX_MODES,
+    RoundStats,
+    build_matrices,
+    fit_parquet_encoder,
+    matrix_batches,
+    parquet_batches,
+)
+
+PARAMS = {'max_depth': 6, 'learning_rate': 0.1, 'seed': 42}
+
+
+@pytest.fixture(scope='module')
+def months(tmp_path_factory):
+    root = tmp_path_factory.mktemp('months')
+    train_path, val_path = root / 'train.parquet', root / 'valid.parquet'
+    write_synthetic_month(train_path, 20_000, seed=1)
+    write_synthetic_month(val_path, 10_000, seed=2)
+    return train_path, val_path
+
+
+def test_parquet_batches_match_loaded_month(months):
+    train_path, _ = months
+    df = load_trips(train_path)
+    encoder = ColumnarEncoder(['PU_DO'], ['trip_distance']).fit(df)
+
+    streamed = fit_parquet_encoder(train_path, batch_rows=3_000)
+    Xs, ys = zip(*parquet_batches(train_path, streamed, batch_rows=3_000)())
+
+    assert streamed.feature_names_ == encoder.feature_names_
+    assert len(Xs) > 1
+    assert (sp.vstack(Xs) != encoder.transform(df)).nnz == 0
+    np.testing.assert_array_equal(np.concatenate(ys), df['duration'].to_numpy())
+
+
+def test_every_matrix_mode_trains_the_same_model(months, tmp_path):
+    train_path, val_path = months
+    df_train, df_val = load_trips(train_path), load_trips(val_path)
+    encoder = ColumnarEncoder(['PU_DO'], ['trip_distance'])
+    X_train, X_val = encoder.fit_transform(df_train), encoder.transform(df_val)
+    y_train, y_val = df_train['duration'].to_numpy(), df_val['duration'].to_numpy()
+
+    predictions = {}
+    for mode in MATRIX_MODES:
+        train, valid = build_matrices(mode, matrix_batches(X_train, y_train, 4_000),
+                                      matrix_batches(X_val, y_val, 4_000), str(tmp_path))
+        stats = RoundStats()
+        booster = xgb.train(PARAMS, train, num_boost_round=3, evals=[(valid, 'validation')],
+                            verbose_eval=False, callbacks=[stats])
+        assert [r['round'] for r in stats.rounds] == [0, 1, 2]
+        predictions[mode] = booster.predict(valid)
+
+    np.testing.assert_array_equal(predictions['quantile'], predictions['dmatrix'])
+    np.testing.assert_array_equal(predictions['external'], predictions['dmatrix'])
+
+
+def test_external_mode_needs_a_cache_dir():
+    X, y = sp.csr_matrix(np.eye(4)), np.arange(4.0)
+    with pytest.raises(ValueError):
+        build_matrices('external', matrix_batches(X, y), matrix_batches(X, y))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Memory-lean training matrices for the XGBoost pipelines.
+
+`xgb.DMatrix(X)` keeps a float copy of the whole sparse matrix and the hist
+tree method then sketches the feature quantiles from it. The other modes feed
+XGBoost batches of (X, y) through an iterator instead:
+
+    dmatrix   xgb.DMatrix on the whole matrix (previous behaviour)
+    quantile  QuantileDMatrix: quantiles are sketched batch by batch and only
+              the quantized (binned) matrix is kept in memory
+    external  ExtMemQuantileDMatrix: the quantized pages are written to a
+              cache directory and streamed from disk in every round, so the
+              training month does not have to fit in RAM
+
+The three modes give equivalent bins up to the quantile sketch approximation.
+The one-hot PU_DO columns only hold 0 and 1, so their bins are always the
+same; the cut points of trip_distance come from a sketch, built batch by batch
+in the quantile and external modes, and can differ slightly from the DMatrix
+ones when the column has more distinct values than max_bin, and with them the
+trees. test_xgb_training.py checks that the predictions are identical on a
+synthetic month.
+
+The validation matrix is always a plain DMatrix, stacked from its batches.
+Predicting on a quantized matrix with thousands of one-hot PU_DO columns is two
+orders of magnitude slower than on the CSR matrix, and the validation set is
+scored after every round. It does not depend on the training parameters,
+so repeated trials can build it once and reuse it.
+
+Batches come from an in-memory matrix (matrix_batches) or straight from a
+monthly parquet file (parquet_batches): rows are read in record batches,
+prepared with ingestion.prepare_trips and encoded with a ColumnarEncoder
+whose vocabulary was fitted in a first streaming pass (fit_parquet_encoder).
+
+RoundStats records the wall time, peak RSS and validation metric of every
+boosting round.
+
+Usage:
+    >>> train, valid = build_matrices('quantile', matrix_batches(X_train, y_train),
+    ...                               matrix_batches(X_val, y_val))
+    >>> stats = RoundStats()
+    >>> booster = xgb.train(params, train, evals=[(valid, 'validation')], callbacks=[stats])
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+import xgboost as xgb
+
+from columnar_encoder import ColumnarEncoder
+from ingestion import TRIP_COLUMNS, prepare_trips
+
+MATRIX_MODES = ('dmatrix', 'quantile', 'external')
+
+# Rows per batch handed to XGBoost (and read from parquet)
+DEFAULT_BATCH_ROWS = 500_000
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process in MB."""
+    try:
+        # Linux: VmHWM starts over in a new program, ru_maxrss keeps the
+        # parent's peak across fork + exec
+        with open('/proc/self/status') as f_in:
+            for line in f_in:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        # Windows: psutil exposes the peak working set
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024**2
+
+
+class BatchIter(xgb.DataIter):
+    """
+    XGBoost data iterator over a batch source.
+
+    Args:
+        batches: Callable returning a fresh iterator of (X, y) batches;
+            XGBoost calls reset() and iterates again for every pass
+        cache_prefix: Path prefix of the on-disk pages (external memory only)
+    """
+
+    def __init__(self, batches, cache_prefix=None):
+        self._batches = batches
+        self._iterator = None
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def next(self, input_data):
+        if self._iterator is None:
+            self._iterator = iter(self._batches())
+        batch = next(self._iterator, None)
+        if batch is None:
+            return False
+        X, y = batch
+        input_data(data=X, label=y)
+        return True
+
+    def reset(self):
+        self._iterator = None
+
+
+def matrix_batches(X, y, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Batch source over an in-memory CSR matrix and its labels.
+
+    Args:
+        X: CSR feature matrix
+        y: Labels
+        batch_rows: Rows per batch
+
+    Returns:
+        Callable returning an iterator of (X, y) row slices
+    """
+    def batches():
+        for start in range(0, X.shape[0], batch_rows):
+            yield X[start:start + batch_rows], y[start:start + batch_rows]
+    return batches
+
+
+def _trip_batches(path, batch_rows):
+    """Prepared trips of a parquet month, one record batch at a time."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=TRIP_COLUMNS):
+        df = prepare_trips(batch.to_pandas())
+        if len(df):
+            yield df
+
+
+def fit_parquet_encoder(path, categorical=('PU_DO',), numerical=('trip_distance',),
+                        batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Fit a ColumnarEncoder on a parquet month without loading it at once.
+
+    Args:
+        path: Local parquet file of a month
+        categorical: Categorical columns
+        numerical: Numerical columns
+        batch_rows: Rows read per batch
+
+    Returns:
+        Fitted ColumnarEncoder, same vocabulary as fit() on the whole month
+    """
+    encoder = ColumnarEncoder(categorical, numerical)
+    encoder.feature_names_ = []
+    for df in _trip_batches(path, batch_rows):
+        encoder.partial_fit(df)
+    return encoder
+
+
+def parquet_batches(path, encoder, target='duration', batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Batch source reading, preparing and encoding a parquet month on every pass.
+
+    Args:
+        path: Local parquet file of a month
+        encoder: Fitted ColumnarEncoder
+        target: Label column
+        batch_rows: Rows read per batch
+
+    Returns:
+        Callable returning an iterator of (X, y) batches
+    """
+    def batches():
+        for df in _trip_batches(path, batch_rows):
+            yield encoder.transform(df), df[target].to_numpy()
+    return batches
+
+
+def _stacked_dmatrix(batches):
+    """DMatrix holding every batch of a source at once."""
+    Xs, ys = zip(*batches())
+    return xgb.DMatrix(sp.vstack(Xs, format='csr'), label=np.concatenate(ys))
+
+
+def build_matrices(mode, train_batches, valid_batches, cache_dir=None, max_bin=256):
+    """
+    Training and validation matrices for a matrix mode.
+
+    Args:
+        mode: One of MATRIX_MODES
+        train_batches: Batch source of the training data
+        valid_batches: Batch source of the validation data
+        cache_dir: Directory for the external memory pages (mode 'external')
+        max_bin: Bins per feature; training must use the same value
+
+    Returns:
+        Tuple of (train, valid) matrices; valid is a DMatrix in every mode
+    """
+    if mode == 'dmatrix':
+        train = _stacked_dmatrix(train_batches)
+    elif mode == 'quantile':
+        train = xgb.QuantileDMatrix(BatchIter(train_batches), max_bin=max_bin)
+    elif mode == 'external':
+        if cache_dir is None:
+            raise ValueError("Mode 'external' needs a cache_dir for the on-disk pages")
+        train = xgb.ExtMemQuantileDMatrix(
+            BatchIter(train_batches, cache_prefix=os.path.join(cache_dir, 'train')), max_bin=max_bin)
+    else:
+        raise ValueError(f"Unknown matrix mode {mode!r}, expected one of {MATRIX_MODES}")
+    return train, _stacked_dmatrix(valid_batches)
+
+
+class RoundStats(xgb.callback.TrainingCallback):
+    """
+    Training callback recording wall time, peak RSS and the last evaluation metric per round.
+
+    Attributes:
+        rounds: One dict per round with round, seconds, peak_rss_mb and metric
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.rounds = []
+        self._start = None
+
+    def before_iteration(self, model, epoch, evals_log):
+        self._start = time.perf_counter()
+        return False
+
+    def after_iteration(self, model, epoch, evals_log):
+        metric = None
+        for metrics in evals_log.values():
+            for values in metrics.values():
+                metric = float(values[-1])
+        self.rounds.append({
+            'round': epoch,
+            'seconds': time.perf_counter() - self._start,
+            'peak_rss_mb': peak_rss_mb(),
+            'metric': metric
+        })
+        return False
+
+    def table(self):
+        """Rows for a Prefect table artifact (one column per field)."""
+        return [{'round': r['round'], 'seconds': round(r['seconds'], 4),
+                 'peak_rss_mb': round(r['peak_rss_mb'], 1), 'metric': r['metric']}
+                for r in self.rounds]
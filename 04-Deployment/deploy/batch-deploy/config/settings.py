@@ -6,11 +6,15 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_INPUT_DIR = PROJECT_ROOT / "data" / "input"
 DATA_OUTPUT_DIR = PROJECT_ROOT / "data" / "output"
-MODEL_PATH = PROJECT_ROOT / "lin_reg.bin"
+MANIFEST_PATH = DATA_OUTPUT_DIR / "manifest.json"  # Archivos ya procesados (backlog)
+MODEL_PATH = PROJECT_ROOT / "lin_reg.bin"  # Pickle (dv, model) o artefacto de model_artifact.py
 
 # ⚙️ Configuración básica
 NUM_TRIPS = 1000  # Número de viajes a generar
 MAX_WORKERS = 2   # Número de workers para procesamiento paralelo
+USE_COMPILED_MODEL = True  # Predecir con el modelo compilado (sin DictVectorizer)
+VECTORIZED_FEATURES = True  # Features columnares en vez de iterrows + dicts
+STREAMING_CHUNK_SIZE = 100_000  # Filas por chunk en el modo streaming
 
 # 🕐 Scheduling (para Prefect)
 BATCH_SCHEDULE = "0 */2 * * *"  # Cada 2 horas
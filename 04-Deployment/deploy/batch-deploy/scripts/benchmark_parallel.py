@@ -0,0 +1,97 @@
+"""Benchmark de escalado del procesamiento batch en paralelo
+
+Genera un parquet con varios row groups, lo procesa en modo streaming
+(secuencial) y con el pool de procesos para 1..N workers, verifica que
+todas las salidas son idénticas y muestra filas/segundo y speedup.
+
+Uso:
+    python scripts/benchmark_parallel.py --trips 5000000 --max-workers 4
+    python scripts/benchmark_parallel.py --sklearn   # camino sklearn en vez del compilado
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config.settings as settings
+from src.data_generator import generate_taxi_data
+from src.batch_predictor import load_scoring_model, process_batch_file_streaming
+from src.parallel_predictor import process_batch_file_parallel
+
+def timed_quiet(func, *args, **kwargs):
+    """Ejecuta func sin su salida por consola y devuelve (resultado, segundos)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run_benchmark(num_trips, row_group_size, max_workers, compiled):
+    """Mide el modo secuencial y el paralelo con 1..max_workers procesos"""
+    timestamp = datetime.now()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_file = tmp / "benchmark_input.parquet"
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = generate_taxi_data(num_trips)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), input_file,
+                       row_group_size=row_group_size)
+        del df
+
+        # Calentamiento: importar sklearn, leer y compilar el modelo no se mide.
+        # Los workers creados con fork heredan el modelo ya cargado, así que sin
+        # esto solo el modo secuencial pagaría la carga
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_scoring_model(compiled)
+
+        reference, seconds = timed_quiet(
+            process_batch_file_streaming, input_file, chunk_size=row_group_size,
+            compiled=compiled, timestamp=timestamp, output_file=tmp / "sequential.parquet"
+        )
+        results.append(("secuencial", seconds))
+        expected = pd.read_parquet(reference)
+
+        for workers in range(1, max_workers + 1):
+            output, seconds = timed_quiet(
+                process_batch_file_parallel, input_file, max_workers=workers,
+                chunk_size=row_group_size, compiled=compiled, timestamp=timestamp,
+                output_file=tmp / f"parallel_{workers}.parquet"
+            )
+            if not pd.read_parquet(output).equals(expected):
+                raise RuntimeError(f"La salida con {workers} workers difiere de la secuencial")
+            results.append((f"{workers} workers", seconds))
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark de escalado por número de workers')
+    parser.add_argument('--trips', type=int, default=2_000_000, help='Viajes a generar')
+    parser.add_argument('--row-group-size', type=int, default=settings.STREAMING_CHUNK_SIZE,
+                        help='Filas por row group (y por tarea)')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or settings.MAX_WORKERS,
+                        help='Número máximo de workers a probar')
+    parser.add_argument('--sklearn', action='store_true',
+                        help='Usar el camino sklearn en vez del modelo compilado')
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmark: {args.trips} viajes, row groups de {args.row_group_size} filas, "
+          f"modelo {'sklearn' if args.sklearn else 'compilado'}, {os.cpu_count()} CPUs")
+    results = run_benchmark(args.trips, args.row_group_size, args.max_workers, not args.sklearn)
+
+    baseline = results[0][1]
+    print("✅ Todas las salidas son idénticas")
+    print(f"{'modo':<12} {'segundos':>9} {'filas/seg':>12} {'speedup':>8}")
+    for label, seconds in results:
+        print(f"{label:<12} {seconds:>9.2f} {args.trips / seconds:>12.0f} {baseline / seconds:>7.2f}x")
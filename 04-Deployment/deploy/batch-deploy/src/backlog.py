@@ -0,0 +1,163 @@
+"""Procesamiento del backlog: todos los archivos pendientes de DATA_INPUT_DIR
+
+Un manifest JSON registra cada archivo procesado (ruta, tamaño, mtime y
+checksum). En cada ejecución solo se predicen los archivos nuevos o que
+cambiaron, así que re-ejecutar cuesta O(datos nuevos) y no O(todos los datos).
+"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config.settings as settings
+from src.batch_predictor import peak_rss_mb
+from src.parallel_predictor import init_worker, score_file_task
+
+def file_checksum(path, block_size=1024 * 1024):
+    """SHA-256 del archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path=None):
+    """Carga el manifest de archivos procesados ({ruta: entrada})"""
+    manifest_path = Path(manifest_path or settings.MANIFEST_PATH)
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_path=None):
+    """Guarda el manifest de forma atómica (archivo temporal + rename)"""
+    manifest_path = Path(manifest_path or settings.MANIFEST_PATH)
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def find_pending_files(input_files, manifest):
+    """Separa los archivos pendientes de los ya procesados
+
+    Si tamaño y mtime coinciden con el manifest el archivo se salta sin
+    leerlo. Si cambiaron, se calcula el checksum: con el mismo contenido
+    (p. ej. un `touch`) solo se actualiza la entrada, sin re-procesar.
+
+    Returns:
+        (pendientes, saltados): lista de (ruta, entrada nueva) y lista de rutas
+    """
+    pending = []
+    skipped = []
+    for path in sorted(input_files):
+        path = Path(path).resolve()
+        stat = path.stat()
+        entry = {'path': str(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+        previous = manifest.get(str(path))
+
+        if previous and previous['size'] == entry['size'] and previous['mtime'] == entry['mtime']:
+            skipped.append(path)
+            continue
+
+        entry['checksum'] = file_checksum(path)
+        if previous and previous['checksum'] == entry['checksum']:
+            manifest[str(path)] = {**previous, 'mtime': entry['mtime']}
+            skipped.append(path)
+            continue
+
+        pending.append((path, entry))
+    return pending, skipped
+
+def backlog_output_path(input_file):
+    """Archivo de predicciones de un input: uno por archivo, sin colisiones"""
+    return settings.DATA_OUTPUT_DIR / f"predictions_{Path(input_file).stem}.parquet"
+
+def drain_backlog(input_dir=None, max_workers=None, compiled=None, manifest_path=None):
+    """Predice todos los archivos nuevos o modificados del directorio de input
+
+    Los archivos se reparten entre max_workers procesos (cada uno carga el
+    modelo una vez). El manifest se actualiza al terminar cada archivo, así
+    que si la ejecución se interrumpe lo ya procesado no se repite.
+
+    Args:
+        input_dir: Directorio de input (por defecto settings.DATA_INPUT_DIR)
+        max_workers: Procesos del pool (por defecto settings.MAX_WORKERS)
+        compiled: Usar el modelo compilado (por defecto settings.USE_COMPILED_MODEL)
+        manifest_path: Manifest a usar (por defecto settings.MANIFEST_PATH)
+
+    Returns:
+        dict con los archivos procesados, saltados y fallidos
+    """
+    input_dir = Path(input_dir or settings.DATA_INPUT_DIR)
+    if max_workers is None:
+        max_workers = settings.MAX_WORKERS
+    if compiled is None:
+        compiled = settings.USE_COMPILED_MODEL
+
+    start_time = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    input_files = list(input_dir.glob("*.parquet"))
+    pending, skipped = find_pending_files(input_files, manifest)
+
+    print(f"📂 Backlog: {len(input_files)} archivos, {len(pending)} pendientes, "
+          f"{len(skipped)} ya procesados")
+
+    processed = []
+    failed = []
+    if pending:
+        timestamp = datetime.now()
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(pending)),
+            initializer=init_worker,
+            initargs=(compiled,)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    score_file_task, str(path), timestamp, str(backlog_output_path(path))
+                ): (path, entry)
+                for path, entry in pending
+            }
+            for future in as_completed(futures):
+                path, entry = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"❌ Error procesando {path.name}: {e}")
+                    failed.append(path)
+                    continue
+
+                manifest[str(path)] = {
+                    **entry,
+                    'rows': rows,
+                    'output_file': str(backlog_output_path(path)),
+                    'processed_at': datetime.now().isoformat()
+                }
+                save_manifest(manifest, manifest_path)
+                processed.append(path)
+                print(f"✅ {path.name}: {rows} predicciones")
+
+    # Incluye entradas actualizadas sin re-procesar (mismo contenido, otro mtime)
+    save_manifest(manifest, manifest_path)
+
+    processing_time = time.perf_counter() - start_time
+    print("📋 Resumen backlog:")
+    print(f"   Procesados: {len(processed)}, saltados: {len(skipped)}, fallidos: {len(failed)}")
+    print(f"   Tiempo: {processing_time:.2f} segundos")
+    print(f"🧠 Memoria pico (RSS): {peak_rss_mb():.0f} MB")
+
+    return {
+        'processed': [str(p) for p in processed],
+        'skipped': [str(p) for p in skipped],
+        'failed': [str(p) for p in failed]
+    }
+
+# Función principal para ejecutar directamente
+if __name__ == "__main__":
+    result = drain_backlog()
+    print(f"🎉 Backlog procesado: {len(result['processed'])} archivos nuevos")
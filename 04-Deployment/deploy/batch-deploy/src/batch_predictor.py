@@ -1,55 +1,209 @@
 """Predictor simple para batch processing"""
 
-import pickle
+import time
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import scipy.sparse as sp
 from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config.settings as settings
+from src.compiled_model import CompiledLinearModel
+from src.model_artifact import is_artifact, read_artifact, to_sklearn
+from src.model_registry import load_pickle, registry
+
+def peak_rss_mb():
+    """Memoria residente máxima (peak RSS) del proceso en MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS reporta bytes
+        return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        # Windows: psutil expone el pico del working set
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024**2
+
+def _sklearn_loader(path):
+    """Loader del registro: (dv, model) desde el pickle o desde un artefacto"""
+    if is_artifact(path):
+        return to_sklearn(read_artifact(path))
+    return load_pickle(path)
 
 def load_model():
-    """Carga el modelo ML"""
-    print("🤖 Cargando modelo...")
+    """Carga el modelo ML
+    
+    Usa el registro de modelos del proceso: el pickle solo se vuelve a leer
+    si el archivo cambió (mtime/tamaño y checksum).
+    """
+    loads = registry.loads
     try:
-        with open(settings.MODEL_PATH, 'rb') as f:
-            dv, model = pickle.load(f)
-        print("✅ Modelo cargado correctamente")
-        return dv, model
+        dv, model = registry.get(settings.MODEL_PATH, _sklearn_loader)
     except FileNotFoundError:
         print(f"❌ No se encontró el modelo en: {settings.MODEL_PATH}")
         raise
+    if registry.loads > loads:
+        print("🤖 Modelo cargado correctamente")
+    else:
+        print("♻️ Modelo reutilizado de la caché del proceso")
+    return dv, model
 
-def prepare_features(df):
-    """Prepara las features para predicción"""
-    print(f"🔧 Preparando features para {len(df)} viajes...")
+def _compile_loader(path):
+    """Loader del registro: compila el (dv, model) en caché del mismo archivo
     
-    # Crear feature PU_DO (igual que en web service)
-    features = []
-    for _, row in df.iterrows():
-        feature = {
-            'PU_DO': f"{row['PULocationID']}_{row['DOLocationID']}",
-            'trip_distance': row['trip_distance']
-        }
-        features.append(feature)
+    Un artefacto (model_artifact.py) se compila directamente desde sus
+    arrays, sin pickle ni sklearn.
+    """
+    if is_artifact(path):
+        scorer = CompiledLinearModel.from_artifact(read_artifact(path))
+    else:
+        dv, model = registry.get(path, _sklearn_loader)
+        scorer = CompiledLinearModel.from_sklearn(dv, model)
+    print(f"⚙️ Modelo compilado: tabla PU_DO {scorer.pu_do_weights.shape}")
+    return scorer
+
+def load_compiled_model():
+    """Devuelve el modelo compilado a arrays de NumPy (cacheado por proceso)"""
+    try:
+        return registry.get(settings.MODEL_PATH, _compile_loader)
+    except FileNotFoundError:
+        print(f"❌ No se encontró el modelo en: {settings.MODEL_PATH}")
+        raise
+
+def load_scoring_model(compiled):
+    """Carga solo el modelo que se va a usar: (dv, model, scorer) para score_table
+    
+    Con el modelo compilado no se carga el (dv, model) de sklearn: un
+    artefacto se predice sin importar sklearn.
+    """
+    if compiled:
+        return None, None, load_compiled_model()
+    dv, model = load_model()
+    return dv, model, None
+
+def prepare_features(df, vectorized=None):
+    """Prepara las features para predicción
+    
+    Args:
+        df: DataFrame con PULocationID, DOLocationID y trip_distance
+        vectorized: True para el camino columnar (DataFrame con PU_DO y
+            trip_distance), False para la lista de dicts con iterrows.
+            Por defecto settings.VECTORIZED_FEATURES
+    """
+    if vectorized is None:
+        vectorized = settings.VECTORIZED_FEATURES
+    
+    mode = "columnar" if vectorized else "dicts"
+    print(f"🔧 Preparando features para {len(df)} viajes ({mode})...")
+    start_time = time.perf_counter()
+    
+    if vectorized:
+        # Crear feature PU_DO con operaciones de columnas, sin un dict por fila
+        features = pd.DataFrame({
+            'PU_DO': df['PULocationID'].astype(str) + '_' + df['DOLocationID'].astype(str),
+            'trip_distance': df['trip_distance']
+        })
+    else:
+        # Crear feature PU_DO (igual que en web service)
+        # iterrows convierte la fila a float: sin int() la clave sería '161.0_236.0'
+        features = []
+        for _, row in df.iterrows():
+            feature = {
+                'PU_DO': f"{int(row['PULocationID'])}_{int(row['DOLocationID'])}",
+                'trip_distance': row['trip_distance']
+            }
+            features.append(feature)
     
-    print("✅ Features preparadas")
+    prep_time = max(time.perf_counter() - start_time, 1e-9)
+    print(f"✅ Features preparadas en {prep_time:.2f} segundos ({len(df)/prep_time:.0f} filas/segundo)")
     return features
 
+def transform_columnar(features, dv):
+    """Construye la matriz CSR directamente desde las columnas
+    
+    Equivale a dv.transform(features.to_dict(orient='records')): cada fila
+    tiene la columna de su PU_DO (si existe en el vocabulario) seguida de
+    las columnas numéricas, en el mismo orden que los dicts.
+    """
+    vocab = dv.vocabulary_
+    numeric = [name for name in features.columns if name != 'PU_DO']
+    n_rows = len(features)
+    
+    # Columna de PU_DO en el vocabulario (-1 si no se vio en entrenamiento)
+    pu_do_cols = (
+        ('PU_DO' + dv.separator + features['PU_DO'])
+        .map(vocab)
+        .fillna(-1)
+        .to_numpy(dtype=np.int64)
+    )
+    known = pu_do_cols >= 0
+    
+    row_nnz = known.astype(np.int64) + len(numeric)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(row_nnz, out=indptr[1:])
+    
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    data = np.empty(indptr[-1], dtype=dv.dtype)
+    
+    # Posición de cada valor dentro de su fila: PU_DO primero, luego numéricas
+    starts = indptr[:-1]
+    indices[starts[known]] = pu_do_cols[known]
+    data[starts[known]] = 1
+    offset = starts + known
+    for k, name in enumerate(numeric):
+        indices[offset + k] = vocab[name]
+        data[offset + k] = features[name].to_numpy(dtype=dv.dtype)
+    
+    return sp.csr_matrix((data, indices, indptr), shape=(n_rows, len(vocab)))
+
 def make_predictions(features, dv, model):
-    """Hace predicciones en lote"""
-    print(f"🎯 Haciendo {len(features)} predicciones...")
+    """Hace predicciones en lote
+    
+    Acepta la lista de dicts o el DataFrame columnar de prepare_features().
+    """
+    columnar = isinstance(features, pd.DataFrame)
+    mode = "columnar" if columnar else "dicts"
+    print(f"🎯 Haciendo {len(features)} predicciones ({mode})...")
     
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     
     # Transformar features y predecir
-    X = dv.transform(features)
-    predictions = model.predict(X)
+    if columnar:
+        X = transform_columnar(features, dv)
+    else:
+        X = dv.transform(features)
+    transform_time = max(time.perf_counter() - start_time, 1e-9)
     
-    end_time = datetime.now()
-    processing_time = (end_time - start_time).total_seconds()
+    predictions = model.predict(X)
+    processing_time = max(time.perf_counter() - start_time, 1e-9)
     
     print(f"✅ Predicciones completadas en {processing_time:.2f} segundos")
+    print(f"🔧 Transformación ({mode}): {len(predictions)/transform_time:.0f} filas/segundo")
+    print(f"⚡ Velocidad: {len(predictions)/processing_time:.0f} predicciones/segundo")
+    
+    return predictions
+
+def make_predictions_compiled(df, scorer):
+    """Hace predicciones en lote con el modelo compilado (mismo resultado que sklearn)"""
+    print(f"🎯 Haciendo {len(df)} predicciones (modelo compilado)...")
+    
+    start_time = time.perf_counter()
+    
+    # Gather de coeficientes PU_DO + multiplicación por las features numéricas
+    numeric = {name: df[name].to_numpy() for name in scorer.numeric_features}
+    predictions = scorer.predict(
+        df['PULocationID'].to_numpy(),
+        df['DOLocationID'].to_numpy(),
+        **numeric
+    )
+    
+    processing_time = max(time.perf_counter() - start_time, 1e-9)
+    
+    print(f"✅ Predicciones completadas en {processing_time:.4f} segundos")
     print(f"⚡ Velocidad: {len(predictions)/processing_time:.0f} predicciones/segundo")
     
     return predictions
@@ -79,30 +233,187 @@ def save_predictions(df, predictions, timestamp=None):
     
     return filepath
 
-def process_batch_file(input_file):
-    """Procesa un archivo de batch completo"""
+def process_batch_file(input_file, compiled=None, vectorized=None):
+    """Procesa un archivo de batch completo
+    
+    Args:
+        input_file: Archivo parquet con los viajes
+        compiled: Usar el modelo compilado (por defecto settings.USE_COMPILED_MODEL)
+        vectorized: Features columnares en el camino sklearn
+            (por defecto settings.VECTORIZED_FEATURES)
+    """
+    if compiled is None:
+        compiled = settings.USE_COMPILED_MODEL
+    
     print(f"📂 Procesando archivo: {input_file}")
     
     # 1. Cargar modelo
-    dv, model = load_model()
+    dv, model, scorer = load_scoring_model(compiled)
     
     # 2. Leer datos
     df = pd.read_parquet(input_file)
     print(f"📊 Cargados {len(df)} viajes")
     
-    # 3. Preparar features
-    features = prepare_features(df)
-    
-    # 4. Hacer predicciones
-    predictions = make_predictions(features, dv, model)
+    if compiled:
+        # 3-4. Predecir directamente desde las columnas
+        predictions = make_predictions_compiled(df, scorer)
+    else:
+        # 3. Preparar features
+        features = prepare_features(df, vectorized=vectorized)
+        
+        # 4. Hacer predicciones
+        predictions = make_predictions(features, dv, model)
     
     # 5. Guardar resultados
     output_file = save_predictions(df, predictions)
+    print(f"🧠 Memoria pico (RSS): {peak_rss_mb():.0f} MB")
     
     return output_file
 
+def predict_chunk(df, dv, model, scorer=None):
+    """Predice un chunk sin imprimir nada (para el modo streaming)"""
+    if len(df) == 0:
+        # sklearn no acepta matrices sin filas
+        return np.empty(0, dtype=np.float64)
+    if scorer is not None:
+        numeric = {name: df[name].to_numpy() for name in scorer.numeric_features}
+        return scorer.predict(df['PULocationID'].to_numpy(), df['DOLocationID'].to_numpy(), **numeric)
+    
+    features = pd.DataFrame({
+        'PU_DO': df['PULocationID'].astype(str) + '_' + df['DOLocationID'].astype(str),
+        'trip_distance': df['trip_distance']
+    })
+    return model.predict(transform_columnar(features, dv))
+
+def add_predictions(chunk, predictions, timestamp):
+    """Agrega las predicciones a un chunk y devuelve (tabla Arrow, predicciones)"""
+    # Se agregan columnas al chunk directamente, sin df.copy()
+    chunk['predicted_duration_minutes'] = predictions
+    chunk['prediction_timestamp'] = timestamp
+    return pa.Table.from_pandas(chunk, preserve_index=False), predictions
+
+def score_table(table, dv, model, scorer, timestamp):
+    """Predice un bloque de Arrow y devuelve (tabla con predicciones, predicciones)"""
+    chunk = table.to_pandas()
+    return add_predictions(chunk, predict_chunk(chunk, dv, model, scorer), timestamp)
+
+def output_path(timestamp):
+    """Ruta del archivo de predicciones para un timestamp"""
+    filename = f"predictions_{timestamp.strftime('%Y%m%d_%H%M%S')}.parquet"
+    return settings.DATA_OUTPUT_DIR / filename
+
+def write_scored_chunks(scored_chunks, filepath):
+    """Escribe chunks ya predichos a un parquet y acumula estadísticas
+    
+    Args:
+        scored_chunks: Iterable de (tabla Arrow, predicciones) en orden
+        filepath: Archivo de salida
+    
+    Returns:
+        dict con filas, chunks y promedio/mín/máx de las predicciones
+    """
+    writer = None
+    stats = {'rows': 0, 'chunks': 0, 'total': 0.0, 'min': np.inf, 'max': -np.inf}
+    try:
+        for table, predictions in scored_chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(filepath, table.schema)
+            writer.write_table(table)
+            
+            stats['rows'] += len(predictions)
+            stats['chunks'] += 1
+            if len(predictions):
+                stats['total'] += predictions.sum()
+                stats['min'] = min(stats['min'], predictions.min())
+                stats['max'] = max(stats['max'], predictions.max())
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats
+
+def print_run_summary(title, filepath, stats, processing_time):
+    """Imprime el resumen de una ejecución por chunks"""
+    n_rows = stats['rows']
+    print(f"💾 Predicciones guardadas en: {filepath}")
+    print(f"📋 {title}:")
+    print(f"   Viajes: {n_rows} en {stats['chunks']} chunks")
+    print(f"   Tiempo: {processing_time:.2f} segundos ({n_rows/processing_time:.0f} filas/segundo)")
+    if n_rows:
+        print(f"   Duración promedio: {stats['total'] / n_rows:.1f} minutos "
+              f"(mín {stats['min']:.1f}, máx {stats['max']:.1f})")
+    print(f"🧠 Memoria pico (RSS): {peak_rss_mb():.0f} MB")
+
+def empty_batch(parquet_file):
+    """Record batch vacío con el esquema del archivo (para archivos sin filas)"""
+    schema = parquet_file.schema_arrow
+    return pa.RecordBatch.from_arrays([pa.array([], type=f.type) for f in schema], schema=schema)
+
+def process_batch_file_streaming(input_file, chunk_size=None, compiled=None, timestamp=None,
+                                 output_file=None):
+    """Procesa un archivo de batch por chunks, sin cargarlo entero en memoria
+    
+    Lee el parquet en record batches de chunk_size filas, predice cada chunk
+    y lo agrega al archivo de salida con un ParquetWriter. La memoria pico
+    depende del tamaño del chunk, no del tamaño del archivo.
+    
+    Args:
+        input_file: Archivo parquet con los viajes
+        chunk_size: Filas por chunk (por defecto settings.STREAMING_CHUNK_SIZE)
+        compiled: Usar el modelo compilado (por defecto settings.USE_COMPILED_MODEL)
+        timestamp: Timestamp de la predicción (por defecto ahora)
+        output_file: Archivo de salida (por defecto predictions_<timestamp>.parquet)
+    """
+    if chunk_size is None:
+        chunk_size = settings.STREAMING_CHUNK_SIZE
+    if compiled is None:
+        compiled = settings.USE_COMPILED_MODEL
+    if timestamp is None:
+        timestamp = datetime.now()
+    
+    print(f"📂 Procesando archivo en streaming: {input_file} (chunks de {chunk_size} filas)")
+    start_time = time.perf_counter()
+    
+    # 1. Cargar modelo
+    dv, model, scorer = load_scoring_model(compiled)
+    
+    # 2. Leer, predecir y escribir chunk por chunk
+    parquet_file = pq.ParquetFile(input_file)
+    filepath = output_file or output_path(timestamp)
+    
+    if parquet_file.metadata.num_rows == 0:
+        # Archivo vacío: un chunk vacío para escribir igualmente el esquema
+        batches = [empty_batch(parquet_file)]
+    else:
+        batches = parquet_file.iter_batches(batch_size=chunk_size)
+    
+    scored = (score_table(batch, dv, model, scorer, timestamp) for batch in batches)
+    stats = write_scored_chunks(scored, filepath)
+    
+    processing_time = max(time.perf_counter() - start_time, 1e-9)
+    
+    # 3. Resumen
+    print_run_summary("Resumen streaming", filepath, stats, processing_time)
+    
+    return filepath
+
 # Función principal para ejecutar directamente
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Predicciones batch de duración de viajes')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Procesar el archivo por chunks (archivos más grandes que la memoria)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help=f'Filas por chunk en streaming (default: {settings.STREAMING_CHUNK_SIZE})')
+    parser.add_argument('--backlog', action='store_true',
+                        help='Procesar todos los archivos nuevos o modificados (ver src/backlog.py)')
+    args = parser.parse_args()
+    
+    if args.backlog:
+        from src.backlog import drain_backlog
+        drain_backlog()
+        sys.exit(0)
+    
     # Buscar archivos de input
     input_files = list(settings.DATA_INPUT_DIR.glob("*.parquet"))
     
@@ -112,5 +423,8 @@ if __name__ == "__main__":
     else:
         # Procesar el archivo más reciente
         latest_file = max(input_files, key=lambda x: x.stat().st_mtime)
-        output_file = process_batch_file(latest_file)
+        if args.streaming:
+            output_file = process_batch_file_streaming(latest_file, chunk_size=args.chunk_size)
+        else:
+            output_file = process_batch_file(latest_file)
         print(f"🎉 Proceso completado. Resultado: {output_file}")
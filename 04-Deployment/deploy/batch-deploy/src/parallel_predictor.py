@@ -0,0 +1,193 @@
+"""Predicciones batch en paralelo con un pool de procesos"""
+
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow.parquet as pq
+
+import config.settings as settings
+from src.batch_predictor import (
+    load_scoring_model,
+    predict_chunk,
+    add_predictions,
+    score_table,
+    output_path,
+    write_scored_chunks,
+    print_run_summary,
+    empty_batch,
+)
+
+# Modelo del proceso worker: se carga una sola vez en el initializer del pool
+_worker_model = {}
+
+# Tareas enviadas al pool y todavía no escritas, por worker: acota la memoria
+# del proceso principal sin dejar a los workers sin trabajo
+TASKS_IN_FLIGHT_PER_WORKER = 2
+
+def init_worker(compiled):
+    """Initializer del pool: carga (y compila) el modelo una vez por proceso"""
+    dv, model, scorer = load_scoring_model(compiled)
+    _worker_model['dv'] = dv
+    _worker_model['model'] = model
+    _worker_model['scorer'] = scorer
+
+def _predict_row_groups(input_file, row_groups):
+    """Tarea del worker: lee y predice un grupo de row groups del parquet
+
+    Devuelve solo el array de predicciones (8 bytes por fila): la tabla
+    completa no vuelve al proceso principal por IPC.
+    """
+    parquet_file = pq.ParquetFile(input_file)
+    chunk = parquet_file.read_row_groups(row_groups).to_pandas()
+    return predict_chunk(
+        chunk,
+        _worker_model['dv'],
+        _worker_model['model'],
+        _worker_model['scorer']
+    )
+
+def _scored_in_order(executor, parquet_file, input_file, tasks, timestamp, max_in_flight):
+    """Envía las tareas al pool con como máximo max_in_flight pendientes
+
+    Devuelve (tabla con predicciones, predicciones) en el orden de las
+    tareas: el proceso principal vuelve a leer los row groups de cada tarea
+    y les agrega las predicciones del worker.
+    """
+    tasks = iter(tasks)
+    pending = deque()
+
+    def submit_next():
+        row_groups = next(tasks, None)
+        if row_groups is not None:
+            pending.append((row_groups, executor.submit(_predict_row_groups, input_file, row_groups)))
+
+    for _ in range(max_in_flight):
+        submit_next()
+    while pending:
+        row_groups, future = pending.popleft()
+        predictions = future.result()
+        # Se envía la siguiente tarea antes de escribir, para que los workers sigan ocupados
+        submit_next()
+        chunk = parquet_file.read_row_groups(row_groups).to_pandas()
+        yield add_predictions(chunk, predictions, timestamp)
+
+def score_file_task(input_file, timestamp, output_file):
+    """Tarea del worker: predice un archivo completo por chunks y devuelve las filas"""
+    parquet_file = pq.ParquetFile(input_file)
+    if parquet_file.metadata.num_rows == 0:
+        batches = [empty_batch(parquet_file)]
+    else:
+        batches = parquet_file.iter_batches(batch_size=settings.STREAMING_CHUNK_SIZE)
+
+    scored = (
+        score_table(
+            batch,
+            _worker_model['dv'],
+            _worker_model['model'],
+            _worker_model['scorer'],
+            timestamp
+        )
+        for batch in batches
+    )
+    stats = write_scored_chunks(scored, output_file)
+    return stats['rows']
+
+def split_row_groups(parquet_file, chunk_size=None):
+    """Agrupa row groups consecutivos en tareas de ~chunk_size filas
+
+    La unidad mínima de trabajo es un row group: un parquet con un solo
+    row group no se puede repartir entre workers.
+    """
+    if chunk_size is None:
+        chunk_size = settings.STREAMING_CHUNK_SIZE
+
+    tasks = []
+    current = []
+    rows = 0
+    for i in range(parquet_file.num_row_groups):
+        current.append(i)
+        rows += parquet_file.metadata.row_group(i).num_rows
+        if rows >= chunk_size:
+            tasks.append(current)
+            current = []
+            rows = 0
+    if current:
+        tasks.append(current)
+    return tasks
+
+def process_batch_file_parallel(input_file, max_workers=None, chunk_size=None, compiled=None,
+                                timestamp=None, output_file=None):
+    """Procesa un archivo de batch repartiendo sus row groups entre procesos
+
+    Cada worker carga el modelo una sola vez (initializer del pool) y predice
+    tareas de row groups; el proceso principal escribe los resultados en el
+    orden original, así que la salida es idéntica a la del modo streaming.
+    Los workers devuelven solo las predicciones y nunca hay más de
+    TASKS_IN_FLIGHT_PER_WORKER * max_workers tareas pendientes, así que la
+    memoria no crece con el tamaño del archivo.
+
+    Args:
+        input_file: Archivo parquet con los viajes
+        max_workers: Procesos del pool (por defecto settings.MAX_WORKERS)
+        chunk_size: Filas aproximadas por tarea (por defecto settings.STREAMING_CHUNK_SIZE)
+        compiled: Usar el modelo compilado (por defecto settings.USE_COMPILED_MODEL)
+        timestamp: Timestamp de la predicción (por defecto ahora)
+        output_file: Archivo de salida (por defecto predictions_<timestamp>.parquet)
+    """
+    if max_workers is None:
+        max_workers = settings.MAX_WORKERS
+    if compiled is None:
+        compiled = settings.USE_COMPILED_MODEL
+    if timestamp is None:
+        timestamp = datetime.now()
+
+    parquet_file = pq.ParquetFile(input_file)
+    tasks = split_row_groups(parquet_file, chunk_size)
+    filepath = output_file or output_path(timestamp)
+
+    print(f"📂 Procesando archivo en paralelo: {input_file} "
+          f"({len(tasks)} tareas, {max_workers} workers)")
+    start_time = time.perf_counter()
+
+    if not tasks:
+        # Archivo vacío: no hace falta levantar el pool
+        dv, model, scorer = load_scoring_model(compiled)
+        scored = [score_table(empty_batch(parquet_file), dv, model, scorer, timestamp)]
+        stats = write_scored_chunks(scored, filepath)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(compiled,)
+        ) as executor:
+            scored = _scored_in_order(
+                executor,
+                parquet_file,
+                input_file,
+                tasks,
+                timestamp,
+                TASKS_IN_FLIGHT_PER_WORKER * max_workers
+            )
+            stats = write_scored_chunks(scored, filepath)
+
+    processing_time = max(time.perf_counter() - start_time, 1e-9)
+    print_run_summary(f"Resumen paralelo ({max_workers} workers)", filepath, stats, processing_time)
+
+    return filepath
+
+# Función principal para ejecutar directamente
+if __name__ == "__main__":
+    input_files = list(settings.DATA_INPUT_DIR.glob("*.parquet"))
+
+    if not input_files:
+        print("❌ No se encontraron archivos de input")
+        print("💡 Ejecuta primero: python src/data_generator.py")
+    else:
+        latest_file = max(input_files, key=lambda x: x.stat().st_mtime)
+        output_file = process_batch_file_parallel(latest_file)
+        print(f"🎉 Proceso completado. Resultado: {output_file}")
@@ -9,6 +9,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.data_generator import generate_taxi_data, save_batch_data
 from src.batch_predictor import process_batch_file
+from src.parallel_predictor import process_batch_file_parallel
+from src.backlog import drain_backlog
 
 
 @task(name="generar-datos")
@@ -28,20 +30,38 @@ def generar_datos_task():
 
 
 @task(name="procesar-predicciones")
-def procesar_predicciones_task(input_file):
+def procesar_predicciones_task(input_file, use_parallel=False):
     """Procesa las predicciones en lote"""
     logger = get_run_logger()
     logger.info(f"🎯 Procesando predicciones para: {input_file}")
     
-    # Procesar archivo
-    output_file = process_batch_file(input_file)
+    # Procesar archivo (en paralelo usa settings.MAX_WORKERS procesos)
+    if use_parallel:
+        output_file = process_batch_file_parallel(input_file)
+    else:
+        output_file = process_batch_file(input_file)
     
     logger.info(f"✅ Predicciones completadas: {output_file}")
     return output_file
 
 
+@task(name="drenar-backlog")
+def drenar_backlog_task():
+    """Procesa todos los archivos de input nuevos o modificados"""
+    logger = get_run_logger()
+    logger.info("📂 Procesando backlog de archivos pendientes...")
+    
+    result = drain_backlog()
+    
+    logger.info(f"✅ Backlog: {len(result['processed'])} procesados, "
+                f"{len(result['skipped'])} saltados, {len(result['failed'])} fallidos")
+    if result['failed']:
+        raise RuntimeError(f"Fallaron {len(result['failed'])} archivos: {result['failed']}")
+    return result
+
+
 @flow(name="batch-completo")
-def batch_completo_flow():
+def batch_completo_flow(use_parallel: bool = False):
     """Flow completo: genera datos y procesa predicciones"""
     logger = get_run_logger()
     logger.info("🚀 Iniciando flow completo de batch prediction")
@@ -51,7 +71,7 @@ def batch_completo_flow():
         input_file = generar_datos_task()
         
         # Paso 2: Procesar predicciones
-        output_file = procesar_predicciones_task(input_file)
+        output_file = procesar_predicciones_task(input_file, use_parallel=use_parallel)
         
         logger.info("🎉 Flow completado exitosamente!")
         logger.info(f"📂 Archivo de salida: {output_file}")
@@ -68,6 +88,22 @@ def batch_completo_flow():
         raise
 
 
+@flow(name="batch-backlog")
+def batch_backlog_flow():
+    """Flow de backlog: predice solo los archivos que aún no se procesaron"""
+    logger = get_run_logger()
+    logger.info("🚀 Iniciando flow de backlog")
+    
+    result = drenar_backlog_task()
+    
+    return {
+        'status': 'success',
+        'processed': result['processed'],
+        'skipped': len(result['skipped']),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
 if __name__ == "__main__":
     # Ejecutar el flow localmente
     print("🧪 Ejecutando flow de prueba...")
@@ -0,0 +1,204 @@
+"""NYC Taxi Duration Prediction - Process-level Model Registry
+
+Caches loaded model artifacts per process so that callers asking for the
+same file many times (one batch file after another, one Prefect task per
+file, web service startup) only unpickle it once.
+
+Entries are keyed by (resolved path, loader) and validated with the file's
+mtime and size on every lookup, which costs a single stat() call. When the
+stat signature changes the file is hashed: if the SHA-256 checksum is
+unchanged (e.g. the file was touched or copied over with the same bytes) the
+cached object is kept, otherwise the loader runs again.
+
+The file is stat()ed again after it is hashed and loaded: if it was replaced
+in between, the checksum and the object may come from different files, so
+they are discarded and the load is retried. The signature includes the inode,
+so a file swapped in with os.replace() is always seen as changed.
+
+This module is kept identical in web-service/, web-service-docker/ and
+batch-deploy/src/.
+
+Usage:
+    >>> from model_registry import get_model
+    >>> dv, model = get_model('lin_reg.bin')               # unpickles
+    >>> dv, model = get_model('lin_reg.bin')               # cached
+    >>> scorer = get_model('lin_reg.bin', load_compiled_model)
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+# Hash + load attempts when the file keeps changing while it is loaded
+LOAD_ATTEMPTS = 3
+
+
+def load_pickle(path):
+    """
+    Default loader: unpickle the file.
+
+    Args:
+        path (str): Path to the pickled artifact
+
+    Returns:
+        object: Unpickled object, e.g. the (dv, model) tuple in lin_reg.bin
+    """
+    with open(path, 'rb') as f_in:
+        return pickle.load(f_in)
+
+
+def file_checksum(path, block_size=1024 * 1024):
+    """
+    Compute the SHA-256 checksum of a file, reading it in blocks.
+
+    Args:
+        path (str): File to hash
+        block_size (int): Bytes read per iteration
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f_in:
+        for block in iter(lambda: f_in.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Thread-safe cache of loaded model artifacts for the current process.
+
+    Attributes:
+        hits (int): Lookups served from the cache
+        loads (int): Times a loader actually ran
+    """
+
+    def __init__(self):
+        self._entries = {}
+        # Reentrant: a loader may call get() for another artifact (e.g. the
+        # compiled scorer is built from the cached (dv, model) tuple)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def get(self, path, loader=load_pickle):
+        """
+        Return the loaded artifact, loading it only if the file changed.
+
+        Args:
+            path (str or Path): Model file
+            loader (callable): Function path -> object (default: unpickle)
+
+        Returns:
+            object: Cached or freshly loaded artifact
+
+        Raises:
+            FileNotFoundError: If the model file does not exist
+            RuntimeError: If the file changed during every load attempt
+        """
+        key = (os.path.realpath(path), loader)
+        signature = self._signature(path)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry['signature'] == signature:
+            self.hits += 1
+            return entry['value']
+
+        with self._lock:
+            # Another thread may have loaded it while we waited for the lock
+            entry = self._entries.get(key)
+            if entry is not None and entry['signature'] == signature:
+                self.hits += 1
+                return entry['value']
+
+            for _ in range(LOAD_ATTEMPTS):
+                checksum = file_checksum(path)
+                if entry is not None and entry['checksum'] == checksum:
+                    value = entry['value']
+                else:
+                    value = loader(path)
+                # Hash and object only belong together if the file did not change meanwhile
+                current = self._signature(path)
+                if current != signature:
+                    signature = current
+                    continue
+
+                if entry is not None and value is entry['value']:
+                    # Same bytes, new mtime: keep the loaded object
+                    entry['signature'] = signature
+                    self.hits += 1
+                    return value
+                self._entries[key] = {
+                    'value': value,
+                    'signature': signature,
+                    'checksum': checksum,
+                    'loaded_at': time.time()
+                }
+                self.loads += 1
+                return value
+            raise RuntimeError(f'{path} changed during each of {LOAD_ATTEMPTS} load attempts')
+
+    def info(self, path, loader=load_pickle):
+        """
+        Describe the cached entry for a model file.
+
+        Args:
+            path (str or Path): Model file
+            loader (callable): Loader used with get()
+
+        Returns:
+            dict or None: Checksum, mtime and load time, or None if not cached
+        """
+        entry = self._entries.get((os.path.realpath(path), loader))
+        if entry is None:
+            return None
+        return {
+            'path': os.path.realpath(path),
+            'checksum': entry['checksum'],
+            'mtime': entry['signature'][0] / 1e9,
+            'loaded_at': entry['loaded_at']
+        }
+
+    def clear(self):
+        """Drop every cached artifact."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Registry shared by everything running in this process
+registry = ModelRegistry()
+
+
+def get_model(path, loader=load_pickle):
+    """
+    Load a model file through the process-wide registry.
+
+    Args:
+        path (str or Path): Model file
+        loader (callable): Function path -> object (default: unpickle)
+
+    Returns:
+        object: Cached or freshly loaded artifact
+    """
+    return registry.get(path, loader)
+
+
+def _reset_lock_after_fork():
+    # The lock may have been held by another thread of the parent (e.g. a
+    # gunicorn master preloading the model): the child gets a fresh one
+    registry._lock = threading.RLock()
+
+
+if hasattr(os, 'register_at_fork'):   # POSIX only
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
@@ -1,10 +1,33 @@
-import pickle
+import os
 
 from flask import Flask, request, jsonify
 
-with open('lin_reg.bin', 'rb') as f_in:
-    """Carga el modelo"""
-    (dv, model) = pickle.load(f_in)
+from compiled_model import CompiledLinearModel
+from model_artifact import is_artifact, read_artifact, to_sklearn
+from model_registry import get_model, load_pickle
+
+# Pickle (dv, model) o el mismo modelo exportado con model_artifact.py
+MODEL_PATH = os.getenv('MODEL_PATH', 'lin_reg.bin')
+
+
+def load_sklearn(path):
+    """Loader del registro: (dv, model) desde el pickle o desde un artefacto."""
+    if is_artifact(path):
+        return to_sklearn(read_artifact(path))
+    return load_pickle(path)
+
+
+def load_compiled(path):
+    """Loader del registro: compila el modelo (un artefacto se compila sin sklearn)."""
+    if is_artifact(path):
+        return CompiledLinearModel.from_artifact(read_artifact(path))
+    dv, model = get_model(path, load_sklearn)
+    return CompiledLinearModel.from_sklearn(dv, model)
+
+
+# Modelo compilado a arrays de NumPy: mismo resultado sin DictVectorizer.
+# (dv, model) solo se carga si se llama a predict(), que importa sklearn
+scorer = get_model(MODEL_PATH, load_compiled)
 
 
 def prepare_features(ride):
@@ -31,6 +54,7 @@ def predict(features):
     Returns:
         float: La predicción de la duración de la carrera.
     """
+    dv, model = get_model(MODEL_PATH, load_sklearn)
     X = dv.transform(features)
     preds = model.predict(X)
     return float(preds[0])
@@ -44,8 +68,7 @@ def predict_endpoint():
     """Endpoint para la predicción de la duración de la carrera."""
     ride = request.get_json()
 
-    features = prepare_features(ride)
-    pred = predict(features)
+    pred = scorer.predict_ride(ride)
 
     result = {
         'duration': pred
@@ -0,0 +1,134 @@
+"""NYC Taxi Duration Prediction - Batch Throughput Benchmark
+
+Compares the throughput of N single calls to /predict against one call
+to /predict/batch with the same N trips.
+
+By default the benchmark runs in-process through Flask's test client, so it
+measures the service itself without network noise. Pass --url to benchmark
+a running server instead.
+
+Usage:
+    uv run python benchmark_batch.py --n 2000
+    uv run python benchmark_batch.py --n 2000 --url http://localhost:9696
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import logging
+import random
+import time
+
+
+def generate_rides(n, seed=42):
+    """
+    Generate random trips for the benchmark.
+
+    Args:
+        n (int): Number of trips to generate
+        seed (int): Random seed for reproducible payloads
+
+    Returns:
+        list: List of ride dicts accepted by /predict
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            'PULocationID': rng.randint(1, 263),
+            'DOLocationID': rng.randint(1, 263),
+            'trip_distance': round(rng.uniform(0.5, 20.0), 2)
+        }
+        for _ in range(n)
+    ]
+
+
+def make_client(url=None):
+    """
+    Build a `post(path, payload) -> (status, json)` function.
+
+    Args:
+        url (str): Base URL of a running service, or None to use the
+            in-process Flask test client
+
+    Returns:
+        callable: Function that posts a JSON payload to a path
+    """
+    if url is None:
+        from predict import app
+        client = app.test_client()
+
+        def post(path, payload):
+            response = client.post(path, json=payload)
+            return response.status_code, response.get_json()
+    else:
+        import requests
+        session = requests.Session()
+
+        def post(path, payload):
+            response = session.post(f'{url}{path}', json=payload, timeout=60)
+            return response.status_code, response.json()
+
+    return post
+
+
+def run_benchmark(n, url=None):
+    """
+    Time N single predictions against one batch prediction.
+
+    Args:
+        n (int): Number of trips
+        url (str): Base URL of a running service (optional)
+
+    Returns:
+        dict: Timings in seconds and throughput in rides/second
+    """
+    post = make_client(url)
+    rides = generate_rides(n)
+
+    # Warm up both endpoints
+    post('/predict', rides[0])
+    post('/predict/batch', rides[:10])
+
+    start = time.perf_counter()
+    single = [post('/predict', ride)[1]['duration'] for ride in rides]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, body = post('/predict/batch', rides)
+    batch_time = time.perf_counter() - start
+
+    if status != 200:
+        raise RuntimeError(f'Batch request failed with HTTP {status}: {body}')
+    batch = [item['duration'] for item in body['predictions']]
+
+    max_diff = max(abs(a - b) for a, b in zip(single, batch))
+    if max_diff > 1e-9:
+        raise RuntimeError(f'Batch and single predictions differ (max diff {max_diff})')
+
+    return {
+        'n': n,
+        'single_time': single_time,
+        'batch_time': batch_time,
+        'single_rps': n / single_time,
+        'batch_rps': n / batch_time,
+        'speedup': single_time / batch_time
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark /predict against /predict/batch')
+    parser.add_argument('--n', type=int, default=1000, help='Number of trips (default: 1000)')
+    parser.add_argument('--url', type=str, default=None,
+                        help='Base URL of a running service (default: in-process test client)')
+    args = parser.parse_args()
+
+    # Silence per-request logging of the service so it does not skew timings
+    logging.disable(logging.INFO)
+
+    result = run_benchmark(args.n, args.url)
+
+    print(f"🚕 Trips: {result['n']}")
+    print(f"   N x /predict:      {result['single_time']:.3f} s  ({result['single_rps']:,.0f} rides/s)")
+    print(f"   1 x /predict/batch: {result['batch_time']:.3f} s  ({result['batch_rps']:,.0f} rides/s)")
+    print(f"⚡ Speedup: {result['speedup']:.1f}x")
@@ -0,0 +1,153 @@
+"""NYC Taxi Duration Prediction - JSON and Validation Benchmark
+
+Compares the request/response path of the service before and after the
+compiled ride schema (ride_schema.py) and the JSON codec (json_codec.py):
+
+    legacy   json.loads, a loop over the required fields (single) or
+             validate_ride() (batch), json.dumps(sort_keys=True)
+    fast     json_codec.loads, RIDE_SCHEMA.validate, json_codec.dumps
+
+Each stage is timed separately on the same payloads (µs per request, and per
+ride for batches), then whole requests are sent through Flask's test client
+to routes using request.get_json + jsonify (legacy) and the service's own
+/predict and /predict/batch (fast).
+
+Usage:
+    uv run python benchmark_json.py --n 20000
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from flask import jsonify, request
+
+import json_codec
+import predict
+from benchmark_batch import generate_rides
+from ride_schema import RIDE_SCHEMA
+
+
+def legacy_check(ride):
+    """Previous /predict validation: presence of the required fields only."""
+    for field in predict.REQUIRED_FIELDS:
+        if field not in ride:
+            return {'error': f'Missing required field: {field}'}
+    return None
+
+
+def legacy_validate_ride(ride):
+    """Previous /predict/batch validation."""
+    if not isinstance(ride, dict):
+        return 'Ride must be a JSON object'
+    for field in predict.REQUIRED_FIELDS:
+        if field not in ride:
+            return f'Missing required field: {field}'
+    distance = ride['trip_distance']
+    if isinstance(distance, bool) or not isinstance(distance, (int, float)):
+        return 'trip_distance must be a number'
+    return None
+
+
+def legacy_dumps(body):
+    return json.dumps(body, sort_keys=True).encode()
+
+
+@predict.app.route('/legacy/predict', methods=['POST'])
+def legacy_predict_endpoint():
+    ride = request.get_json(silent=True)
+    error = legacy_check(ride)
+    if error is not None:
+        return jsonify(error), 400
+    return jsonify(predict.ride_response(ride, predict.scorer.predict_ride(ride))), 200
+
+
+@predict.app.route('/legacy/predict/batch', methods=['POST'])
+def legacy_predict_batch_endpoint():
+    rides = request.get_json(silent=True)
+    valid = [ride for ride in rides if legacy_validate_ride(ride) is None]
+    preds = predict.predict_batch(valid)
+    return jsonify({'predictions': [{'index': i, 'duration': p} for i, p in enumerate(preds)],
+                    'count': len(rides), 'errors': len(rides) - len(valid)}), 200
+
+
+def per_item_us(func, items, repeats=3):
+    """Best-of-`repeats` time per call of func over items, in µs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def stage_table(rides, batch_size):
+    """Per-stage cost, legacy vs fast, for single rides and batches."""
+    raw_rides = [json.dumps(ride).encode() for ride in rides]
+    bodies = [predict.ride_response(ride, 12.345678901234) for ride in rides]
+    batches = [rides[i:i + batch_size] for i in range(0, len(rides), batch_size)]
+    raw_batches = [json.dumps(batch).encode() for batch in batches]
+    batch_bodies = [{'predictions': [{'index': i, 'duration': 12.345678901234} for i in range(len(batch))],
+                     'count': len(batch), 'errors': 0} for batch in batches]
+    per_ride = len(batches) / len(rides)
+
+    def validate_batch_legacy(batch):
+        for ride in batch:
+            legacy_validate_ride(ride)
+
+    def validate_batch_fast(batch):
+        validate = RIDE_SCHEMA.validate
+        for ride in batch:
+            validate(ride)
+
+    return [
+        ('single decode', per_item_us(json.loads, raw_rides), per_item_us(json_codec.loads, raw_rides)),
+        ('single validate', per_item_us(legacy_check, rides), per_item_us(RIDE_SCHEMA.validate, rides)),
+        ('single encode', per_item_us(legacy_dumps, bodies), per_item_us(json_codec.dumps, bodies)),
+        ('batch decode', per_item_us(json.loads, raw_batches) * per_ride,
+         per_item_us(json_codec.loads, raw_batches) * per_ride),
+        ('batch validate', per_item_us(validate_batch_legacy, batches) * per_ride,
+         per_item_us(validate_batch_fast, batches) * per_ride),
+        ('batch encode', per_item_us(legacy_dumps, batch_bodies) * per_ride,
+         per_item_us(json_codec.dumps, batch_bodies) * per_ride),
+    ]
+
+
+def flask_rps(path, payloads):
+    client = predict.app.test_client()
+    start = time.perf_counter()
+    for payload in payloads:
+        client.post(path, json=payload)
+    return len(payloads) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark JSON decoding, validation and encoding')
+    parser.add_argument('--n', type=int, default=20000, help='Rides (default: 20000)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rides per batch (default: 1000)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rides = generate_rides(args.n)
+
+    print(f"🚕 {args.n} rides, batches of {args.batch_size}, JSON backend: {json_codec.BACKEND}")
+    print(f"{'stage (µs per ride)':<24} {'legacy':>8} {'fast':>8} {'speedup':>8}")
+    for stage, legacy, fast in stage_table(rides, args.batch_size):
+        print(f"{stage:<24} {legacy:>8.2f} {fast:>8.2f} {legacy / fast:>7.1f}x")
+
+    n_flask = max(1, args.n // 4)
+    batches = [rides[i:i + args.batch_size] for i in range(0, len(rides), args.batch_size)]
+    flask_rps('/predict', rides[:200])   # warm-up
+    print(f"{'flask':<24} {'legacy':>8} {'fast':>8}")
+    for label, legacy_path, fast_path, payloads, scale in [
+        ('/predict req/s', '/legacy/predict', '/predict', rides[:n_flask], 1),
+        ('/predict/batch rides/s', '/legacy/predict/batch', '/predict/batch', batches, args.batch_size),
+    ]:
+        legacy = flask_rps(legacy_path, payloads) * scale
+        fast = flask_rps(fast_path, payloads) * scale
+        print(f"{label:<24} {legacy:>8,.0f} {fast:>8,.0f}")
@@ -0,0 +1,116 @@
+"""NYC Taxi Duration Prediction - Logging Overhead Benchmark
+
+Measures single-ride requests per second with different logging setups:
+
+    legacy        Previous behaviour: two f-string INFO lines per request,
+                  written synchronously with logging.basicConfig's handler
+    sync-json     Structured JSON, every request, written synchronously
+    async-json    Structured JSON, every request, background thread
+    async-sampled Structured JSON, 1 in LOG_SAMPLE_RATE requests (default setup)
+    warning       Level WARNING: no per-request records at all
+
+Logs are written to os.devnull so the numbers show the cost of the logging
+calls and formatting, not of a terminal. Each setup is measured calling the
+request handler directly and through Flask's test client.
+
+Usage:
+    uv run python benchmark_logging.py --n 20000
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import logging
+import os
+import time
+
+import predict
+import service_logging
+from benchmark_batch import generate_rides
+
+
+def legacy_score_ride_request(ride):
+    """Previous /predict handler logging, kept for comparison."""
+    logger = predict.logger
+    for field in predict.REQUIRED_FIELDS:
+        if field not in ride:
+            logger.error(f"❌ Missing required field: {field}")
+            return {'error': f'Missing required field: {field}'}, 400
+    logger.info(f"🚕 New prediction: {ride['PULocationID']} -> {ride['DOLocationID']}")
+    pred = predict.scorer.predict_ride(ride)
+    result = {
+        'duration': pred,
+        'pickup_location': ride['PULocationID'],
+        'dropoff_location': ride['DOLocationID'],
+        'trip_distance': ride['trip_distance']
+    }
+    logger.info(f"✅ Response sent: {pred:.2f} minutes")
+    return result, 200
+
+
+def configure(setup, stream, sample_rate):
+    """Apply one logging setup; returns the handler function to benchmark."""
+    if setup == 'legacy':
+        service_logging.shutdown_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        return legacy_score_ride_request
+
+    service_logging.setup_logging(
+        level='WARNING' if setup == 'warning' else 'INFO',
+        stream=stream,
+        use_queue=setup != 'sync-json'
+    )
+    predict.request_log.sample_rate = sample_rate if setup == 'async-sampled' else 1
+    return predict.score_ride_request
+
+
+def measure(handler, rides):
+    start = time.perf_counter()
+    for ride in rides:
+        handler(ride)
+    return len(rides) / (time.perf_counter() - start)
+
+
+def measure_flask(setup, rides):
+    client = predict.app.test_client()
+    if setup == 'legacy':
+        # Route the legacy handler through the real endpoint
+        original = predict.score_ride_request
+        predict.score_ride_request = legacy_score_ride_request
+    try:
+        start = time.perf_counter()
+        for ride in rides:
+            client.post('/predict', json=ride)
+        return len(rides) / (time.perf_counter() - start)
+    finally:
+        if setup == 'legacy':
+            predict.score_ride_request = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark request throughput with different logging setups')
+    parser.add_argument('--n', type=int, default=20000, help='Requests per setup (default: 20000)')
+    parser.add_argument('--sample-rate', type=int, default=100, help='1-in-N sampling for async-sampled (default: 100)')
+    args = parser.parse_args()
+
+    rides = generate_rides(args.n)
+    setups = ['legacy', 'sync-json', 'async-json', 'async-sampled', 'warning']
+
+    with open(os.devnull, 'w') as devnull:
+        print(f"🚕 {args.n} requests per setup (logs to {os.devnull})")
+        print(f"{'setup':<14} {'handler req/s':>14} {'flask req/s':>12}")
+        for setup in setups:
+            handler = configure(setup, devnull, args.sample_rate)
+            measure(handler, rides[:1000])   # warm-up
+            handler_rps = measure(handler, rides)
+            flask_rps = measure_flask(setup, rides[:max(1, args.n // 4)])
+            print(f"{setup:<14} {handler_rps:>14,.0f} {flask_rps:>12,.0f}")
+        service_logging.shutdown_logging()
+        print(f"Dropped log records (queue full): {service_logging.dropped_records()}")
@@ -0,0 +1,74 @@
+"""NYC Taxi Duration Prediction - Metrics Overhead Benchmark
+
+Measures requests per second with the /metrics instrumentation enabled and
+disabled (metrics.enabled = False turns every observation into a no-op):
+
+    handler   score_ride_request() called directly: the cost of the
+              feature/model timers, the prediction histogram and counters
+    flask     POST /predict through Flask's test client: adds the request
+              counter and latency histogram of the before/after hooks
+    batch     score_batch_request() with 1000 rides per call (rides/s)
+
+The time to render /metrics for a scrape is reported as well.
+
+Usage:
+    uv run python benchmark_metrics.py --n 20000
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import logging
+import time
+
+import metrics
+import predict
+from benchmark_batch import generate_rides
+
+
+def measure(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def measure_setup(rides, n_flask, repeats):
+    """Best-of-`repeats` throughput for the handler, Flask and batch paths."""
+    client = predict.app.test_client()
+    batches = [rides[i:i + 1000] for i in range(0, len(rides), 1000)]
+    handler, flask, batch = [], [], []
+    for _ in range(repeats):
+        handler.append(measure(predict.score_ride_request, rides))
+        flask.append(measure(lambda ride: client.post('/predict', json=ride), rides[:n_flask]))
+        batch.append(measure(predict.score_batch_request, batches) * 1000)
+    return max(handler), max(flask), max(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the overhead of the /metrics instrumentation')
+    parser.add_argument('--n', type=int, default=20000, help='Requests per measurement (default: 20000)')
+    parser.add_argument('--repeats', type=int, default=3, help='Repetitions, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    # Only measure the metrics: no per-request logging
+    logging.getLogger().setLevel(logging.WARNING)
+    rides = generate_rides(args.n)
+    n_flask = max(1, args.n // 4)
+
+    measure(predict.score_ride_request, rides[:1000])   # warm-up
+    results = {}
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        results[enabled] = measure_setup(rides, n_flask, args.repeats)
+
+    print(f"🚕 {args.n} requests ({n_flask} through Flask), best of {args.repeats}")
+    print(f"{'path':<10} {'no metrics':>12} {'metrics':>12} {'overhead':>9}")
+    for i, path in enumerate(['handler', 'flask', 'batch']):
+        off, on = results[False][i], results[True][i]
+        print(f"{path:<10} {off:>12,.0f} {on:>12,.0f} {off / on - 1:>8.1%}")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics: {(time.perf_counter() - start) * 1000:.2f} ms, {len(text.splitlines())} lines")
@@ -0,0 +1,126 @@
+"""NYC Taxi Duration Prediction - Gunicorn Worker Startup and Memory
+
+Starts gunicorn with N workers with and without preload_app (see
+gunicorn.conf.py) and reports, for each mode:
+
+    ready s      Time from launching gunicorn until every worker is serving
+    worker s     Mean time of a worker from fork to serving (from the
+                 "Worker ready" log lines)
+    RSS MB       Mean resident memory per worker, counting shared pages
+    PSS MB       Mean proportional memory per worker: shared pages are
+                 divided among the processes sharing them
+    USS MB       Mean memory private to each worker
+    total PSS    Master + all workers: what the service really costs
+
+Memory is read from /proc/<pid>/smaps_rollup after sending some requests,
+so it includes the pages the workers touched while serving (Linux only).
+
+Usage:
+    uv run python benchmark_workers.py --workers 4
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmark_batch import generate_rides
+from load_test import free_port
+
+
+def child_pids(pid):
+    """PIDs whose parent is `pid` (gunicorn workers of a master)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f_in:
+                # The command name is in parentheses and may contain spaces
+                fields = f_in.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def memory_mb(pid):
+    """RSS, PSS and USS of a process in MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f_in:
+        for line in f_in:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': values['Rss'] / 1024,
+        'pss': values['Pss'] / 1024,
+        'uss': (values['Private_Clean'] + values['Private_Dirty']) / 1024
+    }
+
+
+def run_mode(preload, workers, rides):
+    """Start gunicorn in one mode, wait for every worker, measure and stop it."""
+    port = free_port()
+    log_file = tempfile.NamedTemporaryFile(suffix='.log', delete=False).name
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', MODEL_WATCH_INTERVAL='5')
+    cmd = ['gunicorn', f'--bind=127.0.0.1:{port}', f'--workers={workers}',
+           f'--log-file={log_file}', '--log-level=info', 'predict:app']
+
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        boot_times = []
+        while len(boot_times) < workers:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited, see {log_file}')
+            with open(log_file) as f_in:
+                boot_times = [float(t) for t in re.findall(r'Worker ready \(pid: \d+\) in ([\d.]+) s', f_in.read())]
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+
+        session = requests.Session()
+        for ride in rides:
+            session.post(f'http://127.0.0.1:{port}/predict', json=ride, timeout=10)
+
+        worker_memory = [memory_mb(pid) for pid in child_pids(process.pid)]
+        master_memory = memory_mb(process.pid)
+        return {
+            'ready': ready,
+            'worker_boot': sum(boot_times) / len(boot_times),
+            'rss': sum(m['rss'] for m in worker_memory) / len(worker_memory),
+            'pss': sum(m['pss'] for m in worker_memory) / len(worker_memory),
+            'uss': sum(m['uss'] for m in worker_memory) / len(worker_memory),
+            'total_pss': master_memory['pss'] + sum(m['pss'] for m in worker_memory)
+        }
+    finally:
+        process.terminate()
+        process.wait()
+        os.unlink(log_file)
+
+
+if __name__ == "__main__":
+    if not sys.platform.startswith('linux'):
+        sys.exit('benchmark_workers.py reads /proc and only runs on Linux')
+    parser = argparse.ArgumentParser(description='Compare gunicorn workers with and without preload_app')
+    parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers (default: 4)')
+    parser.add_argument('--requests', type=int, default=500, help='Requests sent before measuring memory (default: 500)')
+    args = parser.parse_args()
+
+    rides = generate_rides(args.requests)
+    print(f"🚕 gunicorn with {args.workers} workers, {args.requests} requests before measuring memory")
+    print(f"{'mode':<10} {'ready s':>8} {'worker s':>9} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'total PSS':>10}")
+    for preload in (False, True):
+        r = run_mode(preload, args.workers, rides)
+        print(f"{'preload' if preload else 'per-worker':<10} {r['ready']:>8.2f} {r['worker_boot']:>9.3f} "
+              f"{r['rss']:>8.1f} {r['pss']:>8.1f} {r['uss']:>8.1f} {r['total_pss']:>10.1f}")
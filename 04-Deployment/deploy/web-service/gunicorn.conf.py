@@ -0,0 +1,47 @@
+"""NYC Taxi Duration Prediction - Gunicorn Configuration
+
+Gunicorn reads this file automatically when started from this directory:
+
+    gunicorn --bind=0.0.0.0:9696 --workers=4 predict:app
+
+With preload_app (default) predict.py is imported once in the master, which
+loads sklearn, unpickles lin_reg.bin and compiles the model, and then forks
+the workers. The workers share those pages with the master copy-on-write
+instead of each holding its own copy, and start in milliseconds because
+there is nothing left to import or load.
+
+gc.freeze() before each fork moves the preloaded objects out of the
+garbage collector's generations, so collections in the workers do not
+write to (and un-share) their pages.
+
+The logging thread and the model watcher are restarted in each worker (see
+service_logging.py and model_reloader.py). After a hot reload each worker
+holds its own copy of the new model until the workers are restarted.
+
+Configuration (environment variables):
+    GUNICORN_PRELOAD   "0" to import the app in every worker instead (default: 1)
+    WEB_CONCURRENCY    Number of workers (read by gunicorn; default: 1)
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import gc
+import os
+import time
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    """Log how long the worker took from fork to serving (loading the app, without preload)."""
+    worker.log.info('Worker ready (pid: %s) in %.3f s, preload=%s',
+                    worker.pid, time.perf_counter() - worker.boot_started, preload_app)
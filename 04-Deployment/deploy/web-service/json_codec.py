@@ -0,0 +1,51 @@
+"""NYC Taxi Duration Prediction - JSON Codec
+
+Request decoding and response encoding for the web service, with orjson when
+it is installed and the standard json module otherwise.
+
+orjson parses and serializes the small /predict payloads several times
+faster than json (and Flask's jsonify, which adds a Response and
+indentation logic on top). Both paths produce the same compact output with
+sorted keys, like jsonify.
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+CONTENT_TYPE = 'application/json'
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(body):
+        """Serialize a response body to compact JSON bytes with sorted keys."""
+        return orjson.dumps(body, option=_OPTIONS)
+
+    def loads(raw):
+        """Decode a request body; None if it is empty or not valid JSON (like get_json(silent=True))."""
+        try:
+            return orjson.loads(raw) if raw else None
+        except orjson.JSONDecodeError:
+            return None
+
+else:
+    def dumps(body):
+        """Serialize a response body to compact JSON bytes with sorted keys."""
+        return json.dumps(body, sort_keys=True, separators=(',', ':')).encode()
+
+    def loads(raw):
+        """Decode a request body; None if it is empty or not valid JSON (like get_json(silent=True))."""
+        try:
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
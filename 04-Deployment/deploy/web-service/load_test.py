@@ -0,0 +1,204 @@
+"""NYC Taxi Duration Prediction - Load Test: Flask vs ASGI
+
+Sends concurrent /predict requests to the Flask app (predict.py) and to the
+async ASGI app (predict_async.py) and reports latency percentiles, throughput
+and rejected (503) requests for each. With --microbatch the ASGI app is also
+tested with micro-batching enabled (PREDICT_MICROBATCH=1), and the realized
+batch sizes reported on its /health are printed.
+
+By default both servers are started locally on free ports: Flask with
+gunicorn (as in the Dockerfile, or Flask's threaded development server if
+gunicorn is not installed) and the ASGI app with uvicorn. Pass --flask-url
+and/or --asgi-url to load-test servers that are already running.
+
+Usage:
+    uv run python load_test.py --requests 5000 --concurrency 64
+    uv run python load_test.py --requests 5000 --concurrency 64 --microbatch
+    uv run python load_test.py --asgi-url http://localhost:9696 --skip-flask
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmark_batch import generate_rides
+
+
+def free_port():
+    """Ask the OS for a free TCP port."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port):
+    """
+    Start the Flask or ASGI app in a subprocess.
+
+    Args:
+        kind (str): 'flask', 'asgi' or 'asgi-microbatch'
+        port (int): Port to bind on 127.0.0.1
+
+    Returns:
+        subprocess.Popen: Server process
+    """
+    env = dict(os.environ)
+    if kind == 'asgi-microbatch':
+        env['PREDICT_MICROBATCH'] = '1'
+    if kind.startswith('asgi'):
+        cmd = [sys.executable, '-m', 'uvicorn', 'predict_async:app',
+               '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    elif shutil.which('gunicorn'):
+        cmd = ['gunicorn', f'--bind=127.0.0.1:{port}', 'predict:app']
+    else:
+        cmd = [sys.executable, '-c',
+               f"from predict import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url, timeout=30):
+    """Poll /health until the server answers."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server at {url} did not become ready')
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_load(url, rides, concurrency):
+    """
+    Send every ride to /predict from `concurrency` client threads.
+
+    All threads start together, so the server sees a burst of
+    `concurrency` simultaneous requests and keeps seeing it until the
+    rides run out.
+
+    Args:
+        url (str): Base URL of the service
+        rides (list): Payloads to send
+        concurrency (int): Client threads
+
+    Returns:
+        dict: Latency percentiles (ms), throughput and status counts
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    next_index = iter(range(len(rides)))
+    barrier = threading.Barrier(concurrency)
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = {}
+        barrier.wait()
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            try:
+                status = session.post(f'{url}/predict', json=rides[i], timeout=30).status_code
+            except requests.RequestException:
+                status = 'connection error'
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'rps': len(latencies) / elapsed,
+        'statuses': statuses
+    }
+
+
+def load_test(kind, url, rides, concurrency):
+    """Start the server if no URL is given, warm it up and run the load."""
+    process = None
+    if url is None:
+        port = free_port()
+        url = f'http://127.0.0.1:{port}'
+        process = start_server(kind, port)
+    try:
+        wait_ready(url)
+        run_load(url, rides[:200], min(concurrency, 8))   # warm-up
+        result = run_load(url, rides, concurrency)
+        result['health'] = requests.get(f'{url}/health', timeout=5).json()
+        return result
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load-test /predict on the Flask and ASGI apps')
+    parser.add_argument('--requests', type=int, default=3000, help='Requests per server (default: 3000)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients (default: 32)')
+    parser.add_argument('--flask-url', type=str, default=None, help='Running Flask service (default: start one)')
+    parser.add_argument('--asgi-url', type=str, default=None, help='Running ASGI service (default: start one)')
+    parser.add_argument('--skip-flask', action='store_true', help='Only test the ASGI app')
+    parser.add_argument('--skip-asgi', action='store_true', help='Only test the Flask app')
+    parser.add_argument('--microbatch', action='store_true',
+                        help='Also test the ASGI app with micro-batching (started locally)')
+    args = parser.parse_args()
+
+    rides = generate_rides(args.requests)
+    targets = []
+    if not args.skip_flask:
+        targets.append(('flask', args.flask_url))
+    if not args.skip_asgi:
+        targets.append(('asgi', args.asgi_url))
+    if args.microbatch:
+        targets.append(('asgi-microbatch', None))
+
+    print(f"🚕 {args.requests} requests, {args.concurrency} concurrent clients")
+    print(f"{'server':<16} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'req/s':>8}  statuses")
+    for kind, url in targets:
+        result = load_test(kind, url, rides, args.concurrency)
+        print(f"{kind:<16} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['max_ms']:>8.1f} "
+              f"{result['rps']:>8.0f}  {result['statuses']}")
+        if 'micro_batching' in result['health']:
+            stats = result['health']['micro_batching']
+            print(f"{'':<16} {stats['batches']} batches, mean size {stats['mean_batch_size']:.1f}, "
+                  f"sizes {dict(sorted(stats['batch_sizes'].items(), key=lambda item: int(item[0])))}")
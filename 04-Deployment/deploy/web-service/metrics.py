@@ -0,0 +1,212 @@
+"""NYC Taxi Duration Prediction - In-process Metrics
+
+Minimal Prometheus-style counters and histograms, rendered in the Prometheus
+text exposition format by render(). No client library is needed.
+
+Each metric keeps its values per label tuple, guarded by a lock. Hot paths
+bind their labels once with labels(), so an observation is a bisect and two
+additions under the lock. Metrics are per process: with several gunicorn
+workers each worker reports its own values.
+
+Usage:
+    >>> REQUESTS.inc('/predict', '200')
+    >>> predict_model_seconds = MODEL_SECONDS.labels('/predict')
+    >>> predict_model_seconds.observe(0.000004)
+    >>> text = render()
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import bisect
+import threading
+
+import numpy as np
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets in seconds: 5 us ... 1 s
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+DURATION_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 10000)
+
+_metrics = []
+
+# Set to False to turn every observation into a no-op (to measure the overhead)
+enabled = True
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+
+    Args:
+        name (str): Metric name
+        help_text (str): HELP line
+        labels (tuple): Label names
+    """
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *label_values, amount=1):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}')
+        return lines
+
+
+class _HistogramChild:
+    """Histogram values of one label tuple (see Histogram.labels())."""
+
+    def __init__(self, buckets, lock):
+        self.buckets = buckets
+        self.lock = lock
+        self.state = [0] * (len(buckets) + 1) + [0.0]   # bucket counts..., +Inf count, sum
+
+    def observe(self, value):
+        if not enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.state[index] += 1
+            self.state[-1] += value
+
+    def observe_many(self, values):
+        """Observe every value of an array with a single lock acquisition."""
+        if not enabled or len(values) == 0:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.bincount(np.searchsorted(self.buckets, values, side='left'),
+                             minlength=len(self.buckets) + 1).tolist()
+        total = float(values.sum())
+        with self.lock:
+            for i, count in enumerate(counts):
+                self.state[i] += count
+            self.state[-1] += total
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets and labels.
+
+    Args:
+        name (str): Metric name
+        help_text (str): HELP line
+        buckets (tuple): Upper bounds, in increasing order (+Inf is added)
+        labels (tuple): Label names
+    """
+
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        # Float bounds: bisect compares floats faster than mixed int/float
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def labels(self, *label_values):
+        """Child histogram for these label values, to keep for repeated observations."""
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, _HistogramChild(self.buckets, self._lock))
+        return child
+
+    def observe(self, value, *label_values):
+        self.labels(*label_values).observe(value)
+
+    def observe_many(self, values, *label_values):
+        self.labels(*label_values).observe_many(values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(child.state)) for key, child in self._children.items())
+        for label_values, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                labels = _format_labels(self.label_names, label_values, [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """
+    Value computed when /metrics is scraped.
+
+    Args:
+        name (str): Metric name
+        help_text (str): HELP line
+        read (callable): Returns the current value, or None to omit the metric
+        metric_type (str): 'gauge' or 'counter'
+    """
+
+    def __init__(self, name, help_text, read, metric_type='gauge'):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        self.metric_type = metric_type
+        _metrics.append(self)
+
+    def render(self):
+        value = self.read()
+        if value is None:
+            return []
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}',
+                f'{self.name} {_format_value(value)}']
+
+
+def render():
+    """All registered metrics in Prometheus text format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Metrics of the prediction service
+REQUESTS = Counter('taxi_requests_total', 'Requests handled, by endpoint and HTTP status',
+                   ('endpoint', 'status'))
+ERRORS = Counter('taxi_errors_total', 'Failed requests and invalid rides, by endpoint and error type',
+                 ('endpoint', 'type'))
+REQUEST_SECONDS = Histogram('taxi_request_duration_seconds', 'Request latency as seen by the server',
+                            LATENCY_BUCKETS, ('endpoint',))
+FEATURE_SECONDS = Histogram('taxi_feature_prep_duration_seconds', 'Validation and feature preparation time',
+                            LATENCY_BUCKETS, ('endpoint',))
+MODEL_SECONDS = Histogram('taxi_model_duration_seconds', 'Model scoring time',
+                          LATENCY_BUCKETS, ('endpoint',))
+PREDICTIONS = Histogram('taxi_predicted_duration_minutes', 'Predicted trip durations',
+                        DURATION_BUCKETS)
+BATCH_SIZE = Histogram('taxi_batch_size', 'Rides scored per model call (batch endpoint and micro-batches)',
+                       BATCH_SIZE_BUCKETS, ('source',))
@@ -0,0 +1,134 @@
+"""NYC Taxi Duration Prediction - Server-side Micro-batching
+
+Collects single-ride /predict requests arriving at the same time and scores
+them together with one vectorized model call. A batch is dispatched when it
+reaches max_batch_size rides or when its first ride has waited max_wait_ms,
+whichever comes first, so the added latency is bounded by max_wait_ms.
+
+Used by the ASGI app (predict_async.py) when PREDICT_MICROBATCH=1.
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Asyncio dispatcher that groups rides into batches.
+
+    Must be used from a single event loop. Batches are scored with
+    `run(score_batch, rides)`, e.g. a bounded executor, so several batches
+    can be in flight while the next one is being collected.
+
+    Args:
+        score_batch (callable): list of rides -> list of predictions, in order
+        score_one (callable): ride -> prediction, used if a batch call fails
+            so one bad ride does not fail the others
+        run (callable): Coroutine function run(func, *args) that executes
+            func off the event loop
+        max_batch_size (int): Dispatch as soon as this many rides are waiting
+        max_wait_ms (float): Dispatch at most this long after the first ride
+
+    Attributes:
+        batches (int): Batches dispatched
+        items (int): Rides dispatched
+        size_counts (dict): Realized batch size -> number of batches
+    """
+
+    def __init__(self, score_batch, score_one, run, max_batch_size=32, max_wait_ms=2.0):
+        self.score_batch = score_batch
+        self.score_one = score_one
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+        self.size_counts = {}
+
+    async def submit(self, ride):
+        """
+        Queue a ride and wait for its prediction.
+
+        Args:
+            ride (dict): Validated ride
+
+        Returns:
+            float: Predicted duration in minutes
+
+        Raises:
+            Exception: Whatever the scoring (or the run function) raised for this ride
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((ride, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch)
+
+        return await future
+
+    def _dispatch(self):
+        """Take the waiting rides as one batch and schedule its scoring."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self.batches += 1
+        self.items += len(batch)
+        self.size_counts[len(batch)] = self.size_counts.get(len(batch), 0) + 1
+        asyncio.get_running_loop().create_task(self._score(batch))
+
+    def _score_with_fallback(self, rides):
+        """Score a batch; if it fails, score ride by ride and keep per-ride errors."""
+        try:
+            return self.score_batch(rides)
+        except Exception:
+            results = []
+            for ride in rides:
+                try:
+                    results.append(self.score_one(ride))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    async def _score(self, batch):
+        rides = [ride for ride, _ in batch]
+        try:
+            results = await self.run(self._score_with_fallback, rides)
+        except Exception as e:
+            # e.g. the executor queue is full: every ride in the batch gets the error
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():       # the request was cancelled (client went away)
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        """Knobs and realized batch sizes, reported on /health."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'batch_sizes': {str(size): count for size, count in sorted(self.size_counts.items())}
+        }
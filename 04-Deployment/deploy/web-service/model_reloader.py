@@ -0,0 +1,176 @@
+"""NYC Taxi Duration Prediction - Hot Model Reload
+
+Replaces the served model without restarting the process. A reload runs off
+the request path, in the watcher thread or in the caller of reload() (the
+admin endpoint):
+
+    1. load    Build the candidate from the model file (unpickle + compile)
+    2. check   Validate it and run a canary prediction; any exception rejects
+               the candidate and the current model keeps serving
+    3. swap    Publish the candidate with a single reference assignment, so
+               a request sees either the old model or the new one, never a
+               mix of both
+
+The watcher polls the file's mtime and size (one stat() call per interval).
+A file that fails to load is not retried until it changes again, so a
+half-written file is picked up once its final version is in place. Replace
+the model atomically (write a temporary file, then os.replace) to avoid the
+failed attempt altogether.
+
+With several gunicorn workers, each worker runs its own watcher and swaps
+its own model; a reload through the admin endpoint only reaches the worker
+that handled the call. A watcher started before fork() (gunicorn's
+preload_app) is restarted in each child.
+
+Usage:
+    >>> reloader = ModelReloader('lin_reg.bin', load, check, swap, interval=5)
+    >>> reloader.start()                  # watch the file
+    >>> reloader.reload(force=True)       # or reload on demand
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# Reloaders to restart in forked children
+_reloaders = weakref.WeakSet()
+
+
+class ModelReloader:
+    """
+    Load, validate and swap a model when its file changes.
+
+    Args:
+        path (str): Model file
+        load (callable): path -> candidate model (must have a `version` attribute)
+        check (callable): candidate -> None; raises if the candidate must be rejected
+        swap (callable): candidate -> None; publishes the candidate
+        current_version (str): Version of the model already being served
+        interval (float): Seconds between file checks in the watcher thread
+
+    Attributes:
+        reloads (int): Models swapped in
+        failures (int): Candidates rejected (load or check failed)
+        last_error (str): Error of the last rejected candidate
+    """
+
+    def __init__(self, path, load, check, swap, current_version=None, interval=5.0):
+        self.path = path
+        self.load = load
+        self.check = check
+        self.swap = swap
+        self.interval = interval
+        self.current_version = current_version
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload_at = None
+        self._seen_signature = self._signature()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        _reloaders.add(self)
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self, force=False):
+        """
+        Reload the model if its file changed (or always, with force=True).
+
+        Args:
+            force (bool): Load the file even if its mtime and size are unchanged
+
+        Returns:
+            dict: 'status' ('reloaded', 'unchanged' or 'failed'), 'version'
+                of the model being served and, on failure, 'error'
+        """
+        with self._lock:
+            signature = self._signature()
+            if not force and signature == self._seen_signature:
+                return {'status': 'unchanged', 'version': self.current_version}
+            # Whatever the outcome, this version of the file has been handled
+            self._seen_signature = signature
+
+            start = time.perf_counter()
+            try:
+                candidate = self.load(self.path)
+                if candidate.version == self.current_version:
+                    return {'status': 'unchanged', 'version': self.current_version}
+                self.check(candidate)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f'{type(e).__name__}: {e}'
+                logger.error('model_reload_failed', extra={'fields': {
+                    'path': self.path, 'error': self.last_error, 'serving': self.current_version}})
+                return {'status': 'failed', 'version': self.current_version, 'error': self.last_error}
+
+            previous = self.current_version
+            self.swap(candidate)
+            self.current_version = candidate.version
+            self.reloads += 1
+            self.last_reload_at = time.time()
+            logger.info('model_reloaded', extra={'fields': {
+                'path': self.path, 'previous': previous, 'version': candidate.version,
+                'seconds': round(time.perf_counter() - start, 4)}})
+            return {'status': 'reloaded', 'version': candidate.version, 'previous': previous}
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._signature() != self._seen_signature:
+                self.reload()
+
+    def start(self):
+        """Start the watcher thread (no-op if interval <= 0 or already running)."""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='model-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _restart_after_fork(self):
+        """In a forked child: new lock, and a new watcher if the parent had one."""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        was_watching = self._thread is not None
+        self._thread = None
+        if was_watching:
+            self.start()
+
+    def stats(self):
+        """Reload counters, reported on /health."""
+        return {
+            'watching': self._thread is not None and self._thread.is_alive(),
+            'interval_seconds': self.interval,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_reload_at': self.last_reload_at
+        }
+
+
+def _restart_after_fork():
+    for reloader in list(_reloaders):
+        reloader._restart_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):   # POSIX only
+    os.register_at_fork(after_in_child=_restart_after_fork)
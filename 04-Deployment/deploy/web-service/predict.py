@@ -2,32 +2,232 @@
 
 Flask API for predicting NYC taxi trip duration using a linear regression model.
 This service loads a pre-trained model and exposes a REST endpoint for predictions.
+At startup the model is compiled into NumPy arrays (see compiled_model.py), so
+the endpoints score trips without building a DictVectorizer sparse matrix.
 
 Author: MLOps Team
 Version: 1.0
 """
 
-import pickle
+import hashlib
+import hmac
 import logging
-from flask import Flask, request, jsonify
+import os
+import pickle
+import time
+from flask import Flask, Response, request
+
+import numpy as np
+
+import json_codec
+import metrics
+import service_logging
+from compiled_model import CompiledLinearModel
+from model_artifact import is_artifact, read_artifact
+from model_registry import get_model
+from model_reloader import ModelReloader
+from prediction_cache import PredictionCache
+from ride_schema import MISSING_FIELD, REQUIRED_FIELDS, RIDE_SCHEMA
+from service_logging import SampledLogger, setup_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Structured JSON logs written by a background thread (see service_logging.py);
+# per-request events are only logged for 1 in LOG_SAMPLE_RATE requests
+setup_logging()
 logger = logging.getLogger(__name__)
+request_log = SampledLogger(logger, int(os.getenv('LOG_SAMPLE_RATE', '100')))
+
+# Path of the model: the pickled (DictVectorizer, LinearRegression) tuple, or
+# the same model exported with model_artifact.py (loaded without pickle or sklearn)
+MODEL_PATH = os.getenv('MODEL_PATH', 'lin_reg.bin')
+
+
+# Rides every model must score (finite, and the same with the compiled and
+# sklearn paths) before it is served
+CANARY_RIDES = [
+    {'PULocationID': 161, 'DOLocationID': 236, 'trip_distance': 2.5},
+    {'PULocationID': 1, 'DOLocationID': 263, 'trip_distance': 25.0}
+]
 
-# Load model and DictVectorizer at application startup
+
+class ServingModel:
+    """
+    One version of the model: the (dv, model) pair and its compiled scorer.
+    
+    Request code reads the module-level `serving` reference once and scores
+    with that object, so a hot reload (which rebinds `serving`) never mixes
+    the parts of two versions.
+    
+    Args:
+        dv (DictVectorizer): Fitted DictVectorizer (None for an artifact)
+        model (LinearRegression): Trained model (None for an artifact)
+        scorer (CompiledLinearModel): Compiled form of (dv, model)
+        path (str): File it was loaded from
+        checksum (str): SHA-256 of the file (the artifact checksum, for an artifact)
+        file_format (str): 'pickle' or 'artifact'
+    """
+    
+    def __init__(self, dv, model, scorer, path, checksum, file_format='pickle'):
+        self.dv = dv
+        self.model = model
+        self.scorer = scorer
+        self.path = path
+        self.checksum = checksum
+        self.file_format = file_format
+        self.version = checksum[:12]
+        self.loaded_at = time.time()
+    
+    def info(self):
+        """Version details, reported on /health."""
+        return {
+            'version': self.version,
+            'sha256': self.checksum,
+            'format': self.file_format,
+            'path': os.path.realpath(self.path),
+            'loaded_at': self.loaded_at
+        }
+
+
+def load_serving_model(path):
+    """
+    Registry loader: unpickle (dv, model), compile it and hash the same bytes.
+    
+    Model artifacts (see model_artifact.py) are checked against their
+    SHA-256 and compiled from their arrays instead, without sklearn; the
+    ServingModel then has a scorer but no dv or model.
+    
+    Args:
+        path (str): Path to lin_reg.bin or to an exported artifact
+    
+    Returns:
+        ServingModel: Loaded model
+    """
+    if is_artifact(path):
+        artifact = read_artifact(path)
+        scorer = CompiledLinearModel.from_artifact(artifact)
+        return ServingModel(None, None, scorer, path, artifact.sha256, file_format='artifact')
+    with open(path, 'rb') as f_in:
+        data = f_in.read()
+    dv, model = pickle.loads(data)
+    scorer = CompiledLinearModel.from_sklearn(dv, model)
+    return ServingModel(dv, model, scorer, path, hashlib.sha256(data).hexdigest())
+
+
+def check_serving_model(candidate):
+    """
+    Validate a model before serving it, with a canary prediction.
+    
+    Args:
+        candidate (ServingModel): Loaded model
+    
+    Raises:
+        ValueError: If the coefficients do not match the vocabulary, or the
+            canary predictions are not finite or differ between the
+            compiled and sklearn paths
+    
+    Note:
+        An artifact has no sklearn objects to compare with: its coefficients
+        were matched to the vocabulary on export, so only the finiteness of
+        the canary predictions is checked.
+    """
+    compiled = candidate.scorer.predict_rides(CANARY_RIDES)
+    if not np.all(np.isfinite(compiled)):
+        raise ValueError(f'Canary predictions are not finite: {compiled.tolist()}')
+    if candidate.model is None:
+        return
+    n_features = len(candidate.dv.feature_names_)
+    n_coef = np.ravel(candidate.model.coef_).shape[0]
+    if n_coef != n_features:
+        raise ValueError(f'Model has {n_coef} coefficients for {n_features} features')
+    features = [{'PU_DO': '%s_%s' % (ride['PULocationID'], ride['DOLocationID']),
+                 'trip_distance': ride['trip_distance']} for ride in CANARY_RIDES]
+    reference = candidate.model.predict(candidate.dv.transform(features))
+    if not np.array_equal(compiled, reference):
+        raise ValueError(f'Canary predictions differ: compiled {compiled.tolist()}, sklearn {reference.tolist()}')
+
+
+# Load, validate and compile the model at application startup
+# (through the process-level registry: unpickled once per process)
 try:
-    with open('lin_reg.bin', 'rb') as f_in:
-        logger.info('🔄 Loading model and DictVectorizer...')
-        (dv, model) = pickle.load(f_in)
-        logger.info('✅ Model and DV loaded successfully')
+    logger.info('🔄 Loading model and DictVectorizer...')
+    serving = get_model(MODEL_PATH, load_serving_model)
+    check_serving_model(serving)
+    logger.info('✅ Model loaded and compiled for serving', extra={'fields': {'version': serving.version}})
 except FileNotFoundError:
-    logger.error('❌ Error: lin_reg.bin file not found')
+    logger.error(f'❌ Error: {MODEL_PATH} file not found')
     raise
 except Exception as e:
     logger.error(f'❌ Error loading model: {e}')
     raise
 
+# Parts of the served model, kept in sync with `serving` for scripts and
+# benchmarks; request code uses `serving`
+dv, model, scorer = serving.dv, serving.model, serving.scorer
+
+
+# Maximum number of trips accepted by /predict/batch in one request
+MAX_BATCH_SIZE = 10000
+
+# Optional prediction cache for /predict (see prediction_cache.py), enabled with PREDICT_CACHE=1
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv('PREDICT_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.getenv('PREDICT_CACHE_TTL', '300')),
+    distance_step=float(os.getenv('PREDICT_CACHE_DISTANCE_STEP', '0.01')),
+    model_path=MODEL_PATH
+) if os.getenv('PREDICT_CACHE', '0') == '1' else None
+
+
+def swap_serving_model(candidate):
+    """
+    Start serving a validated model (called by the reloader).
+    
+    Args:
+        candidate (ServingModel): Model that passed check_serving_model()
+    """
+    global serving, dv, model, scorer
+    serving = candidate
+    dv, model, scorer = candidate.dv, candidate.model, candidate.scorer
+    if prediction_cache is not None:
+        prediction_cache.clear()
+
+
+# Hot reload (see model_reloader.py): the model file is checked every
+# MODEL_WATCH_INTERVAL seconds (0 disables the watcher), and POST /admin/reload
+# reloads on demand when MODEL_ADMIN_TOKEN is set
+model_reloader = ModelReloader(
+    MODEL_PATH,
+    load=lambda path: get_model(path, load_serving_model),
+    check=check_serving_model,
+    swap=swap_serving_model,
+    current_version=serving.version,
+    interval=float(os.getenv('MODEL_WATCH_INTERVAL', '5'))
+)
+model_reloader.start()
+ADMIN_TOKEN = os.getenv('MODEL_ADMIN_TOKEN')
+
+# Values read from their owners when /metrics is scraped (omitted while disabled)
+metrics.Gauge('taxi_prediction_cache_hits_total', 'Prediction cache hits',
+              lambda: prediction_cache.hits if prediction_cache is not None else None, 'counter')
+metrics.Gauge('taxi_prediction_cache_misses_total', 'Prediction cache misses',
+              lambda: prediction_cache.misses if prediction_cache is not None else None, 'counter')
+metrics.Gauge('taxi_prediction_cache_hit_ratio', 'Prediction cache hits / lookups',
+              lambda: prediction_cache.stats()['hit_rate'] if prediction_cache is not None else None)
+metrics.Gauge('taxi_log_records_dropped_total', 'Log records dropped because the log queue was full',
+              service_logging.dropped_records, 'counter')
+metrics.Gauge('taxi_model_reloads_total', 'Models swapped in by hot reload',
+              lambda: model_reloader.reloads, 'counter')
+metrics.Gauge('taxi_model_reload_failures_total', 'Model reloads rejected by validation or the canary',
+              lambda: model_reloader.failures, 'counter')
+
+# Endpoints reported with their own label on /metrics (anything else is 'other')
+METRIC_ENDPOINTS = ('/predict', '/predict/batch', '/health', '/metrics', '/admin/reload')
+
+# Histograms observed on every request, with their labels bound once
+PREDICT_FEATURE_SECONDS = metrics.FEATURE_SECONDS.labels('/predict')
+PREDICT_MODEL_SECONDS = metrics.MODEL_SECONDS.labels('/predict')
+BATCH_FEATURE_SECONDS = metrics.FEATURE_SECONDS.labels('/predict/batch')
+BATCH_MODEL_SECONDS = metrics.MODEL_SECONDS.labels('/predict/batch')
+PREDICTIONS = metrics.PREDICTIONS.labels()
+
 
 def prepare_features(ride):
     """
@@ -57,7 +257,7 @@ def prepare_features(ride):
     features = {}
     features['PU_DO'] = '%s_%s' % (ride['PULocationID'], ride['DOLocationID'])
     features['trip_distance'] = ride['trip_distance']
-    logger.info(f"✅ Features prepared: PU_DO={features['PU_DO']}, distance={features['trip_distance']}")
+    logger.debug('Features prepared: PU_DO=%s, distance=%s', features['PU_DO'], features['trip_distance'])
     return features
 
 
@@ -75,23 +275,323 @@ def predict(features):
         - Uses DictVectorizer to transform categorical features
         - Applies pre-trained linear regression model
         - Returns prediction as float for JSON serialization
+        - Reference sklearn path: the endpoints use the compiled scorer,
+          which returns exactly the same value
     
     Example:
         >>> features = {'PU_DO': '161_236', 'trip_distance': 2.5}
         >>> duration = predict(features)
         >>> print(f"Predicted duration: {duration:.2f} minutes")
     """
-    X = dv.transform(features)
-    preds = model.predict(X)
+    current = serving
+    if current.dv is None:
+        raise RuntimeError(f'The sklearn reference path needs the pickled model, {MODEL_PATH} is an artifact')
+    X = current.dv.transform(features)
+    preds = current.model.predict(X)
     predicted_duration = float(preds[0])
-    logger.info(f"🎯 Prediction made: {predicted_duration:.2f} minutes")
+    logger.debug('Prediction made: %.2f minutes', predicted_duration)
     return predicted_duration
 
 
+def predict_ride_cached(ride):
+    """
+    Predict the duration of a single ride, through the prediction cache if enabled.
+    
+    Args:
+        ride (dict): Validated ride
+    
+    Returns:
+        float: Predicted trip duration in minutes
+    """
+    current = serving
+    if prediction_cache is None:
+        return current.scorer.predict_ride(ride)
+    # Entries are tagged with the model version: a prediction of a model
+    # swapped out meanwhile can be stored, but is never returned for the new one
+    pred = prediction_cache.get(ride, current.version)
+    if pred is None:
+        pred = current.scorer.predict_ride(ride)
+        prediction_cache.put(ride, pred, current.version)
+    return pred
+
+
+def predict_batch(rides, source='batch', current=None):
+    """
+    Perform duration predictions for many trips in a single model call.
+    
+    Args:
+        rides (list): List of validated ride dicts (see ride_schema.py)
+        source (str): Caller, reported as the source label of taxi_batch_size
+            ('batch' for /predict/batch, 'microbatch' for micro-batches)
+        current (ServingModel): Model to score with (default: the served one)
+    
+    Returns:
+        list: Predicted trip durations in minutes, in the same order as the input
+    
+    Note:
+        - One vectorized call to the compiled model over the whole list,
+          instead of one sparse matrix and one sklearn call per trip
+    
+    Example:
+        >>> rides = [
+        ...     {'PULocationID': 161, 'DOLocationID': 236, 'trip_distance': 2.5},
+        ...     {'PULocationID': 1, 'DOLocationID': 263, 'trip_distance': 25.0}
+        ... ]
+        >>> durations = predict_batch(rides)
+        >>> print(len(durations))
+        2
+    """
+    preds = (current or serving).scorer.predict_rides(rides)
+    metrics.BATCH_SIZE.observe(len(preds), source)
+    if request_log.sampled():
+        request_log.info('batch_scored', rides=len(preds))
+    return preds.tolist()
+
+
+def check_ride_request(ride):
+    """
+    Validate the decoded body of a /predict request against the ride schema.
+    
+    Args:
+        ride: Decoded JSON body (None if the body was missing or invalid)
+    
+    Returns:
+        tuple: (ride, None) with the coerced ride if it is valid, or
+            (None, (error dict, HTTP status code)) if not
+    
+    Example:
+        >>> check_ride_request({'PULocationID': 161, 'DOLocationID': 236})
+        (None, ({'error': 'Missing required field: trip_distance'}, 400))
+    """
+    if not ride:
+        metrics.ERRORS.inc('/predict', 'no_json')
+        request_log.error('invalid_request', error='No JSON data provided')
+        return None, ({'error': 'No JSON data provided'}, 400)
+    
+    ride, error = RIDE_SCHEMA.validate(ride)
+    if error is not None:
+        metrics.ERRORS.inc('/predict', 'missing_field' if error.startswith(MISSING_FIELD) else 'invalid_field')
+        request_log.error('invalid_request', error=error)
+        return None, ({'error': error}, 400)
+    return ride, None
+
+
+def ride_response(ride, pred):
+    """
+    Build the /predict response for a scored ride.
+    
+    Args:
+        ride (dict): Validated ride
+        pred (float): Predicted duration in minutes
+    
+    Returns:
+        dict: Response body
+    """
+    PREDICTIONS.observe(pred)
+    if request_log.sampled():
+        request_log.info(
+            'prediction',
+            pickup=ride['PULocationID'],
+            dropoff=ride['DOLocationID'],
+            trip_distance=ride['trip_distance'],
+            duration=pred
+        )
+    return {
+        'duration': pred,
+        'pickup_location': ride['PULocationID'],
+        'dropoff_location': ride['DOLocationID'],
+        'trip_distance': ride['trip_distance']
+    }
+
+
+def prediction_error(e):
+    """
+    Map an exception raised while scoring a /predict request to a response.
+    
+    Args:
+        e (Exception): Exception raised by validation or scoring
+    
+    Returns:
+        tuple: (error dict, HTTP status code)
+    """
+    metrics.ERRORS.inc('/predict', type(e).__name__)
+    if isinstance(e, KeyError):
+        request_log.error('invalid_request', error='Missing field', field=str(e))
+        return {'error': f'Missing field: {str(e)}'}, 400
+    request_log.error('prediction_failed', error=str(e), error_type=type(e).__name__)
+    return {'error': 'Internal server error'}, 500
+
+
+def score_ride_request(ride):
+    """
+    Validate and score the decoded body of a /predict request.
+    
+    Shared by the Flask app and the ASGI app (predict_async.py), so both
+    return exactly the same responses.
+    
+    Args:
+        ride: Decoded JSON body (None if the body was missing or invalid)
+    
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    try:
+        start = time.perf_counter()
+        ride, error = check_ride_request(ride)
+        prepared = time.perf_counter()
+        PREDICT_FEATURE_SECONDS.observe(prepared - start)
+        if error is not None:
+            return error
+        
+        # Score with the compiled model (same result as prepare_features + predict)
+        pred = predict_ride_cached(ride)
+        PREDICT_MODEL_SECONDS.observe(time.perf_counter() - prepared)
+        return ride_response(ride, pred), 200
+        
+    except Exception as e:
+        return prediction_error(e)
+
+
+def score_batch_request(rides):
+    """
+    Validate and score the decoded body of a /predict/batch request.
+    
+    Args:
+        rides: Decoded JSON body (None if the body was missing or invalid)
+    
+    Returns:
+        tuple: (response dict, HTTP status code)
+    """
+    try:
+        if not isinstance(rides, list):
+            metrics.ERRORS.inc('/predict/batch', 'not_a_list')
+            request_log.error('invalid_batch', error='Request body must be a JSON array')
+            return {'error': 'Request body must be a JSON array of rides'}, 400
+        
+        if len(rides) > MAX_BATCH_SIZE:
+            metrics.ERRORS.inc('/predict/batch', 'too_large')
+            request_log.error('invalid_batch', error='Batch too large', rides=len(rides))
+            return {'error': f'Batch size exceeds limit of {MAX_BATCH_SIZE} rides'}, 413
+        
+        start = time.perf_counter()
+        results = [None] * len(rides)
+        valid_indices = []
+        valid_rides = []
+        validate = RIDE_SCHEMA.validate
+        for i, ride in enumerate(rides):
+            ride, error = validate(ride)
+            if error is not None:
+                results[i] = {'index': i, 'error': error}
+                metrics.ERRORS.inc('/predict/batch', 'invalid_ride')
+            else:
+                valid_indices.append(i)
+                valid_rides.append(ride)
+        
+        prepared = time.perf_counter()
+        BATCH_FEATURE_SECONDS.observe(prepared - start)
+        preds = predict_batch(valid_rides)
+        BATCH_MODEL_SECONDS.observe(time.perf_counter() - prepared)
+        PREDICTIONS.observe_many(preds)
+        for i, pred in zip(valid_indices, preds):
+            results[i] = {'index': i, 'duration': pred}
+        
+        n_errors = len(rides) - len(valid_indices)
+        if request_log.sampled():
+            request_log.info('batch_response', predictions=len(valid_indices), errors=n_errors)
+        return {
+            'predictions': results,
+            'count': len(rides),
+            'errors': n_errors
+        }, 200
+        
+    except Exception as e:
+        metrics.ERRORS.inc('/predict/batch', type(e).__name__)
+        request_log.error('batch_failed', error=str(e), error_type=type(e).__name__)
+        return {'error': 'Internal server error'}, 500
+
+
+def health_status():
+    """
+    Service status reported by /health.
+    
+    Returns:
+        dict: Service name, whether the model and DictVectorizer are loaded,
+            the version of the served model, hot reload and prediction
+            cache counters
+    """
+    current = serving
+    return {
+        'status': 'healthy',
+        'model_loaded': current.scorer is not None,
+        'dv_loaded': current.dv is not None,
+        'service': 'NYC Taxi Duration Prediction',
+        'model': current.info(),
+        'model_reload': model_reloader.stats(),
+        'prediction_cache': prediction_cache.stats() if prediction_cache is not None else {'enabled': False}
+    }
+
+
+def reload_model_request(token):
+    """
+    Handle POST /admin/reload: load, validate and swap in the model file.
+    
+    Args:
+        token (str): Value of the X-Admin-Token header (None if missing)
+    
+    Returns:
+        tuple: (response dict, HTTP status code): 200 if the model was
+            reloaded or is unchanged, 422 if the new file was rejected (the
+            previous model keeps serving), 403/404 if not allowed
+    """
+    if not ADMIN_TOKEN:
+        return {'error': 'Not found'}, 404
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        request_log.error('invalid_admin_token')
+        return {'error': 'Forbidden'}, 403
+    result = model_reloader.reload(force=True)
+    return result, 422 if result['status'] == 'failed' else 200
+
+
+def metric_endpoint(path):
+    """Endpoint label of a request path (bounded, so unknown paths share one series)."""
+    return path if path in METRIC_ENDPOINTS else 'other'
+
+
+def read_json():
+    """
+    Decoded JSON body of the current request, or None if it is missing,
+    not declared as JSON or invalid (like request.get_json(silent=True)).
+    """
+    if not request.is_json:
+        return None
+    return json_codec.loads(request.get_data(cache=False))
+
+
+def json_response(body, status=200):
+    """Response with the body encoded by json_codec (sorted keys, like jsonify)."""
+    return Response(json_codec.dumps(body), status=status, content_type=json_codec.CONTENT_TYPE)
+
+
 # Create Flask application
 app = Flask('duration-prediction')
 
 
+@app.before_request
+def start_request_timer():
+    request.environ['metrics.start'] = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every response and observe its latency (excluding the WSGI server)."""
+    start = request.environ.get('metrics.start')
+    endpoint = metric_endpoint(request.path)
+    metrics.REQUESTS.inc(endpoint, str(response.status_code))
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+    return response
+
+
 @app.route('/predict', methods=['POST'])
 def predict_endpoint():
     """
@@ -122,43 +622,54 @@ def predict_endpoint():
         
         Response: {"duration": 12.34}
     """
-    try:
-        # Get JSON data from request
-        ride = request.get_json()
-        
-        if not ride:
-            logger.error("❌ Request without JSON data")
-            return jsonify({'error': 'No JSON data provided'}), 400
-        
-        # Validate required fields
-        required_fields = ['PULocationID', 'DOLocationID', 'trip_distance']
-        for field in required_fields:
-            if field not in ride:
-                logger.error(f"❌ Missing required field: {field}")
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        logger.info(f"🚕 New prediction: {ride['PULocationID']} -> {ride['DOLocationID']}")
-        
-        # Prepare features and predict
-        features = prepare_features(ride)
-        pred = predict(features)
-        
-        result = {
-            'duration': pred,
-            'pickup_location': ride['PULocationID'],
-            'dropoff_location': ride['DOLocationID'],
-            'trip_distance': ride['trip_distance']
+    body, status = score_ride_request(read_json())
+    return json_response(body, status)
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch_endpoint():
+    """
+    REST endpoint for predicting the duration of many trips at once.
+    
+    Method: POST
+    Content-Type: application/json
+    
+    Request Body:
+        [
+            {"PULocationID": int, "DOLocationID": int, "trip_distance": float},
+            ...
+        ]
+    
+    Response:
+        {
+            "predictions": [
+                {"index": 0, "duration": float},
+                {"index": 1, "error": str},   # Invalid trips are reported per item
+                ...
+            ],
+            "count": int,                      # Number of trips received
+            "errors": int                      # Number of invalid trips
         }
+    
+    Returns:
+        JSON response with one result per trip, in input order, or 400/413/500 error
+    
+    Note:
+        All valid trips are scored with a single vectorized model call, which
+        removes the per-request HTTP and sklearn overhead of N calls to /predict.
+    
+    Example:
+        curl -X POST http://localhost:9696/predict/batch \
+             -H "Content-Type: application/json" \
+             -d '[{"PULocationID": 161, "DOLocationID": 236, "trip_distance": 2.5},
+                  {"PULocationID": 1, "DOLocationID": 263}]'
         
-        logger.info(f"✅ Response sent: {pred:.2f} minutes")
-        return jsonify(result)
-        
-    except KeyError as e:
-        logger.error(f"❌ Missing field in request: {e}")
-        return jsonify({'error': f'Missing field: {str(e)}'}), 400
-    except Exception as e:
-        logger.error(f"❌ Error in prediction: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        Response: {"count": 2, "errors": 1, "predictions": [
+                      {"duration": 12.34, "index": 0},
+                      {"error": "Missing required field: trip_distance", "index": 1}]}
+    """
+    body, status = score_batch_request(read_json())
+    return json_response(body, status)
 
 
 @app.route('/health', methods=['GET'])
@@ -174,12 +685,36 @@ def health_check():
         
         Response: {"status": "healthy", "model_loaded": true}
     """
-    return jsonify({
-        'status': 'healthy',
-        'model_loaded': model is not None,
-        'dv_loaded': dv is not None,
-        'service': 'NYC Taxi Duration Prediction'
-    })
+    return json_response(health_status())
+
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_model_endpoint():
+    """
+    Reload lin_reg.bin without restarting the service.
+    
+    Disabled (404) unless MODEL_ADMIN_TOKEN is set. The new model is loaded
+    and validated in this request; other requests keep using the previous
+    model until it is swapped in.
+    
+    Example:
+        curl -X POST http://localhost:9696/admin/reload -H "X-Admin-Token: $MODEL_ADMIN_TOKEN"
+        
+        Response: {"previous": "3f2a...", "status": "reloaded", "version": "9b1c..."}
+    """
+    body, status = reload_model_request(request.headers.get('X-Admin-Token'))
+    return json_response(body, status)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint (text exposition format, see metrics.py).
+    
+    Example:
+        curl http://localhost:9696/metrics
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,307 @@
+"""NYC Taxi Duration Prediction - Async (ASGI) Web Service
+
+Asyncio serving mode with the same /predict, /predict/batch and /health
+contract as the Flask app in predict.py (both use the same request handlers).
+It is a plain ASGI application, so it only needs an ASGI server:
+
+    uvicorn predict_async:app --host 0.0.0.0 --port 9696
+
+The event loop only does network I/O. Decoding, scoring and encoding run in a
+bounded thread pool, so a burst of requests does not block the loop, and the
+number of requests admitted at once is capped: when it is reached new
+requests get 503 (with Retry-After) instead of queueing without limit.
+
+With PREDICT_MICROBATCH=1, concurrent /predict requests are grouped by a
+micro-batching dispatcher (micro_batching.py) and scored with one vectorized
+call per batch.
+
+GET /metrics serves the same Prometheus metrics as the Flask app, plus the
+executor gauges. With micro-batching, the model time of a /predict request
+includes its wait for the batch to be dispatched.
+
+Configuration (environment variables):
+    PREDICT_MAX_CONCURRENCY        Scoring threads (default: 4)
+    PREDICT_MAX_QUEUE              Requests admitted at once, running or waiting
+                                   for a thread; beyond it -> 503 (default: 64)
+    PREDICT_MICROBATCH             "1" to enable micro-batching (default: 0)
+    PREDICT_MICROBATCH_MAX_SIZE    Rides per batch before dispatching (default: 32)
+    PREDICT_MICROBATCH_MAX_WAIT_MS Longest wait of the first ride in a batch (default: 2)
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import json_codec
+import metrics
+import predict as service
+from micro_batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv('PREDICT_MAX_CONCURRENCY', '4'))
+MAX_QUEUE = int(os.getenv('PREDICT_MAX_QUEUE', '64'))
+MICROBATCH = os.getenv('PREDICT_MICROBATCH', '0') == '1'
+MICROBATCH_MAX_SIZE = int(os.getenv('PREDICT_MICROBATCH_MAX_SIZE', '32'))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv('PREDICT_MICROBATCH_MAX_WAIT_MS', '2'))
+
+
+class QueueFull(Exception):
+    """Raised when the executor already has max_pending requests admitted."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on admitted (running + waiting) calls.
+
+    The counters are only touched from the event loop thread, so they need
+    no lock.
+
+    Args:
+        max_workers (int): Scoring threads
+        max_pending (int): Calls admitted at once before rejecting
+
+    Attributes:
+        pending (int): Calls currently admitted
+        completed (int): Calls finished
+        rejected (int): Calls refused because the queue was full
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scoring')
+
+    async def run(self, func, *args):
+        """
+        Run func(*args) in the pool.
+
+        Raises:
+            QueueFull: If max_pending calls are already admitted
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise QueueFull()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self):
+        """Configuration and counters, reported on /health."""
+        return {
+            'max_concurrency': self.max_workers,
+            'max_queue': self.max_pending,
+            'pending': self.pending,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+executor = BoundedExecutor(MAX_CONCURRENCY, MAX_QUEUE)
+
+metrics.Gauge('taxi_executor_pending', 'Requests admitted to the scoring executor', lambda: executor.pending)
+metrics.Gauge('taxi_executor_rejected_total', 'Requests rejected with 503 because the executor was full',
+              lambda: executor.rejected, 'counter')
+
+def score_microbatch(rides):
+    """Score a micro-batch: (prediction, version of the model that scored it) per ride."""
+    current = service.serving
+    return [(pred, current.version) for pred in service.predict_batch(rides, 'microbatch', current)]
+
+
+def score_microbatch_ride(ride):
+    """Score one ride of a failed micro-batch: (prediction, model version)."""
+    current = service.serving
+    return current.scorer.predict_ride(ride), current.version
+
+
+# Each batch is one executor call, so the queue limit counts batches, not rides
+batcher = MicroBatcher(
+    score_batch=score_microbatch,
+    score_one=score_microbatch_ride,
+    run=executor.run,
+    max_batch_size=MICROBATCH_MAX_SIZE,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS
+) if MICROBATCH else None
+
+
+# Same codec as the Flask app (orjson when installed)
+encode = json_codec.dumps
+decode = json_codec.loads
+
+
+def handle_predict(raw):
+    """Decode, score and encode a /predict request (runs in the executor)."""
+    body, status = service.score_ride_request(decode(raw))
+    return encode(body), status
+
+
+def handle_predict_batch(raw):
+    """Decode, score and encode a /predict/batch request (runs in the executor)."""
+    body, status = service.score_batch_request(decode(raw))
+    return encode(body), status
+
+
+async def predict_microbatched(raw):
+    """
+    Handle a /predict request through the micro-batching dispatcher.
+
+    Validation and response building are the same as score_ride_request();
+    only the model call is shared with the other requests of the batch.
+
+    Raises:
+        QueueFull: If the batch could not be admitted to the executor
+    """
+    ride = decode(raw)
+    try:
+        start = time.perf_counter()
+        ride, error = service.check_ride_request(ride)
+        prepared = time.perf_counter()
+        service.PREDICT_FEATURE_SECONDS.observe(prepared - start)
+        if error is not None:
+            return encode(error[0]), error[1]
+        # Cache entries are tagged with the version of the model that scored
+        # them, as in predict_ride_cached()
+        cache = service.prediction_cache
+        pred = cache.get(ride, service.serving.version) if cache is not None else None
+        if pred is None:
+            pred, version = await batcher.submit(ride)
+            if cache is not None:
+                cache.put(ride, pred, version)
+        service.PREDICT_MODEL_SECONDS.observe(time.perf_counter() - prepared)
+        return encode(service.ride_response(ride, pred)), 200
+    except QueueFull:
+        raise
+    except Exception as e:
+        body, status = service.prediction_error(e)
+        return encode(body), status
+
+
+# (method, path) -> handler running in the executor
+ROUTES = {
+    ('POST', '/predict'): handle_predict,
+    ('POST', '/predict/batch'): handle_predict_batch,
+}
+
+
+async def read_body(receive):
+    """Read the full request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def send_response(send, status, body, headers=(), content_type=b'application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            logger.info('async_service_ready', extra={'fields': {
+                'max_concurrency': executor.max_workers,
+                'max_queue': executor.max_pending,
+                'micro_batching': batcher is not None
+            }})
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def route(scope, receive, send):
+    """Handle one HTTP request; returns the status code sent."""
+    method, path = scope['method'], scope['path']
+    if path == '/health' and method == 'GET':
+        status = {**service.health_status(), 'executor': executor.stats()}
+        if batcher is not None:
+            status['micro_batching'] = batcher.stats()
+        await send_response(send, 200, encode(status))
+        return 200
+
+    if path == '/admin/reload' and method == 'POST':
+        token = dict(scope['headers']).get(b'x-admin-token')
+        # Loading and validating the model blocks: keep it off the event loop
+        # and out of the scoring executor
+        body, status = await asyncio.get_running_loop().run_in_executor(
+            None, service.reload_model_request, token.decode('latin-1') if token is not None else None)
+        await send_response(send, status, encode(body))
+        return status
+
+    if path == '/metrics' and method == 'GET':
+        await send_response(send, 200, metrics.render().encode(), content_type=metrics.CONTENT_TYPE.encode())
+        return 200
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        status = 405 if any(route_path == path for _, route_path in ROUTES) else 404
+        await send_response(send, status, encode({'error': 'Not found' if status == 404 else 'Method not allowed'}))
+        return status
+
+    raw = await read_body(receive)
+    try:
+        if handler is handle_predict and batcher is not None:
+            body, status = await predict_microbatched(raw)
+        else:
+            body, status = await executor.run(handler, raw)
+    except QueueFull:
+        body, status = encode({'error': 'Server busy, retry later'}), 503
+        await send_response(send, status, body, [(b'retry-after', b'1')])
+        return status
+    await send_response(send, status, body)
+    return status
+
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point.
+
+    Routes:
+        POST /predict         Same contract as predict.py
+        POST /predict/batch   Same contract as predict.py
+        GET  /health          predict.py status plus executor and
+                              micro-batching counters
+        GET  /metrics         Prometheus metrics (see metrics.py)
+        POST /admin/reload    Hot model reload, same contract as predict.py
+
+    Returns 503 with Retry-After when the executor queue is full.
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    start = time.perf_counter()
+    endpoint = service.metric_endpoint(scope['path'])
+    status = await route(scope, receive, send)
+    metrics.REQUESTS.inc(endpoint, str(status))
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
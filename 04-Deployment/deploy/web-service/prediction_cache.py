@@ -0,0 +1,169 @@
+"""NYC Taxi Duration Prediction - In-process Prediction Cache
+
+LRU cache with TTL for single-ride predictions. Traffic is concentrated on a
+few hundred zone pairs, so most requests can be answered without scoring.
+
+Entries are keyed on (PULocationID, DOLocationID, distance bucket):
+    - Location IDs are keyed on their '%s' form, which is what the model sees
+      when it builds 'PU_DO' (so 161 and 161.0 are different keys, as they
+      are different features).
+    - The distance is quantized to multiples of distance_step. A cached value
+      is the prediction of the first ride seen in its bucket, so the error is
+      at most |trip_distance coefficient| * distance_step. With
+      distance_step=0 distances are keyed exactly and results are exact.
+
+The cache watches the model file: when its mtime or size changes (checked
+at most once per check_interval seconds) every entry is dropped. Entries can
+also be tagged with the version of the model that computed them: a lookup
+with another version is a miss, so a prediction of a model swapped out while
+it was being computed is never returned for the new one.
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache of predictions.
+
+    Args:
+        max_size (int): Maximum number of entries (least recently used are evicted)
+        ttl_seconds (float): Lifetime of an entry
+        distance_step (float): Distance quantization in miles (0 = exact)
+        model_path (str): Model file whose changes invalidate the cache (optional)
+        check_interval (float): Seconds between model file checks
+        clock (callable): Monotonic time source (for tests)
+
+    Attributes:
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups not found or expired
+        evictions (int): Entries dropped because of max_size
+        invalidations (int): Times the cache was cleared because the model changed
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=300.0, distance_step=0.01,
+                 model_path=None, check_interval=1.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.distance_step = distance_step
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_signature = self._signature()
+        self._next_check = clock() + check_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _signature(self):
+        if self.model_path is None:
+            return None
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _check_model(self, now):
+        """Drop every entry if the model file changed (called with the lock held)."""
+        if self.model_path is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._signature()
+        if signature != self._model_signature:
+            self._model_signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def key(self, ride):
+        """
+        Cache key of a ride, or None if it should not be cached (NaN/inf distance).
+
+        Raises:
+            KeyError: If a required field is missing
+            ValueError, TypeError: If trip_distance is not a number
+        """
+        distance = float(ride['trip_distance'])
+        if not math.isfinite(distance):
+            return None
+        if self.distance_step > 0:
+            distance = round(distance / self.distance_step)
+        return ('%s' % ride['PULocationID'], '%s' % ride['DOLocationID'], distance)
+
+    def get(self, ride, version=None):
+        """
+        Cached prediction for a ride.
+
+        Args:
+            ride (dict): Validated ride
+            version (str): Version of the model serving the ride; an entry
+                stored with another version is a miss
+
+        Returns:
+            float or None: Prediction, or None on a miss
+        """
+        key = self.key(ride)
+        if key is None:
+            return None
+        with self._lock:
+            now = self.clock()
+            self._check_model(now)
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now or entry[2] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, ride, value, version=None):
+        """
+        Store the prediction of a ride.
+
+        Args:
+            ride (dict): Validated ride
+            value (float): Its prediction
+            version (str): Version of the model that computed it
+        """
+        key = self.key(ride)
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl_seconds, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (e.g. after loading a new model)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Configuration and counters, reported on /health."""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': True,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'distance_step': self.distance_step,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,138 @@
+"""NYC Taxi Duration Prediction - Ride Request Schema
+
+Validation and type coercion of ride payloads, compiled once at import time.
+
+    PULocationID, DOLocationID   Integer zone ID in [1, 263]. Integral floats
+                                 (161.0) and digit strings ("161") are
+                                 coerced to int.
+    trip_distance                Finite, non-negative number. Numeric strings
+                                 ("2.5") are coerced to float.
+
+RideSchema builds one validation function for its bounds: the fields are read
+directly (no loop over a field list) and the common case, already well-typed
+values, is decided with `type(x) is int` / `type(x) is float` checks and one
+chained comparison. Only values that need coercion or are invalid take the
+slower path. A well-typed ride is returned as is, without copying.
+
+Coercing IDs also makes the prediction independent of the JSON number form:
+161.0 and 161 are different PU_DO features for the model, and 161.0 never
+matched a trained pair.
+
+Usage:
+    >>> ride, error = RIDE_SCHEMA.validate({'PULocationID': 161, 'DOLocationID': 236, 'trip_distance': 2.5})
+    >>> error is None
+    True
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import sys
+
+MIN_LOCATION_ID = 1
+MAX_LOCATION_ID = 263
+
+LOCATION_FIELDS = ('PULocationID', 'DOLocationID')
+DISTANCE_FIELD = 'trip_distance'
+REQUIRED_FIELDS = [*LOCATION_FIELDS, DISTANCE_FIELD]
+
+# Largest distance accepted: a larger int fails float() with OverflowError
+MAX_DISTANCE = sys.float_info.max
+
+# Prefix of the error returned when a field is missing
+MISSING_FIELD = 'Missing required field: '
+
+
+def _coerce_location(value, min_id, max_id):
+    """Location ID as int, or None if it is not an integer in [min_id, max_id]."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        if not value.is_integer():
+            return None
+        value = int(value)
+    elif isinstance(value, str):
+        text = value.strip()
+        if not (text.isascii() and text.isdigit()):
+            return None
+        value = int(text)
+    elif not isinstance(value, int):
+        return None
+    return value if min_id <= value <= max_id else None
+
+
+def _coerce_distance(value):
+    """Distance as a number, or None if it is not a finite, non-negative number."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    elif not isinstance(value, (int, float)):
+        return None
+    # Also rejects NaN, infinity and ints too large to convert to float
+    return value if 0 <= value <= MAX_DISTANCE else None
+
+
+class RideSchema:
+    """
+    Compiled validator for ride payloads.
+
+    Args:
+        min_location (int): Smallest valid zone ID
+        max_location (int): Largest valid zone ID
+
+    Attributes:
+        validate (callable): ride -> (ride, None) if valid, with coerced
+            values, or (None, error message) if not
+    """
+
+    def __init__(self, min_location=MIN_LOCATION_ID, max_location=MAX_LOCATION_ID):
+        self.min_location = min_location
+        self.max_location = max_location
+        self.validate = self._compile()
+
+    def _compile(self):
+        min_id, max_id = self.min_location, self.max_location
+        location_error = f'must be an integer between {min_id} and {max_id}'
+        distance_error = f'{DISTANCE_FIELD} must be a non-negative number'
+        max_distance = MAX_DISTANCE
+
+        def slow_path(ride, pu, do, distance):
+            """Coerce the values that are not already well-typed and in range."""
+            coerced = {}
+            for field, value in ((LOCATION_FIELDS[0], pu), (LOCATION_FIELDS[1], do)):
+                location = _coerce_location(value, min_id, max_id)
+                if location is None:
+                    return None, f'{field} {location_error}'
+                coerced[field] = location
+            distance = _coerce_distance(distance)
+            if distance is None:
+                return None, distance_error
+            coerced[DISTANCE_FIELD] = distance
+            return {**ride, **coerced}, None
+
+        def validate(ride):
+            try:
+                pu = ride['PULocationID']
+                do = ride['DOLocationID']
+                distance = ride['trip_distance']
+            except KeyError as e:
+                return None, f'{MISSING_FIELD}{e.args[0]}'
+            except (TypeError, IndexError):
+                # Decoded JSON that is not an object: list, str, number, null
+                return None, 'Ride must be a JSON object'
+            if (type(pu) is int and type(do) is int
+                    and (type(distance) is float or type(distance) is int)
+                    and min_id <= pu <= max_id and min_id <= do <= max_id
+                    and 0 <= distance <= max_distance):
+                return ride, None
+            return slow_path(ride, pu, do, distance)
+
+        return validate
+
+
+# Schema of /predict and /predict/batch rides
+RIDE_SCHEMA = RideSchema()
@@ -0,0 +1,180 @@
+"""NYC Taxi Duration Prediction - Service Logging
+
+Structured, sampled and asynchronous logging for the web service.
+
+    - Records are put on a bounded queue by the request thread and formatted
+      and written by a background thread (logging.handlers.QueueListener).
+      When the queue is full records are dropped and counted instead of
+      blocking requests.
+    - Every record is written as one JSON object per line, with the event
+      name as "msg" and the request fields as top-level keys.
+    - Per-request events are sampled: only 1 in LOG_SAMPLE_RATE requests is
+      logged. Errors are always logged.
+    - Nothing is formatted on the request thread: callers check sampled()
+      before building any fields, and the message is only rendered by the
+      background thread.
+    - A forked child (gunicorn workers with preload_app) gets its own queue
+      and background thread, as threads do not survive fork().
+
+Configuration (environment variables):
+    LOG_LEVEL        Minimum level (default: INFO)
+    LOG_SAMPLE_RATE  Log 1 in N requests (default: 100; 1 logs every request)
+    LOG_QUEUE_SIZE   Records buffered before dropping (default: 10000)
+
+Author: MLOps Team
+Version: 1.0
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a single-line JSON object."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and never formats on the calling thread.
+
+    Attributes:
+        dropped (int): Records discarded because the queue was full
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The default prepare() renders the message here; leave it to the listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SampledLogger:
+    """
+    Per-request logging with 1-in-N sampling.
+
+    Usage:
+        >>> if request_log.sampled():
+        ...     request_log.info('prediction', pickup=161, duration=12.3)
+
+    Args:
+        logger (logging.Logger): Underlying logger
+        sample_rate (int): Log 1 in sample_rate requests
+    """
+
+    def __init__(self, logger, sample_rate=1):
+        self.logger = logger
+        self.sample_rate = max(1, int(sample_rate))
+        self._counter = itertools.count()
+
+    def sampled(self, level=logging.INFO):
+        """True if this request should be logged (cheap when the level is disabled)."""
+        if not self.logger.isEnabledFor(level):
+            return False
+        # next() on itertools.count is atomic under the GIL
+        return next(self._counter) % self.sample_rate == 0
+
+    def info(self, event, **fields):
+        self.logger.info(event, extra={'fields': fields})
+
+    def error(self, event, **fields):
+        """Errors are not sampled."""
+        self.logger.error(event, extra={'fields': fields})
+
+
+_listener = None
+_queue_handler = None
+_config = None
+
+
+def setup_logging(level=None, queue_size=None, stream=None, use_queue=True):
+    """
+    Configure the root logger with JSON output, through a background thread.
+
+    Calling it again replaces the previous configuration.
+
+    Args:
+        level (str): Minimum level (default: $LOG_LEVEL or INFO)
+        queue_size (int): Queue capacity (default: $LOG_QUEUE_SIZE or 10000)
+        stream: Output stream (default: stderr)
+        use_queue (bool): False writes synchronously (for comparison)
+
+    Returns:
+        logging.Handler: Handler writing the records
+    """
+    global _listener, _queue_handler, _config
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    queue_size = queue_size or int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    _config = (level, queue_size, stream, use_queue)
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    if use_queue:
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+    else:
+        root.addHandler(output)
+    root.setLevel(level)
+    return output
+
+
+def shutdown_logging():
+    """Flush the queue and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records():
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _restart_after_fork():
+    """In a forked child: the listener thread is gone, start a new one."""
+    global _listener
+    if _listener is not None:
+        # The parent's thread does not exist here; do not stop() it
+        _listener = None
+        setup_logging(*_config)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):   # POSIX only
+    os.register_at_fork(after_in_child=_restart_after_fork)